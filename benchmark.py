@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+# Time the offline update.py commands and img_format.py on synthetic catalogs.
+#
+# python benchmark.py --scales=1,10,100 --output=bench_results.jsonl
+# python benchmark.py --scales=1,10 --compare=bench_results.jsonl
+#
+# Each scale generates base * scale assets with synthetic_catalog.py and runs the
+# commands in order on the same catalog, like a scheduled run would. Every
+# command runs in its own process so wall time includes interpreter startup and
+# peak memory is that process's maximum resident set size. --output appends one
+# JSON line per run, tagged with the git commit, so runs can be compared across
+# commits with --compare.
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import synthetic_catalog
+
+REPOSITORY_ROOT = os.path.dirname(os.path.abspath(__file__))
+UPDATE_SCRIPT = os.path.join(REPOSITORY_ROOT, "update.py")
+IMG_FORMAT_SCRIPT = os.path.join(REPOSITORY_ROOT, "img_format.py")
+COMMANDS = {
+    "validate": [UPDATE_SCRIPT, "validate"],
+    "searchindex": [UPDATE_SCRIPT, "searchindex"],
+    "libraryurls": [UPDATE_SCRIPT, "libraryurls"],
+    "header": [UPDATE_SCRIPT, "header"],
+    "img_format": [IMG_FORMAT_SCRIPT],
+}
+
+
+def pillow_available():
+    result = subprocess.run(
+        [sys.executable, "-c", "import PIL"], capture_output=True, text=True
+    )
+    return result.returncode == 0
+
+
+def run_command(arguments, directory):
+    """Run a command and return (seconds, peak RSS in MB, exit status)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable] + arguments,
+        cwd=directory,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return seconds, usage.ru_maxrss / divisor, process.returncode
+
+
+def git_commit():
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=REPOSITORY_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    commit = result.stdout.strip() or "unknown"
+    dirty = subprocess.run(
+        ["git", "diff", "--quiet", "HEAD"], cwd=REPOSITORY_ROOT
+    ).returncode
+    return commit + ("-dirty" if dirty else "")
+
+
+def run_benchmarks(base, scales, commands, seed):
+    results = []
+    for scale in scales:
+        count = base * scale
+        directory = tempfile.mkdtemp(prefix="asset-portal-benchmark-")
+        try:
+            synthetic_catalog.generate_catalog(directory, count, seed, git=True)
+            # Touch one percent of the assets so header has changes to record.
+            assets_directory = os.path.join(directory, "assets")
+            filenames = sorted(
+                name for name in os.listdir(assets_directory) if name.endswith(".json")
+            )
+            for name in filenames[:: max(1, len(filenames) // max(1, count // 100))]:
+                path = os.path.join(assets_directory, name)
+                with open(path, "r", encoding="utf-8") as f:
+                    asset = json.load(f)
+                asset["stars"] = asset.get("stars", 0) + 1
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(asset, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+            for command in commands:
+                seconds, peak_rss, status = run_command(COMMANDS[command], directory)
+                result = {
+                    "command": command,
+                    "scale": scale,
+                    "assets": count,
+                    "seconds": round(seconds, 4),
+                    "assets_per_second": round(count / seconds, 1),
+                    "peak_rss_mb": round(peak_rss, 1),
+                    "status": status,
+                }
+                results.append(result)
+                print(
+                    "%-12s %4dx %7d assets %9.3fs %10.1f assets/s %8.1f MB%s"
+                    % (
+                        command,
+                        scale,
+                        count,
+                        seconds,
+                        result["assets_per_second"],
+                        peak_rss,
+                        "" if status == 0 else "  (exit %d)" % status,
+                    ),
+                    flush=True,
+                )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def compare(previous, results):
+    print("Compared with %s:" % previous["commit"])
+    earlier = {(r["command"], r["scale"]): r for r in previous["results"]}
+    for result in results:
+        before = earlier.get((result["command"], result["scale"]))
+        if not before:
+            continue
+        print(
+            "%-12s %4dx time %+6.1f%%  memory %+6.1f%%"
+            % (
+                result["command"],
+                result["scale"],
+                (result["seconds"] / before["seconds"] - 1) * 100,
+                (result["peak_rss_mb"] / before["peak_rss_mb"] - 1) * 100,
+            )
+        )
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--base", type=int, default=319, help="Assets at 1x scale (default 319)"
+    )
+    parser.add_argument(
+        "--scales", default="1,10,100", help="Comma separated scale factors"
+    )
+    parser.add_argument(
+        "--commands",
+        default=",".join(COMMANDS),
+        help="Comma separated commands (%s)" % ", ".join(COMMANDS),
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Append results as a JSON line to this file")
+    parser.add_argument(
+        "--compare", help="Compare with the last result line in this file"
+    )
+    args = parser.parse_args()
+
+    commands = [command for command in args.commands.split(",") if command]
+    for command in commands:
+        if command not in COMMANDS:
+            parser.error("unknown command: %s" % command)
+    if "img_format" in commands and not pillow_available():
+        print("Pillow is not installed; skipping img_format")
+        commands.remove("img_format")
+
+    previous = None
+    if args.compare and os.path.exists(args.compare):
+        with open(args.compare, "r", encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        if lines:
+            previous = json.loads(lines[-1])
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    results = run_benchmarks(args.base, scales, commands, args.seed)
+    run = {
+        "commit": git_commit(),
+        "time": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "base": args.base,
+        "seed": args.seed,
+        "results": results,
+    }
+    if previous:
+        compare(previous, results)
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, sort_keys=True) + "\n")
+
+
+if __name__ == "__main__":
+    main()
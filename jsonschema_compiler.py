@@ -0,0 +1,597 @@
+#!/usr/bin/env python
+"""Compile a JSON Schema into a specialized Python validator module.
+
+Each subschema becomes a small function with its checks inlined, so
+validating a document does not walk the schema at runtime. The generated
+module only needs the standard library and exposes validate(data), which
+returns a list of error messages (an empty list means the data is valid).
+
+Only the keywords used by the asset portal schemas are supported. Unknown
+keywords and recursive $ref values raise SchemaCompileError instead of being
+silently ignored.
+"""
+
+import hashlib
+import json
+import sys
+from argparse import ArgumentParser
+
+ANNOTATION_KEYWORDS = set(
+    [
+        "$comment",
+        "$id",
+        "$schema",
+        "default",
+        "description",
+        "examples",
+        "format",
+        "title",
+    ]
+)
+SUPPORTED_KEYWORDS = ANNOTATION_KEYWORDS | set(
+    [
+        "$defs",
+        "$ref",
+        "additionalProperties",
+        "allOf",
+        "anyOf",
+        "const",
+        "definitions",
+        "enum",
+        "exclusiveMaximum",
+        "exclusiveMinimum",
+        "items",
+        "maxItems",
+        "maxLength",
+        "maximum",
+        "minItems",
+        "minLength",
+        "minimum",
+        "pattern",
+        "properties",
+        "required",
+        "type",
+        "uniqueItems",
+    ]
+)
+TYPE_CHECKS = {
+    "array": "isinstance({0}, list)",
+    "boolean": "isinstance({0}, bool)",
+    "integer": "(isinstance({0}, int) and not isinstance({0}, bool))",
+    "null": "{0} is None",
+    "number": "(isinstance({0}, (int, float)) and not isinstance({0}, bool))",
+    "object": "isinstance({0}, dict)",
+    "string": "isinstance({0}, str)",
+}
+TYPE_NAMES = {
+    "array": "an array",
+    "boolean": "a boolean",
+    "integer": "an integer",
+    "null": "null",
+    "number": "a number",
+    "object": "an object",
+    "string": "a string",
+}
+# The generated module is laid out the way black formats it, so it passes the
+# same lint as the rest of the repository without a formatter at build time.
+LINE_LENGTH = 88
+INDENT = "    "
+
+RUNTIME = """
+def _join(path, key):
+    return "{}.{}".format(path, key) if path else key
+
+
+def _index(path, index):
+    return "{}[{}]".format(path or "value", index)
+
+
+def _label(path):
+    return path or "value"
+
+
+def _error(errors, path, message):
+    errors.append("{} {}".format(_label(path), message))
+
+
+def _unique(items):
+    seen = set()
+    for item in items:
+        key = json.dumps(item, sort_keys=True)
+        if key in seen:
+            return False
+        seen.add(key)
+    return True
+"""
+
+
+class SchemaCompileError(Exception):
+    pass
+
+
+def schema_sha256(schema):
+    return hashlib.sha256(
+        json.dumps(schema, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def literal(value):
+    """Return value as Python source, quoting strings the way black does."""
+    if isinstance(value, str):
+        if value.count('"') <= value.count("'"):
+            return json.dumps(value, ensure_ascii=False)
+        # Single quotes need fewer escapes.
+        escaped = {"'": "\\'", '"': '"'}
+        return "'{}'".format(
+            "".join(
+                escaped.get(char) or json.dumps(char, ensure_ascii=False)[1:-1]
+                for char in value
+            )
+        )
+    if isinstance(value, list):
+        return "[{}]".format(", ".join(literal(item) for item in value))
+    if isinstance(value, dict):
+        return "{{{}}}".format(
+            ", ".join(
+                "{}: {}".format(literal(key), literal(item))
+                for key, item in value.items()
+            )
+        )
+    return repr(value)
+
+
+class Line:
+    """One statement or expression of generated code, split like black does.
+
+    items are the strings or nested Lines between head and tail. When the
+    whole does not fit on one line, it is split inside its brackets: first
+    with all items on one indented line, then with one item per line. A
+    single item that is still too long is split the same way in turn.
+    flat_head and flat_tail replace head and tail when nothing is split, for
+    conditions that black only wraps in parentheses when they are too long.
+    """
+
+    def __init__(
+        self, head, items=None, tail="", joiner=", ", flat_head=None, flat_tail=None
+    ):
+        self.head = head
+        self.items = items
+        self.tail = tail
+        self.joiner = joiner
+        self.flat_head = head if flat_head is None else flat_head
+        self.flat_tail = tail if flat_tail is None else flat_tail
+        self.indent = ""
+
+    def indented(self):
+        line = Line(
+            self.head,
+            self.items,
+            self.tail,
+            self.joiner,
+            self.flat_head,
+            self.flat_tail,
+        )
+        line.indent = self.indent + INDENT
+        return line
+
+    def body(self):
+        return self.joiner.join(
+            item.flat(True) if isinstance(item, Line) else item for item in self.items
+        )
+
+    def flat(self, parenthesized=False):
+        if self.items is None:
+            return self.head
+        if parenthesized:
+            return self.head + self.body() + self.tail
+        return self.flat_head + self.body() + self.flat_tail
+
+    def render(self, indent=None, suffix=""):
+        indent = self.indent if indent is None else indent
+        line = indent + self.flat() + suffix
+        if self.items is None or len(line) <= LINE_LENGTH:
+            return [line]
+        inner = indent + INDENT
+        if len(inner + self.body()) <= LINE_LENGTH:
+            lines = [inner + self.body()]
+        elif len(self.items) == 1:
+            item = self.items[0]
+            if isinstance(item, Line):
+                lines = item.render(inner)
+            else:
+                lines = [inner + item]
+        elif self.joiner == ", ":
+            lines = []
+            for item in self.items:
+                if isinstance(item, Line):
+                    lines.extend(item.render(inner, ","))
+                else:
+                    lines.append(inner + item + ",")
+        else:
+            operator = self.joiner.lstrip()
+            lines = [inner + self.items[0]]
+            lines.extend(inner + operator + item for item in self.items[1:])
+        return [indent + self.head] + lines + [indent + self.tail + suffix]
+
+
+def call(function, *arguments):
+    return Line(function + "(", list(arguments), ")")
+
+
+def condition(items, operator):
+    """Return an if statement header such as "if a not in b:"."""
+    return Line("if (", items, "):", " {} ".format(operator), "if ", ":")
+
+
+def error(path, message):
+    return call("_error", "errors", path, literal(message))
+
+
+def join(path, key):
+    return call("_join", path, key)
+
+
+def indented(lines):
+    return [line.indented() for line in lines]
+
+
+class SchemaCompiler:
+    def __init__(self, schema):
+        self.schema = schema
+        self.functions = []
+        self.constants = []
+        self.refs = {}
+        self.uses_re = False
+
+    def constant(self, expression, items=None, tail=""):
+        """Add a module constant and return its name.
+
+        With items, expression is the opening of a bracketed value that holds
+        items, closed by tail.
+        """
+        name = "_CONSTANT_{}".format(len(self.constants))
+        self.constants.append(Line(name + " = " + expression, items, tail).render())
+        return name
+
+    def frozenset_constant(self, values):
+        items = [literal(value) for value in sorted(values)]
+        return self.constant("frozenset(", [Line("[", items, "]")], ")")
+
+    def resolve(self, ref):
+        if ref != "#" and not ref.startswith("#/"):
+            raise SchemaCompileError("only local $ref values are supported: " + ref)
+        node = self.schema
+        for part in ref[2:].split("/") if ref != "#" else []:
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(node, dict) or part not in node:
+                raise SchemaCompileError("unresolvable $ref: " + ref)
+            node = node[part]
+        return node
+
+    def ref_function(self, ref):
+        if ref not in self.refs:
+            self.refs[ref] = None
+            self.refs[ref] = self.compile(self.resolve(ref))
+        return self.refs[ref]
+
+    def compile(self, schema):
+        """Compile one subschema and return the name of its function."""
+        index = len(self.functions)
+        name = "_validate_{}".format(index)
+        self.functions.append(None)
+        if schema is True or schema == {}:
+            body = [Line("pass")]
+        elif schema is False:
+            body = [error("path", "is not allowed")]
+        elif isinstance(schema, dict):
+            body = self.compile_body(schema)
+        else:
+            raise SchemaCompileError("schema must be an object or boolean")
+        lines = ["def {}(data, path, errors):".format(name)]
+        for line in indented(body or [Line("pass")]):
+            lines.extend(line.render())
+        self.functions[index] = "\n".join(lines)
+        return name
+
+    def compile_body(self, schema):
+        unsupported = set(schema) - SUPPORTED_KEYWORDS
+        if unsupported:
+            raise SchemaCompileError(
+                "unsupported keywords: {}".format(", ".join(sorted(unsupported)))
+            )
+        body = []
+
+        if "$ref" in schema:
+            if schema["$ref"] in self.refs and self.refs[schema["$ref"]] is None:
+                raise SchemaCompileError("recursive $ref: " + schema["$ref"])
+            body.append(
+                call(self.ref_function(schema["$ref"]), "data", "path", "errors")
+            )
+        for subschema in schema.get("allOf", []):
+            body.append(call(self.compile(subschema), "data", "path", "errors"))
+        if "anyOf" in schema:
+            names = [self.compile(subschema) for subschema in schema["anyOf"]]
+            if len(names) == 1:
+                loop = Line("for _function in ({},):".format(names[0]))
+            else:
+                loop = Line("for _function in (", names, "):")
+            body.append(loop)
+            body.extend(
+                indented(
+                    [
+                        Line("_errors = []"),
+                        Line("_function(data, path, _errors)"),
+                        Line("if not _errors:"),
+                        Line("break").indented(),
+                    ]
+                )
+            )
+            body.append(Line("else:"))
+            body.append(error("path", "does not match any allowed schema").indented())
+
+        types = schema.get("type")
+        if isinstance(types, str):
+            types = [types]
+        if types is not None:
+            for type_name in types:
+                if type_name not in TYPE_CHECKS:
+                    raise SchemaCompileError("unknown type: {}".format(type_name))
+            checks = [TYPE_CHECKS[type_name].format("data") for type_name in types]
+            if len(checks) == 1:
+                body.append(Line("if not {}:".format(checks[0])))
+            else:
+                body.append(Line("if not (", checks, "):", " or "))
+            expected = " or ".join(TYPE_NAMES[type_name] for type_name in types)
+            body.extend(
+                indented([error("path", "must be " + expected), Line("return")])
+            )
+
+        if "enum" in schema:
+            values = self.constant(
+                "[", [literal(value) for value in schema["enum"]], "]"
+            )
+            body.append(Line("if data not in {}:".format(values)))
+            body.append(
+                error("path", "must be one of " + json.dumps(schema["enum"])).indented()
+            )
+        if "const" in schema:
+            body.append(Line("if data != {}:".format(literal(schema["const"]))))
+            body.append(
+                error("path", "must be " + json.dumps(schema["const"])).indented()
+            )
+
+        body.extend(self.guarded("string", types, self.string_checks(schema)))
+        body.extend(self.guarded("number", types, self.number_checks(schema)))
+        body.extend(self.guarded("array", types, self.array_checks(schema)))
+        body.extend(self.guarded("object", types, self.object_checks(schema)))
+        return body
+
+    def guarded(self, type_name, types, checks):
+        """Only run checks for a type when the data may have another type."""
+        if not checks:
+            return []
+        if types is not None and all(
+            t == type_name or (type_name == "number" and t == "integer") for t in types
+        ):
+            return checks
+        if (
+            types is not None
+            and type_name not in types
+            and not (type_name == "number" and "integer" in types)
+        ):
+            return []
+        check = TYPE_CHECKS[type_name].format("data")
+        if check.startswith("("):
+            check = check[1:-1]
+        return [Line("if {}:".format(check))] + (indented(checks))
+
+    def string_checks(self, schema):
+        checks = []
+        if schema.get("minLength") == 1:
+            checks.extend(
+                [Line("if not data:"), error("path", "must not be empty").indented()]
+            )
+        elif "minLength" in schema:
+            length = int(schema["minLength"])
+            checks.extend(
+                [
+                    Line("if len(data) < {}:".format(length)),
+                    error(
+                        "path", "must be at least {} characters".format(length)
+                    ).indented(),
+                ]
+            )
+        if "maxLength" in schema:
+            length = int(schema["maxLength"])
+            checks.extend(
+                [
+                    Line("if len(data) > {}:".format(length)),
+                    error(
+                        "path", "must be at most {} characters".format(length)
+                    ).indented(),
+                ]
+            )
+        if "pattern" in schema:
+            self.uses_re = True
+            pattern = self.constant("re.compile(", [literal(schema["pattern"])], ")")
+            checks.extend(
+                [
+                    Line("if not {}.search(data):".format(pattern)),
+                    error("path", "must match " + schema["pattern"]).indented(),
+                ]
+            )
+        return checks
+
+    def number_checks(self, schema):
+        checks = []
+        for keyword, operator, message in (
+            ("minimum", "<", "at least"),
+            ("maximum", ">", "at most"),
+            ("exclusiveMinimum", "<=", "greater than"),
+            ("exclusiveMaximum", ">=", "less than"),
+        ):
+            if keyword in schema:
+                checks.extend(
+                    [
+                        Line("if data {} {!r}:".format(operator, schema[keyword])),
+                        error(
+                            "path", "must be {} {}".format(message, schema[keyword])
+                        ).indented(),
+                    ]
+                )
+        return checks
+
+    def array_checks(self, schema):
+        checks = []
+        if "minItems" in schema:
+            count = int(schema["minItems"])
+            checks.extend(
+                [
+                    Line("if len(data) < {}:".format(count)),
+                    error(
+                        "path", "must contain at least {} entries".format(count)
+                    ).indented(),
+                ]
+            )
+        if "maxItems" in schema:
+            count = int(schema["maxItems"])
+            checks.extend(
+                [
+                    Line("if len(data) > {}:".format(count)),
+                    error(
+                        "path", "can contain at most {} entries".format(count)
+                    ).indented(),
+                ]
+            )
+        if schema.get("uniqueItems"):
+            checks.extend(
+                [
+                    Line("if not _unique(data):"),
+                    error("path", "must not contain duplicate entries").indented(),
+                ]
+            )
+        if "items" in schema:
+            if not isinstance(schema["items"], (dict, bool)):
+                raise SchemaCompileError("items must be a schema")
+            function = self.compile(schema["items"])
+            checks.extend(
+                [
+                    Line("for _index_value, _item in enumerate(data):"),
+                    call(
+                        function,
+                        "_item",
+                        call("_index", "path", "_index_value"),
+                        "errors",
+                    ).indented(),
+                ]
+            )
+        return checks
+
+    def object_checks(self, schema):
+        checks = []
+        for field in schema.get("required", []):
+            checks.extend(
+                [
+                    condition([literal(field), "data"], "not in"),
+                    error(join("path", literal(field)), "is required").indented(),
+                ]
+            )
+        properties = schema.get("properties", {})
+        for field in sorted(properties):
+            function = self.compile(properties[field])
+            checks.extend(
+                [
+                    condition([literal(field), "data"], "in"),
+                    call(
+                        function,
+                        Line("data[", [literal(field)], "]"),
+                        join("path", literal(field)),
+                        "errors",
+                    ).indented(),
+                ]
+            )
+        additional = schema.get("additionalProperties", True)
+        if additional is False:
+            known = self.frozenset_constant(properties)
+            checks.extend(
+                [
+                    Line("for _key in data:"),
+                    Line("if _key not in {}:".format(known)).indented(),
+                    error(join("path", "_key"), "is not a supported field")
+                    .indented()
+                    .indented(),
+                ]
+            )
+        elif additional is not True:
+            known = self.frozenset_constant(properties)
+            function = self.compile(additional)
+            checks.extend(
+                [
+                    Line("for _key, _value in data.items():"),
+                    Line("if _key not in {}:".format(known)).indented(),
+                    call(function, "_value", join("path", "_key"), "errors")
+                    .indented()
+                    .indented(),
+                ]
+            )
+        return checks
+
+    def module_source(self, source_name):
+        root = self.compile(self.schema)
+        header = [
+            "# Generated by jsonschema_compiler.py from {}. Do not edit.".format(
+                source_name
+            ),
+            "# Schema sha256: {}".format(schema_sha256(self.schema)),
+            "",
+            "import json",
+        ]
+        if self.uses_re:
+            header.append("import re")
+        header.extend(["", 'SCHEMA_SHA256 = "{}"'.format(schema_sha256(self.schema))])
+        for constant in self.constants:
+            header.extend(constant)
+        validate = "\n".join(
+            [
+                "def validate(data):",
+                '    """Return a list of schema errors; an empty list means data is valid."""',
+                "    errors = []",
+                "    {}(data, None, errors)".format(root),
+                "    return errors",
+            ]
+        )
+        blocks = ["\n".join(header), RUNTIME.strip()] + self.functions + [validate]
+        # Top-level definitions are separated by two blank lines.
+        return "\n\n\n".join(blocks) + "\n"
+
+
+def compile_schema(schema, source_name="schema"):
+    """Return the source code of a validator module for schema."""
+    return SchemaCompiler(schema).module_source(source_name)
+
+
+def load_validator(source, name="compiled_schema"):
+    """Execute generated validator source and return its validate function."""
+    namespace = {"__name__": name}
+    exec(compile(source, name, "exec"), namespace)
+    return namespace["validate"]
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("schema", help="JSON Schema file to compile")
+    parser.add_argument("output", help="Python module to write")
+    args = parser.parse_args(argv)
+    with open(args.schema, "r", encoding="utf-8") as schema_file:
+        schema = json.load(schema_file)
+    try:
+        source = compile_schema(schema, args.schema)
+    except SchemaCompileError as error:
+        print("Could not compile {}: {}".format(args.schema, error))
+        sys.exit(1)
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        output_file.write(source)
+
+
+if __name__ == "__main__":
+    main()
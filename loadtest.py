@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+# Load test for the catalog server started with `python update.py serve`.
+#
+# python loadtest.py --requests=20000 --concurrency=16 /assets /assets/druid "/search?q=camera"
+
+import http.client
+import threading
+import time
+from argparse import ArgumentParser
+
+
+def run_worker(host, port, paths, count, headers, results, lock):
+    connection = http.client.HTTPConnection(host, port)
+    latencies = []
+    statuses = {}
+    received = 0
+    for index in range(count):
+        path = paths[index % len(paths)]
+        start = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        received += len(response.read())
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+    connection.close()
+    with lock:
+        results["latencies"].extend(latencies)
+        results["bytes"] += received
+        for status, status_count in statuses.items():
+            results["statuses"][status] = (
+                results["statuses"].get(status, 0) + status_count
+            )
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("paths", nargs="*", default=["/assets"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--gzip", action="store_true", help="Send Accept-Encoding: gzip"
+    )
+    parser.add_argument(
+        "--etag",
+        action="store_true",
+        help="Revalidate with If-None-Match using the ETag of the first response",
+    )
+    args = parser.parse_args()
+
+    headers = {}
+    if args.gzip:
+        headers["Accept-Encoding"] = "gzip"
+    if args.etag:
+        connection = http.client.HTTPConnection(args.host, args.port)
+        connection.request("GET", args.paths[0])
+        response = connection.getresponse()
+        response.read()
+        headers["If-None-Match"] = response.getheader("ETag")
+        connection.close()
+
+    results = {"latencies": [], "bytes": 0, "statuses": {}}
+    lock = threading.Lock()
+    per_worker = max(1, args.requests // args.concurrency)
+    workers = [
+        threading.Thread(
+            target=run_worker,
+            args=(args.host, args.port, args.paths, per_worker, headers, results, lock),
+        )
+        for _ in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(results["latencies"])
+    total = len(latencies)
+    print("requests:    %d in %.2fs" % (total, elapsed))
+    print("throughput:  %.0f requests/s" % (total / elapsed))
+    print("transferred: %.1f KB/s" % (results["bytes"] / elapsed / 1024))
+    print(
+        "latency:     p50 %.2fms, p99 %.2fms"
+        % (latencies[total // 2] * 1000, latencies[int(total * 0.99)] * 1000)
+    )
+    print("statuses:    %s" % results["statuses"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+# Generated by jsonschema_compiler.py from schema/asset.schema.json. Do not edit.
+# Schema sha256: 60b7aa7a48aca4723a061e0d3c0b9c75f6163ad290f11de59e0b9b71bdd19e9c
+
+import json
+
+SCHEMA_SHA256 = "60b7aa7a48aca4723a061e0d3c0b9c75f6163ad290f11de59e0b9b71bdd19e9c"
+_CONSTANT_0 = frozenset(["hero", "thumb"])
+_CONSTANT_1 = frozenset(["message", "min_defold_version", "published_at", "tag", "zip"])
+_CONSTANT_2 = frozenset(["published_at", "version", "zip"])
+_CONSTANT_3 = frozenset(
+    [
+        "author_id",
+        "description",
+        "description_long",
+        "external_actions",
+        "forum_url",
+        "id",
+        "images",
+        "isDefoldLibrary",
+        "latest_release",
+        "library_detection_auto_update",
+        "library_release_tag_prefix",
+        "library_url",
+        "library_url_auto_update",
+        "license",
+        "name",
+        "platforms",
+        "project_url",
+        "release_history",
+        "release_tags",
+        "releases",
+        "stars",
+        "tags",
+        "timestamp",
+        "website_url",
+    ]
+)
+
+
+def _join(path, key):
+    return "{}.{}".format(path, key) if path else key
+
+
+def _index(path, index):
+    return "{}[{}]".format(path or "value", index)
+
+
+def _label(path):
+    return path or "value"
+
+
+def _error(errors, path, message):
+    errors.append("{} {}".format(_label(path), message))
+
+
+def _unique(items):
+    seen = set()
+    for item in items:
+        key = json.dumps(item, sort_keys=True)
+        if key in seen:
+            return False
+        seen.add(key)
+    return True
+
+
+def _validate_0(data, path, errors):
+    if not isinstance(data, dict):
+        _error(errors, path, "must be an object")
+        return
+    if "author_id" not in data:
+        _error(errors, _join(path, "author_id"), "is required")
+    if "images" not in data:
+        _error(errors, _join(path, "images"), "is required")
+    if "author_id" in data:
+        _validate_1(data["author_id"], _join(path, "author_id"), errors)
+    if "description" in data:
+        _validate_2(data["description"], _join(path, "description"), errors)
+    if "description_long" in data:
+        _validate_3(data["description_long"], _join(path, "description_long"), errors)
+    if "external_actions" in data:
+        _validate_4(data["external_actions"], _join(path, "external_actions"), errors)
+    if "forum_url" in data:
+        _validate_6(data["forum_url"], _join(path, "forum_url"), errors)
+    if "id" in data:
+        _validate_7(data["id"], _join(path, "id"), errors)
+    if "images" in data:
+        _validate_8(data["images"], _join(path, "images"), errors)
+    if "isDefoldLibrary" in data:
+        _validate_11(data["isDefoldLibrary"], _join(path, "isDefoldLibrary"), errors)
+    if "latest_release" in data:
+        _validate_12(data["latest_release"], _join(path, "latest_release"), errors)
+    if "library_detection_auto_update" in data:
+        _validate_19(
+            data["library_detection_auto_update"],
+            _join(path, "library_detection_auto_update"),
+            errors,
+        )
+    if "library_release_tag_prefix" in data:
+        _validate_20(
+            data["library_release_tag_prefix"],
+            _join(path, "library_release_tag_prefix"),
+            errors,
+        )
+    if "library_url" in data:
+        _validate_21(data["library_url"], _join(path, "library_url"), errors)
+    if "library_url_auto_update" in data:
+        _validate_22(
+            data["library_url_auto_update"],
+            _join(path, "library_url_auto_update"),
+            errors,
+        )
+    if "license" in data:
+        _validate_23(data["license"], _join(path, "license"), errors)
+    if "name" in data:
+        _validate_24(data["name"], _join(path, "name"), errors)
+    if "platforms" in data:
+        _validate_25(data["platforms"], _join(path, "platforms"), errors)
+    if "project_url" in data:
+        _validate_28(data["project_url"], _join(path, "project_url"), errors)
+    if "release_history" in data:
+        _validate_29(data["release_history"], _join(path, "release_history"), errors)
+    if "release_tags" in data:
+        _validate_30(data["release_tags"], _join(path, "release_tags"), errors)
+    if "releases" in data:
+        _validate_36(data["releases"], _join(path, "releases"), errors)
+    if "stars" in data:
+        _validate_38(data["stars"], _join(path, "stars"), errors)
+    if "tags" in data:
+        _validate_39(data["tags"], _join(path, "tags"), errors)
+    if "timestamp" in data:
+        _validate_40(data["timestamp"], _join(path, "timestamp"), errors)
+    if "website_url" in data:
+        _validate_41(data["website_url"], _join(path, "website_url"), errors)
+    for _key in data:
+        if _key not in _CONSTANT_3:
+            _error(errors, _join(path, _key), "is not a supported field")
+
+
+def _validate_1(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_2(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_3(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_4(data, path, errors):
+    if not isinstance(data, list):
+        _error(errors, path, "must be an array")
+        return
+    if len(data) > 3:
+        _error(errors, path, "can contain at most 3 entries")
+    for _index_value, _item in enumerate(data):
+        _validate_5(_item, _index(path, _index_value), errors)
+
+
+def _validate_5(data, path, errors):
+    if not isinstance(data, dict):
+        _error(errors, path, "must be an object")
+        return
+
+
+def _validate_6(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_7(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+    if not data:
+        _error(errors, path, "must not be empty")
+
+
+def _validate_8(data, path, errors):
+    if not isinstance(data, dict):
+        _error(errors, path, "must be an object")
+        return
+    if "thumb" not in data:
+        _error(errors, _join(path, "thumb"), "is required")
+    if "hero" in data:
+        _validate_9(data["hero"], _join(path, "hero"), errors)
+    if "thumb" in data:
+        _validate_10(data["thumb"], _join(path, "thumb"), errors)
+    for _key in data:
+        if _key not in _CONSTANT_0:
+            _error(errors, _join(path, _key), "is not a supported field")
+
+
+def _validate_9(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_10(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_11(data, path, errors):
+    if not isinstance(data, bool):
+        _error(errors, path, "must be a boolean")
+        return
+
+
+def _validate_12(data, path, errors):
+    _validate_13(data, path, errors)
+
+
+def _validate_13(data, path, errors):
+    if not isinstance(data, dict):
+        _error(errors, path, "must be an object")
+        return
+    if "tag" not in data:
+        _error(errors, _join(path, "tag"), "is required")
+    if "message" in data:
+        _validate_14(data["message"], _join(path, "message"), errors)
+    if "min_defold_version" in data:
+        _validate_15(
+            data["min_defold_version"], _join(path, "min_defold_version"), errors
+        )
+    if "published_at" in data:
+        _validate_16(data["published_at"], _join(path, "published_at"), errors)
+    if "tag" in data:
+        _validate_17(data["tag"], _join(path, "tag"), errors)
+    if "zip" in data:
+        _validate_18(data["zip"], _join(path, "zip"), errors)
+    for _key in data:
+        if _key not in _CONSTANT_1:
+            _error(errors, _join(path, _key), "is not a supported field")
+
+
+def _validate_14(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_15(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_16(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_17(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_18(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_19(data, path, errors):
+    if not isinstance(data, bool):
+        _error(errors, path, "must be a boolean")
+        return
+
+
+def _validate_20(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_21(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_22(data, path, errors):
+    if not isinstance(data, bool):
+        _error(errors, path, "must be a boolean")
+        return
+
+
+def _validate_23(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_24(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+    if not data:
+        _error(errors, path, "must not be empty")
+
+
+def _validate_25(data, path, errors):
+    _validate_26(data, path, errors)
+    if isinstance(data, list):
+        if not _unique(data):
+            _error(errors, path, "must not contain duplicate entries")
+
+
+def _validate_26(data, path, errors):
+    if not isinstance(data, list):
+        _error(errors, path, "must be an array")
+        return
+    for _index_value, _item in enumerate(data):
+        _validate_27(_item, _index(path, _index_value), errors)
+
+
+def _validate_27(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+    if not data:
+        _error(errors, path, "must not be empty")
+
+
+def _validate_28(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_29(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_30(data, path, errors):
+    if not isinstance(data, list):
+        _error(errors, path, "must be an array")
+        return
+    for _index_value, _item in enumerate(data):
+        _validate_31(_item, _index(path, _index_value), errors)
+
+
+def _validate_31(data, path, errors):
+    _validate_32(data, path, errors)
+
+
+def _validate_32(data, path, errors):
+    if not isinstance(data, dict):
+        _error(errors, path, "must be an object")
+        return
+    if "version" not in data:
+        _error(errors, _join(path, "version"), "is required")
+    if "published_at" in data:
+        _validate_33(data["published_at"], _join(path, "published_at"), errors)
+    if "version" in data:
+        _validate_34(data["version"], _join(path, "version"), errors)
+    if "zip" in data:
+        _validate_35(data["zip"], _join(path, "zip"), errors)
+    for _key in data:
+        if _key not in _CONSTANT_2:
+            _error(errors, _join(path, _key), "is not a supported field")
+
+
+def _validate_33(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_34(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_35(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def _validate_36(data, path, errors):
+    if not isinstance(data, list):
+        _error(errors, path, "must be an array")
+        return
+    for _index_value, _item in enumerate(data):
+        _validate_37(_item, _index(path, _index_value), errors)
+
+
+def _validate_37(data, path, errors):
+    _validate_13(data, path, errors)
+
+
+def _validate_38(data, path, errors):
+    if not (isinstance(data, int) and not isinstance(data, bool)):
+        _error(errors, path, "must be an integer")
+        return
+    if data < 0:
+        _error(errors, path, "must be at least 0")
+
+
+def _validate_39(data, path, errors):
+    _validate_26(data, path, errors)
+    if isinstance(data, list):
+        if not _unique(data):
+            _error(errors, path, "must not contain duplicate entries")
+
+
+def _validate_40(data, path, errors):
+    if not (isinstance(data, (int, float)) and not isinstance(data, bool)):
+        _error(errors, path, "must be a number")
+        return
+    if data < 0:
+        _error(errors, path, "must be at least 0")
+
+
+def _validate_41(data, path, errors):
+    if not isinstance(data, str):
+        _error(errors, path, "must be a string")
+        return
+
+
+def validate(data):
+    """Return a list of schema errors; an empty list means data is valid."""
+    errors = []
+    _validate_0(data, None, errors)
+    return errors
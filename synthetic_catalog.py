@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+# Generate a synthetic asset catalog for benchmarking update.py and img_format.py.
+#
+# python synthetic_catalog.py --count=3190 /tmp/catalog
+#
+# The output directory gets assets/*.json, assets/images/* and header.json laid
+# out like this repository. Output is deterministic for a given --seed.
+
+import json
+import os
+import random
+import struct
+import subprocess
+import time
+import zlib
+from argparse import ArgumentParser
+
+WORDS = (
+    "camera input gui tilemap shader particle physics sound music ads analytics "
+    "iap network steam crash firebase spine rive path grid hex light shadow "
+    "pixel retro noise random save load ui button scroll list popup tween "
+    "animation state machine ecs pool timer profiler debug console logger"
+).split()
+TAGS = [
+    "AI",
+    "Ads",
+    "Analytics",
+    "Audio",
+    "Camera",
+    "Debugging",
+    "Editor",
+    "Effects",
+    "GUI",
+    "Input",
+    "Monetization",
+    "Network",
+    "Physics",
+    "Rendering",
+    "Scripting",
+    "Templates",
+    "Tools",
+]
+PLATFORMS = ["iOS", "Android", "macOS", "Windows", "Linux", "HTML5", "Switch"]
+LICENSES = ["MIT License", "Apache 2.0", "CC0 1.0", "Zlib", "BSD 3-Clause"]
+EXTERNAL_ACTIONS = [
+    ("support", "Support on Ko-fi", "https://ko-fi.com/%s"),
+    ("donate", "Donate via PayPal", "https://paypal.me/%s"),
+    ("sponsor", "Sponsor on GitHub", "https://github.com/sponsors/%s"),
+    ("buy", "Buy on itch.io", "https://%s.itch.io/asset"),
+]
+
+
+def png_bytes(width, height, rng, alpha):
+    """Return a small noisy PNG so image tools have real pixels to decode."""
+    channels = 4 if alpha else 3
+    rows = []
+    base = [rng.randrange(256) for _ in range(channels)]
+    for _ in range(height):
+        row = bytearray([0])
+        for _ in range(width):
+            row.extend(
+                (value + rng.randrange(-16, 17)) % 256 for value in base[:channels]
+            )
+        rows.append(bytes(row))
+
+    def chunk(kind, data):
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6 if alpha else 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(b"".join(rows)))
+        + chunk(b"IEND", b"")
+    )
+
+
+def sentence(rng, low, high):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+    return " ".join(words).capitalize() + "."
+
+
+def release_history(rng, repo, count, prefix):
+    releases = []
+    release_tags = []
+    timestamp = 1735689600 - rng.randrange(0, 3 * 365) * 86400
+    for index in range(count, 0, -1):
+        version = "%s%d.%d.%d" % (prefix, index // 10, index % 10, rng.randrange(5))
+        published_at = "%04d-%02d-%02dT%02d:%02d:%02dZ" % (time.gmtime(timestamp)[:6])
+        zip_url = "https://github.com/%s/archive/refs/tags/%s.zip" % (repo, version)
+        release = {
+            "message": "\n".join(
+                "* " + sentence(rng, 4, 14) for _ in range(rng.randint(1, 12))
+            ),
+            "published_at": published_at,
+            "tag": version,
+            "zip": zip_url,
+        }
+        if rng.random() < 0.3:
+            release["min_defold_version"] = "1.%d.%d" % (rng.randint(2, 10), 0)
+        releases.append(release)
+        release_tags.append(
+            {"published_at": published_at, "version": version, "zip": zip_url}
+        )
+        timestamp -= rng.randrange(1, 120) * 86400
+    return releases, release_tags
+
+
+def generate_asset(rng, index, image_name):
+    asset_id = "synthetic-%s-%d" % (rng.choice(WORDS), index)
+    author_id = "author-%d" % rng.randrange(max(1, index // 3) + 1)
+    repo = "%s/%s" % (author_id, asset_id)
+    asset = {
+        "author_id": author_id,
+        "description": sentence(rng, 6, 30),
+        "id": asset_id,
+        "images": {"thumb": image_name},
+        "isDefoldLibrary": rng.random() < 0.7,
+        "license": rng.choice(LICENSES),
+        "name": " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))).title(),
+        "platforms": rng.sample(PLATFORMS, rng.randint(1, len(PLATFORMS))),
+        "project_url": "https://github.com/%s" % repo,
+        "stars": int(rng.paretovariate(1.2)) - 1,
+        "tags": rng.sample(TAGS, rng.randint(1, 3)),
+        "timestamp": float(1567163518 + index * 3600),
+    }
+    if rng.random() < 0.75:
+        prefix = "v" if rng.random() < 0.5 else ""
+        if rng.random() < 0.05:
+            prefix = "runtime."
+            asset["library_release_tag_prefix"] = prefix
+        count = min(50, int(rng.paretovariate(0.8)))
+        releases, release_tags = release_history(rng, repo, count, prefix)
+        asset["releases"] = releases
+        asset["release_tags"] = release_tags
+        asset["library_url"] = releases[-1]["zip"]
+    else:
+        asset["library_url"] = "https://github.com/%s/archive/master.zip" % repo
+
+    if rng.random() < 0.15:
+        asset["external_actions"] = [
+            {"type": kind, "label": label, "url": url % author_id}
+            for kind, label, url in rng.sample(EXTERNAL_ACTIONS, rng.randint(1, 3))
+        ]
+    return asset
+
+
+def generate_catalog(directory, count, seed=0, image_size=(90, 60), git=False):
+    """Write count synthetic assets, their thumbnails and header.json."""
+    rng = random.Random(seed)
+    images_directory = os.path.join(directory, "assets", "images")
+    os.makedirs(images_directory, exist_ok=True)
+
+    header = {}
+    for index in range(count):
+        extension = rng.choice([".png", ".png", ".jpg", ".webp"])
+        image_name = "synthetic-%d-thumb%s" % (index, extension)
+        asset = generate_asset(rng, index, image_name)
+        filename = asset["id"] + ".json"
+        with open(
+            os.path.join(directory, "assets", filename), "w", encoding="utf-8"
+        ) as f:
+            json.dump(asset, f, indent=2, sort_keys=True, ensure_ascii=False)
+        # Extensions other than PNG still hold PNG data; only img_format.py
+        # decodes the pixels and it only looks at .png files.
+        with open(os.path.join(images_directory, image_name), "wb") as f:
+            f.write(png_bytes(image_size[0], image_size[1], rng, rng.random() < 0.4))
+        header[filename] = int(asset["timestamp"])
+
+    with open(os.path.join(directory, "header.json"), "w", encoding="utf-8") as f:
+        json.dump(header, f, indent=2, sort_keys=True)
+
+    if git:
+        for command in (
+            ["git", "init", "-q"],
+            ["git", "add", "-A"],
+            [
+                "git",
+                "-c",
+                "user.name=benchmark",
+                "-c",
+                "user.email=benchmark@example.com",
+                "commit",
+                "-q",
+                "-m",
+                "Synthetic catalog",
+            ],
+        ):
+            subprocess.run(command, cwd=directory, check=True)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("directory", help="Output directory")
+    parser.add_argument("--count", type=int, default=319, help="Number of assets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--imagesize", default="90x60", help="Thumbnail size as WIDTHxHEIGHT"
+    )
+    parser.add_argument(
+        "--git", action="store_true", help="Commit the catalog to a new git repository"
+    )
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.imagesize.split("x"))
+    generate_catalog(args.directory, args.count, args.seed, (width, height), args.git)
+    print("Generated %d assets in %s" % (args.count, args.directory))
+
+
+if __name__ == "__main__":
+    main()
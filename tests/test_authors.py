@@ -1,13 +1,9 @@
 import json
 import os
-import subprocess
-import sys
 import tempfile
 import unittest
 
-
-REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-UPDATE_SCRIPT = os.path.join(REPOSITORY_ROOT, "update.py")
+from update_runner import run_update
 
 
 class AssetAuthorValidationTest(unittest.TestCase):
@@ -24,12 +20,7 @@ class AssetAuthorValidationTest(unittest.TestCase):
                 os.path.join(assets_directory, "test.json"), "w", encoding="utf-8"
             ) as asset_file:
                 json.dump(asset, asset_file)
-            return subprocess.run(
-                [sys.executable, UPDATE_SCRIPT, "validate"],
-                cwd=directory,
-                capture_output=True,
-                text=True,
-            )
+            return run_update(["validate"], directory)
 
     def test_accepts_stable_author_id(self):
         result = self.run_validator({"author_id": "defold-foundation"})
@@ -40,7 +31,9 @@ class AssetAuthorValidationTest(unittest.TestCase):
             with self.subTest(fields=fields):
                 result = self.run_validator(fields)
                 self.assertNotEqual(0, result.returncode)
-                self.assertIn("author_id must use lowercase ASCII kebab-case", result.stdout)
+                self.assertIn(
+                    "author_id must use lowercase ASCII kebab-case", result.stdout
+                )
 
     def test_rejects_legacy_author_field(self):
         result = self.run_validator(
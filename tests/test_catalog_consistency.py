@@ -0,0 +1,71 @@
+import os
+import unittest
+
+from update_runner import run_update, temporary_catalog, write_asset
+
+
+class CatalogConsistencyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self, os.path.join("assets", "images"))
+        for image in ("shared.png", "orphan.png", "two-thumb.png"):
+            open(os.path.join(self.directory, "assets", "images", image), "wb").close()
+
+    def write_asset(self, asset_id, **fields):
+        asset = {"author_id": "test-author", "images": {"thumb": "shared.png"}}
+        asset.update(fields)
+        write_asset(self.directory, asset_id, asset)
+
+    def test_reports_shared_and_orphaned_catalog_entries_as_warnings(self):
+        self.write_asset(
+            "one", id="first", project_url="https://github.com/example/Project"
+        )
+        self.write_asset(
+            "two",
+            images={"thumb": "two-thumb.png", "hero": "shared.png"},
+            project_url="https://github.com/example/project.git",
+        )
+
+        result = run_update(["validate"], self.directory)
+
+        self.assertEqual(0, result.returncode, result.stdout)
+        self.assertIn("one: id first does not match the filename", result.stdout)
+        self.assertIn(
+            "project_url github.com/example/project is shared by: one, two",
+            result.stdout,
+        )
+        self.assertIn(
+            "image shared.png is referenced by several assets: one, two",
+            result.stdout,
+        )
+        self.assertIn("image orphan.png is not referenced by any asset", result.stdout)
+        self.assertNotIn("image two-thumb.png", result.stdout)
+
+    def test_rejects_duplicate_ids(self):
+        self.write_asset("one")
+        self.write_asset("two", id="one")
+
+        result = run_update(["validate"], self.directory)
+
+        self.assertEqual(1, result.returncode)
+        self.assertIn("id one is used by several assets: one, two", result.stdout)
+
+    def test_rejects_filenames_that_differ_only_in_case(self):
+        self.write_asset("Asset")
+        self.write_asset("asset-copy")
+        os.rename(
+            os.path.join(self.directory, "assets", "asset-copy.json"),
+            os.path.join(self.directory, "assets", "ASSET.json"),
+        )
+        if len(os.listdir(os.path.join(self.directory, "assets"))) < 3:
+            self.skipTest("case-insensitive file system")
+
+        result = run_update(["validate"], self.directory)
+
+        self.assertEqual(1, result.returncode)
+        self.assertIn(
+            "asset filenames differ only in case: ASSET, Asset", result.stdout
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import gzip
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer
+from unittest import mock
+
+from update_runner import temporary_catalog, update, write_asset
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPDATE_SCRIPT = os.path.join(REPOSITORY_ROOT, "update.py")
+
+
+class CatalogServerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        write_asset(
+            self.directory,
+            "camera",
+            {
+                "id": "camera",
+                "name": "Orthographic Camera",
+                "description": "Camera with zoom, follow, shake and bounds. " * 20,
+                "tags": ["Camera"],
+                "platforms": ["HTML5"],
+                "stars": 10,
+            },
+        )
+        write_asset(
+            self.directory,
+            "druid",
+            {
+                "id": "druid",
+                "name": "Druid",
+                "description": "GUI components",
+                "tags": ["GUI"],
+                "platforms": ["HTML5", "iOS"],
+                "stars": 200,
+            },
+        )
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.server = subprocess.Popen(
+            [sys.executable, UPDATE_SCRIPT, "serve", "--port=%d" % self.port],
+            cwd=self.directory,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.addCleanup(self.server.wait)
+        self.addCleanup(self.server.terminate)
+        deadline = time.time() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), 0.1).close()
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def get(self, path, headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port)
+        self.addCleanup(connection.close)
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        body = response.read()
+        if response.getheader("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return response, json.loads(body) if body else None
+
+    def test_serves_single_asset_with_etag_revalidation(self):
+        response, asset = self.get("/assets/druid")
+        self.assertEqual(200, response.status)
+        self.assertEqual("Druid", asset["name"])
+
+        etag = response.getheader("ETag")
+        response, body = self.get("/assets/druid", {"If-None-Match": etag})
+        self.assertEqual(304, response.status)
+        self.assertIsNone(body)
+
+        response, _ = self.get("/assets/missing")
+        self.assertEqual(404, response.status)
+
+    def test_filters_sorts_paginates_and_compresses(self):
+        response, data = self.get(
+            "/assets?platform=html5&sort=stars&per_page=1&page=2",
+            {"Accept-Encoding": "gzip"},
+        )
+        self.assertEqual("gzip", response.getheader("Content-Encoding"))
+        self.assertEqual(2, data["total"])
+        self.assertEqual(2, data["pages"])
+        self.assertEqual(["camera"], [asset["id"] for asset in data["assets"]])
+
+        _, data = self.get("/assets?tag=gui")
+        self.assertEqual(["druid"], [asset["id"] for asset in data["assets"]])
+
+        _, data = self.get("/search?q=orthographic+cam")
+        self.assertEqual(["camera"], [asset["id"] for asset in data["assets"]])
+
+        response, _ = self.get("/assets?page=0")
+        self.assertEqual(400, response.status)
+
+    def test_reloads_changed_asset_files(self):
+        write_asset(self.directory, "druid", {"id": "druid", "name": "Druid 2"})
+
+        deadline = time.time() + 10
+        while self.get("/assets/druid")[1]["name"] != "Druid 2":
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.1)
+
+
+class CatalogResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = temporary_catalog(self)
+        for asset_id in ("camera", "druid"):
+            write_asset(directory, asset_id, {"id": asset_id, "tags": ["GUI"]})
+        previous_directory = os.getcwd()
+        os.chdir(directory)
+        try:
+            catalog = update.load_catalog()
+        finally:
+            os.chdir(previous_directory)
+        self.responses = catalog["responses"]
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), update.CatalogRequestHandler)
+        server.catalog = catalog
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.port = server.server_address[1]
+        patcher = mock.patch.object(update, "CATALOG_RESPONSE_CACHE_SIZE", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, path):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port)
+        self.addCleanup(connection.close)
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        self.assertEqual(200, response.status)
+
+    def test_keeps_most_recently_used_normalized_requests(self):
+        self.get("/assets?tag=gui&sort=stars")
+        self.get("/assets?sort=stars&tag=gui")
+        self.assertEqual(1, len(self.responses))
+
+        self.get("/assets/camera")
+        self.get("/assets?tag=gui&sort=stars")
+        self.get("/assets/druid")
+
+        self.assertEqual(
+            [
+                ("/assets", (("sort", ("stars",)), ("tag", ("gui",)))),
+                ("/assets/druid", ()),
+            ],
+            list(self.responses),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import os
+import unittest
+
+from update_runner import run_update, temporary_catalog, write_asset, write_json
+
+
+class ChangeFeedTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        self.header = {}
+
+    def write_asset(self, asset_id, asset, timestamp):
+        write_asset(self.directory, asset_id, asset)
+        self.header[asset_id + ".json"] = timestamp
+        write_json(os.path.join(self.directory, "header.json"), self.header)
+
+    def update_feed(self):
+        result = run_update(["changefeed"], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        feed_path = os.path.join(self.directory, "changefeed.jsonl")
+        if not os.path.exists(feed_path):
+            return []
+        with open(feed_path, "r", encoding="utf-8") as feed_file:
+            return [json.loads(line) for line in feed_file]
+
+    def test_reports_added_modified_and_removed_assets(self):
+        self.write_asset("one", {"name": "One", "stars": 1}, 1)
+        self.write_asset("two", {"name": "Two"}, 1)
+        feed = self.update_feed()
+        self.assertEqual(1, len(feed))
+        self.assertEqual(["one", "two"], feed[0]["added"])
+
+        self.write_asset("one", {"name": "One", "stars": 2, "license": "MIT"}, 2)
+        os.remove(os.path.join(self.directory, "assets", "two.json"))
+        self.write_asset("three", {"name": "Three"}, 2)
+        feed = self.update_feed()
+
+        self.assertEqual(2, len(feed))
+        self.assertEqual(2, feed[1]["sequence"])
+        self.assertEqual(["three"], feed[1]["added"])
+        self.assertEqual({"one": ["license", "stars"]}, feed[1]["modified"])
+        self.assertEqual(["two"], feed[1]["removed"])
+
+    def test_skips_timestamp_only_changes(self):
+        self.write_asset("one", {"name": "One"}, 1)
+        self.update_feed()
+
+        self.write_asset("one", {"name": "One"}, 2)
+        feed = self.update_feed()
+
+        self.assertEqual(1, len(feed))
+
+
+if __name__ == "__main__":
+    unittest.main()
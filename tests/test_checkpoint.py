@@ -0,0 +1,100 @@
+import os
+import unittest
+from unittest import mock
+
+from update_runner import read_json, run_update, temporary_catalog, update, write_asset
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        for asset_id in ("one", "two", "three"):
+            write_asset(
+                self.directory,
+                asset_id,
+                {"project_url": "https://github.com/example/%s" % asset_id},
+            )
+        self.requested = []
+
+    def star_count(self, url, token):
+        update.github_request_count += 1
+        self.requested.append(url.rsplit("/", 1)[1])
+        if len(self.requested) == self.cancel_after:
+            raise KeyboardInterrupt()
+        return {"stargazers_count": 7}
+
+    def run_starcount(self, *arguments, cancel_after=0):
+        self.requested = []
+        self.cancel_after = cancel_after
+        with mock.patch.object(update, "github_request", self.star_count):
+            return run_update(
+                ["--githubtoken=token", "starcount", *arguments], self.directory
+            )
+
+    def read_checkpoint(self):
+        return read_json(os.path.join(self.directory, "checkpoint.json"))["starcount"]
+
+    def test_resume_skips_assets_refreshed_before_interruption(self):
+        with self.assertRaises(KeyboardInterrupt):
+            self.run_starcount(cancel_after=2)
+        refreshed = self.requested[:1]
+        checkpoint = self.read_checkpoint()
+        self.assertFalse(checkpoint["finished"])
+        self.assertEqual(refreshed, checkpoint["completed"])
+
+        result = self.run_starcount("--resume")
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        self.assertEqual(2, len(self.requested))
+        self.assertNotIn(refreshed[0], self.requested)
+        checkpoint = self.read_checkpoint()
+        self.assertTrue(checkpoint["finished"])
+        self.assertEqual([], checkpoint["completed"])
+        self.assertEqual(["one", "three", "two"], sorted(checkpoint["fetched"]))
+
+    def test_refreshed_assets_are_saved_in_batches(self):
+        writes = []
+        write_checkpoint = update.write_checkpoint
+
+        def record_write(checkpoint):
+            writes.append(sorted(checkpoint["starcount"]["completed"]))
+            write_checkpoint(checkpoint)
+
+        with mock.patch.object(update, "CHECKPOINT_FLUSH_ASSETS", 2), mock.patch.object(
+            update, "CHECKPOINT_FLUSH_SECONDS", 3600
+        ), mock.patch.object(update, "write_checkpoint", record_write):
+            result = self.run_starcount()
+
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        # Start, after two of the three assets, and finish.
+        self.assertEqual([[], sorted(self.requested[:2]), []], writes)
+
+    def test_new_run_refreshes_least_recently_fetched_first(self):
+        with self.assertRaises(KeyboardInterrupt):
+            self.run_starcount(cancel_after=2)
+        refreshed = self.requested[0]
+
+        self.run_starcount()
+        self.assertEqual(3, len(self.requested))
+        self.assertEqual(refreshed, self.requested[-1])
+
+    def test_request_budget_refreshes_most_popular_assets_first(self):
+        for asset_id, stars in (("one", 0), ("two", 1000), ("three", 10)):
+            write_asset(
+                self.directory,
+                asset_id,
+                {
+                    "project_url": "https://github.com/example/%s" % asset_id,
+                    "stars": stars,
+                },
+            )
+
+        result = self.run_starcount("--request-budget=2")
+
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        self.assertEqual(["two", "three"], self.requested)
+        self.assertIn("1 left for the next run", result.stdout)
+        self.assertTrue(self.read_checkpoint()["finished"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import unittest
+
+from update_runner import read_json, run_update, temporary_catalog, update, write_asset
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class ClusterImageHashesTest(unittest.TestCase):
+    def test_joins_images_within_distance(self):
+        hashes = {
+            "a.png": 0b0000,
+            "b.jpg": 0b0001,
+            "c.webp": 0b0011,
+            "d.png": 0xFFFF << 48,
+            "e.png": 0xFFFF << 48,
+            "f.png": 0xF0F0,
+        }
+
+        self.assertEqual(
+            [["a.png", "b.jpg", "c.webp"], ["d.png", "e.png"]],
+            update.cluster_image_hashes(hashes, 1),
+        )
+        self.assertEqual([["d.png", "e.png"]], update.cluster_image_hashes(hashes, 0))
+
+
+@unittest.skipUnless(Image, "Pillow is not installed")
+class DuplicateImagesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self, os.path.join("assets", "images"))
+        self.images = os.path.join(self.directory, "assets", "images")
+
+        fractal = Image.effect_mandelbrot((90, 60), (-2, -1, 1, 1), 64).convert("RGB")
+        fractal.save(os.path.join(self.images, "one-thumb.png"))
+        fractal.save(os.path.join(self.images, "two-thumb.jpg"), quality=90)
+        fractal.transpose(Image.FLIP_LEFT_RIGHT).save(
+            os.path.join(self.images, "three-thumb.png")
+        )
+        for asset_id, thumb in (
+            ("one", "one-thumb.png"),
+            ("two", "two-thumb.jpg"),
+            ("three", "three-thumb.png"),
+        ):
+            write_asset(self.directory, asset_id, {"images": {"thumb": thumb}})
+
+    def run_update(self, *arguments):
+        result = run_update([*arguments], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return result.stdout
+
+    def test_reports_re_encoded_images_and_reuses_cached_hashes(self):
+        output = self.run_update("duplicateimages")
+
+        self.assertIn("Hashing 3 of 3 image(s)", output)
+        self.assertIn(
+            "Cluster 1:\n - one-thumb.png (used by one)\n"
+            " - two-thumb.jpg (used by two)\n1 cluster(s)",
+            output,
+        )
+        self.assertIn("Hashing 0 of 3 image(s)", self.run_update("duplicateimages"))
+
+    def test_dedupe_points_references_at_one_file(self):
+        self.run_update("--dedupe", "duplicateimages")
+
+        asset = read_json(os.path.join(self.directory, "assets", "two.json"))
+        self.assertEqual("one-thumb.png", asset["images"]["thumb"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import unittest
+from unittest import mock
+
+from update_runner import read_json, run_update, temporary_catalog, update, write_asset
+
+EVENTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "events")
+
+
+class EventRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        for asset_id, repo in (
+            ("library", "example/library"),
+            ("other", "example/other"),
+        ):
+            write_asset(
+                self.directory,
+                asset_id,
+                {
+                    "isDefoldLibrary": True,
+                    "project_url": "https://github.com/%s" % repo,
+                    "library_url": "https://github.com/%s/archive/refs/tags/1.0.0.zip"
+                    % repo,
+                },
+            )
+        self.requested = []
+
+    def read_asset(self, asset_id):
+        return read_json(os.path.join(self.directory, "assets", asset_id + ".json"))
+
+    def github(self, url, token):
+        self.requested.append(url)
+        if "/releases" in url:
+            return [
+                {
+                    "tag_name": "2.0.0",
+                    "body": "Second release",
+                    "published_at": "2025-01-01T00:00:00Z",
+                }
+            ]
+        if "/tags" in url:
+            return [{"name": "2.0.0", "commit": {"url": ""}}]
+        return None
+
+    def stream(self, url, token, follow_pages=True):
+        yield from self.github(url, token) or []
+
+    def run_event(self, name):
+        with mock.patch.object(
+            update, "github_request", self.github
+        ), mock.patch.object(update, "github_stream_list", self.stream):
+            result = run_update(
+                [
+                    "--githubtoken=token",
+                    "--event=" + os.path.join(EVENTS_DIRECTORY, name),
+                    "event",
+                ],
+                self.directory,
+            )
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return result
+
+    def test_refreshes_only_assets_of_event_repository(self):
+        for name in ("release.json", "push-tag.json", "create-tag.json"):
+            with self.subTest(event=name):
+                self.requested = []
+                self.run_event(name)
+
+                self.assertTrue(self.requested)
+                for url in self.requested:
+                    self.assertIn("/repos/example/library/", url)
+                self.assertEqual(
+                    "https://github.com/example/library/archive/refs/tags/2.0.0.zip",
+                    self.read_asset("library")["library_url"],
+                )
+                self.assertEqual(
+                    "https://github.com/example/other/archive/refs/tags/1.0.0.zip",
+                    self.read_asset("other")["library_url"],
+                )
+
+    def test_ignores_branch_push(self):
+        result = self.run_event("push-branch.json")
+
+        self.assertEqual([], self.requested)
+        self.assertIn("Ignoring event", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
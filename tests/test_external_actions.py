@@ -1,12 +1,9 @@
 import json
 import os
-import subprocess
-import sys
 import tempfile
 import unittest
 
-REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-UPDATE_SCRIPT = os.path.join(REPOSITORY_ROOT, "update.py")
+from update_runner import run_update
 
 
 class ExternalActionsValidationTest(unittest.TestCase):
@@ -24,12 +21,7 @@ class ExternalActionsValidationTest(unittest.TestCase):
                 os.path.join(assets_directory, "test.json"), "w", encoding="utf-8"
             ) as asset_file:
                 json.dump(asset, asset_file)
-            return subprocess.run(
-                [sys.executable, UPDATE_SCRIPT, "validate"],
-                cwd=directory,
-                capture_output=True,
-                text=True,
-            )
+            return run_update(["validate"], directory)
 
     def test_accepts_buy_through_github_sponsors(self):
         result = self.run_validator(
@@ -0,0 +1,64 @@
+import os
+import unittest
+
+from update_runner import read_json, run_update, temporary_catalog, write_asset
+
+
+class GarbageImageTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self, os.path.join("assets", "images"))
+        self.images = os.path.join(self.directory, "assets", "images")
+        for image in (
+            "one-thumb.webp",
+            "one-hero.jpg",
+            "two-thumb.png",
+            "two-thumb.jpg",
+        ):
+            with open(os.path.join(self.images, image), "wb") as image_file:
+                image_file.write(b"image")
+        self.write_asset("one", {"thumb": "one-thumb.webp", "hero": "one-hero.jpg"})
+        self.write_asset("two", {"thumb": "two-thumb.png", "hero": "one-thumb.webp"})
+
+    def write_asset(self, asset_id, images):
+        write_asset(
+            self.directory, asset_id, {"author_id": "test-author", "images": images}
+        )
+
+    def read_asset(self, asset_id):
+        return read_json(os.path.join(self.directory, "assets", asset_id + ".json"))
+
+    def run_update(self, *arguments):
+        result = run_update([*arguments], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return result
+
+    def test_dry_run_lists_garbage_without_deleting(self):
+        result = self.run_update("--dryrun", "gc-images")
+
+        self.assertIn("two-thumb.jpg (unreferenced", result.stdout)
+        self.assertIn("one-hero.jpg (legacy hero", result.stdout)
+        self.assertIn("Would remove 2 image(s)", result.stdout)
+        self.assertEqual(4, len(os.listdir(self.images)))
+        self.assertIn("hero", self.read_asset("one")["images"])
+
+    def test_deletes_unreferenced_files_and_legacy_heroes(self):
+        self.run_update("gc-images")
+
+        self.assertEqual(
+            ["one-thumb.webp", "two-thumb.png"], sorted(os.listdir(self.images))
+        )
+        self.assertEqual({"thumb": "one-thumb.webp"}, self.read_asset("one")["images"])
+        self.assertEqual({"thumb": "two-thumb.png"}, self.read_asset("two")["images"])
+
+    def test_keep_heroes_only_deletes_unreferenced_files(self):
+        self.run_update("--keepheroes", "gc-images")
+
+        self.assertEqual(
+            ["one-hero.jpg", "one-thumb.webp", "two-thumb.png"],
+            sorted(os.listdir(self.images)),
+        )
+        self.assertEqual("one-hero.jpg", self.read_asset("one")["images"]["hero"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import unittest
+from unittest import mock
+
+from update_runner import read_json, run_update, temporary_catalog, update, write_asset
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+@unittest.skipUnless(Image, "Pillow is not installed")
+class ImageDerivativesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self, os.path.join("assets", "images"))
+        self.images = os.path.join(self.directory, "assets", "images")
+        self.save_image("wide-thumb.png", (1000, 500), "red")
+        self.save_image("narrow-thumb.jpg", (200, 100), "blue")
+        for asset_id, thumb in (
+            ("wide", "wide-thumb.png"),
+            ("narrow", "narrow-thumb.jpg"),
+            ("remote", "https://example.com/remote-thumb.webp"),
+        ):
+            write_asset(self.directory, asset_id, {"images": {"thumb": thumb}})
+
+    def save_image(self, name, size, color):
+        Image.new("RGB", size, color).save(os.path.join(self.images, name))
+
+    def build(self):
+        result = run_update(["derivatives"], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return result.stdout, read_json(
+            os.path.join(self.directory, "derivatives", "manifest.json")
+        )
+
+    def test_writes_hashed_variants_and_srcset_manifest(self):
+        output, manifest = self.build()
+
+        self.assertIn("Processing 2 of 2 thumbnail(s)", output)
+        self.assertEqual(["narrow", "wide"], sorted(manifest["assets"]))
+        wide = manifest["assets"]["wide"]
+        self.assertEqual((1000, 500), (wide["width"], wide["height"]))
+        srcset = [entry.split() for entry in wide["srcset"]["webp"].split(", ")]
+        self.assertEqual(["300w", "600w", "900w"], [width for _, width in srcset])
+        for filename, width in srcset:
+            self.assertRegex(filename, r"^wide-thumb-\d+w\.[0-9a-f]{12}\.webp$")
+            with Image.open(
+                os.path.join(self.directory, "derivatives", filename)
+            ) as image:
+                self.assertEqual(int(width[:-1]), image.width)
+        self.assertRegex(
+            manifest["assets"]["narrow"]["srcset"]["webp"],
+            r"^narrow-thumb-200w\.[0-9a-f]{12}\.webp 200w$",
+        )
+
+    def test_only_reprocesses_changed_sources(self):
+        _, first = self.build()
+        output, second = self.build()
+        self.assertIn("Processing 0 of 2 thumbnail(s)", output)
+        self.assertEqual(first, second)
+
+        self.save_image("wide-thumb.png", (1000, 500), "green")
+        with mock.patch.object(update, "DERIVATIVE_PARALLEL_THRESHOLD", 1):
+            output, third = self.build()
+
+        self.assertIn("Processing 1 of 2 thumbnail(s)", output)
+        self.assertEqual(
+            first["images"]["narrow-thumb.jpg"], third["images"]["narrow-thumb.jpg"]
+        )
+        self.assertNotEqual(first["assets"]["wide"], third["assets"]["wide"])
+        names = set(os.listdir(os.path.join(self.directory, "derivatives")))
+        for entry in first["assets"]["wide"]["srcset"]["webp"].split(", "):
+            self.assertNotIn(entry.split()[0], names)
+
+
+if __name__ == "__main__":
+    unittest.main()
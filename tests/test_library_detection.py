@@ -0,0 +1,126 @@
+import base64
+import os
+import unittest
+from unittest import mock
+
+import requests
+
+from update_runner import (
+    Response,
+    read_json,
+    run_update,
+    temporary_catalog,
+    write_asset,
+)
+
+LIBRARY_GAME_PROJECT = "[project]\ntitle = Test\n\n[library]\ninclude_dirs = test\n"
+
+
+class LibraryDetectionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        self.asset_path = write_asset(
+            self.directory,
+            "test",
+            {
+                "project_url": "https://github.com/example/library",
+                "isDefoldLibrary": False,
+            },
+        )
+        self.head = "a" * 40
+        self.game_project = "[project]\ntitle = Test\n"
+        self.requested = []
+        self.status_code = 200
+
+    def get(self, url, headers, stream=False):
+        self.requested.append(url.split("/example/library/", 1)[1])
+        if url.endswith("/commits/HEAD"):
+            self.assertEqual("application/vnd.github.sha", headers["Accept"])
+            return Response(200, text=self.head)
+        if self.status_code != 200:
+            return Response(self.status_code)
+        content = base64.b64encode(self.game_project.encode("utf-8")).decode("ascii")
+        return Response(200, {"content": content, "encoding": "base64"})
+
+    def detect(self):
+        self.requested = []
+        with mock.patch.object(requests, "get", self.get):
+            result = run_update(["--githubtoken=token", "library"], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return read_json(self.asset_path)
+
+    def recorded_heads(self):
+        checkpoint_path = os.path.join(self.directory, "checkpoint.json")
+        if not os.path.exists(checkpoint_path):
+            return {}
+        return read_json(checkpoint_path)["library"]["heads"]
+
+    def test_rechecks_game_project_only_when_head_moves(self):
+        asset = self.detect()
+        self.assertFalse(asset["isDefoldLibrary"])
+        self.assertNotIn("library_detection_sha", asset)
+        self.assertEqual({"example/library": self.head}, self.recorded_heads())
+        self.assertEqual(
+            ["commits/HEAD", "contents/game.project?ref=" + self.head], self.requested
+        )
+
+        self.game_project = LIBRARY_GAME_PROJECT
+        asset = self.detect()
+        self.assertFalse(asset["isDefoldLibrary"])
+        self.assertEqual(["commits/HEAD"], self.requested)
+
+        self.head = "b" * 40
+        asset = self.detect()
+        self.assertTrue(asset["isDefoldLibrary"])
+        self.assertEqual({"example/library": self.head}, self.recorded_heads())
+
+    def test_moved_head_alone_does_not_rewrite_the_asset(self):
+        self.detect()
+        before = os.stat(self.asset_path).st_mtime_ns
+        with open(self.asset_path, "rb") as asset_file:
+            content = asset_file.read()
+
+        self.head = "b" * 40
+        self.detect()
+
+        with open(self.asset_path, "rb") as asset_file:
+            self.assertEqual(content, asset_file.read())
+        self.assertEqual(before, os.stat(self.asset_path).st_mtime_ns)
+        self.assertEqual({"example/library": self.head}, self.recorded_heads())
+
+    def test_keeps_manual_is_defold_library(self):
+        write_asset(
+            self.directory,
+            "test",
+            {
+                "project_url": "https://github.com/example/library",
+                "isDefoldLibrary": True,
+                "library_detection_auto_update": False,
+            },
+        )
+
+        asset = self.detect()
+
+        self.assertTrue(asset["isDefoldLibrary"])
+        self.assertEqual({}, self.recorded_heads())
+        self.assertEqual([], self.requested)
+
+    def test_tombstones_only_definitive_failures(self):
+        tombstones_path = os.path.join(self.directory, "tombstones.json")
+        for status_code in (403, 500, 502):
+            self.status_code = status_code
+            self.detect()
+            self.assertEqual({}, self.recorded_heads())
+            self.assertFalse(os.path.exists(tombstones_path))
+
+        with mock.patch.object(
+            requests, "get", lambda url, headers, stream=False: Response(404)
+        ):
+            result = run_update(["--githubtoken=token", "library"], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        tombstones = read_json(tombstones_path)
+        self.assertEqual("not_found", tombstones["example/library"]["failure"])
+
+
+if __name__ == "__main__":
+    unittest.main()
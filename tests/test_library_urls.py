@@ -1,12 +1,9 @@
 import json
 import os
-import subprocess
-import sys
 import tempfile
 import unittest
 
-REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-UPDATE_SCRIPT = os.path.join(REPOSITORY_ROOT, "update.py")
+from update_runner import run_update
 
 
 class LibraryUrlUpdateTest(unittest.TestCase):
@@ -18,12 +15,7 @@ class LibraryUrlUpdateTest(unittest.TestCase):
             with open(asset_path, "w", encoding="utf-8") as asset_file:
                 json.dump(asset, asset_file)
 
-            result = subprocess.run(
-                [sys.executable, UPDATE_SCRIPT, "libraryurls", "--asset=test"],
-                cwd=directory,
-                capture_output=True,
-                text=True,
-            )
+            result = run_update(["libraryurls", "--asset=test"], directory)
             self.assertEqual(0, result.returncode, result.stdout + result.stderr)
             with open(asset_path, "r", encoding="utf-8") as asset_file:
                 return json.load(asset_file)
@@ -126,6 +118,35 @@ class LibraryUrlUpdateTest(unittest.TestCase):
             [entry["version"] for entry in asset["release_tags"]],
         )
 
+    def test_derives_latest_release_fields(self):
+        asset = self.update_asset(
+            self.base_asset(
+                releases=[
+                    {
+                        "tag": "2.0.0",
+                        "zip": "https://github.com/example/library/releases/download/2.0.0/library.zip",
+                        "min_defold_version": "1.9.0",
+                        "published_at": "2025-01-01T00:00:00Z",
+                    }
+                ],
+                release_tags=[
+                    {"version": "1.0.0", "published_at": "2024-01-01T00:00:00Z"},
+                    {"version": "2.0.0", "published_at": "2025-01-01T00:00:00Z"},
+                ],
+            )
+        )
+
+        self.assertEqual(
+            {
+                "tag": "2.0.0",
+                "zip": "https://github.com/example/library/releases/download/2.0.0/library.zip",
+                "message": "",
+                "min_defold_version": "1.9.0",
+                "published_at": "2025-01-01T00:00:00Z",
+            },
+            asset["latest_release"],
+        )
+
     def test_leaves_branch_and_custom_urls_unchanged(self):
         for library_url in (
             "https://github.com/example/library/archive/refs/heads/main.zip",
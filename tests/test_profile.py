@@ -0,0 +1,34 @@
+import os
+import unittest
+
+from update_runner import run_update, temporary_catalog, write_asset
+
+
+class ProfileTest(unittest.TestCase):
+    def test_writes_phase_report_profile_and_stacks(self):
+        directory = temporary_catalog(self)
+        write_asset(directory, "test", {"author_id": "Not Valid"})
+
+        result = run_update(
+            ["--profile", "validate", "--profiledir=reports"], directory
+        )
+
+        # The command's own exit status is preserved.
+        self.assertNotEqual(0, result.returncode)
+        self.assertIn("Profile for validate", result.stdout)
+        reports = os.path.join(directory, "reports")
+        self.assertEqual(
+            ["validate.folded", "validate.prof", "validate.txt"],
+            sorted(os.listdir(reports)),
+        )
+        with open(
+            os.path.join(reports, "validate.txt"), "r", encoding="utf-8"
+        ) as report_file:
+            report = report_file.read()
+        for phase in ("load", "fetch", "transform", "serialize", "write", "git"):
+            self.assertRegex(report, r"\n%s +\d+\.\d{3} " % phase)
+        self.assertIn("validate_asset_authors", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import unittest
+from unittest import mock
+
+import requests
+
+from update_runner import (
+    Response,
+    read_json,
+    run_update,
+    temporary_catalog,
+    write_asset,
+)
+
+
+class RepositoryRedirectTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        write_asset(
+            self.directory,
+            "moved",
+            {
+                "project_url": "https://github.com/old-owner/library",
+                "library_url": "https://github.com/old-owner/library/archive/refs/tags/1.0.0.zip",
+            },
+        )
+        write_asset(
+            self.directory,
+            "custom",
+            {
+                "project_url": "https://github.com/old-owner/library/tree/main/extension",
+                "library_url": "https://example.com/library.zip",
+            },
+        )
+        self.requested = []
+
+    def read_json(self, path):
+        return read_json(os.path.join(self.directory, path))
+
+    def get(self, url, headers, stream=False):
+        self.requested.append(url)
+        return Response(
+            data={"full_name": "New-Owner/library", "stargazers_count": 3},
+            history=["301"] if "old-owner" in url else [],
+        )
+
+    def run_update(self, *arguments):
+        with mock.patch.object(requests, "get", self.get):
+            result = run_update(list(arguments), self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return result
+
+    def test_records_canonical_repository_and_uses_it(self):
+        result = self.run_update("--githubtoken=token", "starcount")
+
+        self.assertEqual(
+            {"old-owner/library": "New-Owner/library"}, self.read_json("redirects.json")
+        )
+        self.assertIn("GitHub request(s) followed a redirect", result.stdout)
+
+        self.requested = []
+        result = self.run_update("--githubtoken=token", "starcount")
+
+        self.assertEqual(
+            ["https://api.github.com/repos/New-Owner/library"] * 2, self.requested
+        )
+        self.assertNotIn("followed a redirect", result.stdout)
+
+    def test_canonicalize_rewrites_recognized_urls(self):
+        self.run_update("--githubtoken=token", "starcount")
+        self.run_update("canonicalize")
+
+        moved = self.read_json("assets/moved.json")
+        custom = self.read_json("assets/custom.json")
+        self.assertEqual("https://github.com/New-Owner/library", moved["project_url"])
+        self.assertEqual(
+            "https://github.com/New-Owner/library/archive/refs/tags/1.0.0.zip",
+            moved["library_url"],
+        )
+        self.assertEqual(
+            "https://github.com/New-Owner/library/tree/main/extension",
+            custom["project_url"],
+        )
+        self.assertEqual("https://example.com/library.zip", custom["library_url"])
+        self.assertEqual({}, self.read_json("redirects.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
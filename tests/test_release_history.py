@@ -0,0 +1,88 @@
+import os
+import unittest
+
+from update_runner import read_json, run_update, temporary_catalog, write_json
+
+
+class ReleaseHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        self.write_json(
+            "assets/test.json",
+            {
+                "isDefoldLibrary": True,
+                "project_url": "https://github.com/example/library",
+                "library_url": "https://github.com/example/library/archive/refs/tags/1.0.0.zip",
+                "releases": [
+                    {
+                        "tag": "1.0.0",
+                        "zip": "https://github.com/example/library/archive/refs/tags/1.0.0.zip",
+                        "message": "First release",
+                        "published_at": "2024-01-01T00:00:00Z",
+                    },
+                    {
+                        "tag": "2.0.0",
+                        "zip": "https://github.com/example/library/archive/refs/tags/2.0.0.zip",
+                        "message": "A long list of release notes",
+                        "min_defold_version": "1.9.0",
+                        "published_at": "2025-01-01T00:00:00Z",
+                    },
+                ],
+                "release_tags": [
+                    {"version": "2.0.0", "published_at": "2025-01-01T00:00:00Z"},
+                    {"version": "1.0.0", "published_at": "2024-01-01T00:00:00Z"},
+                ],
+            },
+        )
+
+    def write_json(self, path, data):
+        write_json(os.path.join(self.directory, path), data)
+
+    def read_json(self, path):
+        return read_json(os.path.join(self.directory, path))
+
+    def run_update(self, *arguments):
+        result = run_update([*arguments], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+
+    def test_moves_history_out_of_asset_with_truncated_summary(self):
+        self.run_update("splitreleases", "--messagelength=6")
+
+        asset = self.read_json("assets/test.json")
+        history = self.read_json("releases/test.json")
+        self.assertNotIn("releases", asset)
+        self.assertNotIn("release_tags", asset)
+        self.assertEqual("releases/test.json", asset["release_history"])
+        self.assertEqual(
+            {
+                "tag": "2.0.0",
+                "zip": "https://github.com/example/library/archive/refs/tags/2.0.0.zip",
+                "message": "A long...",
+                "min_defold_version": "1.9.0",
+                "published_at": "2025-01-01T00:00:00Z",
+            },
+            asset["latest_release"],
+        )
+        self.assertEqual(
+            ["2.0.0", "1.0.0"], [release["tag"] for release in history["releases"]]
+        )
+        self.assertEqual(
+            "A long list of release notes", history["releases"][0]["message"]
+        )
+        self.assertEqual(2, len(history["release_tags"]))
+
+    def test_library_urls_read_and_keep_split_history(self):
+        self.run_update("splitreleases")
+        self.run_update("libraryurls", "--asset=test")
+
+        asset = self.read_json("assets/test.json")
+        self.assertEqual(
+            "https://github.com/example/library/archive/refs/tags/2.0.0.zip",
+            asset["library_url"],
+        )
+        self.assertNotIn("releases", asset)
+        self.assertEqual(2, len(self.read_json("releases/test.json")["releases"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+from update_runner import read_json, run_update, temporary_catalog, update, write_asset
+
+
+class StreamingResponse:
+    def __init__(self, items, next_url=None, chunk_size=64, raw=False):
+        body = json.dumps(items, ensure_ascii=False)
+        if raw:
+            body = body.encode("utf-8")
+        self.chunks = [
+            body[start : start + chunk_size]
+            for start in range(0, len(body), chunk_size)
+        ]
+        self.read = 0
+        self.closed = False
+        self.status_code = 200
+        self.history = []
+        self.headers = {}
+        if next_url:
+            self.headers["Link"] = '<%s>; rel="next", <%s>; rel="last"' % (
+                next_url,
+                next_url,
+            )
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size, decode_unicode):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def releases(*tags):
+    return [
+        {
+            "tag_name": tag,
+            "body": "Release notes for %s\n" % tag * 20,
+            "published_at": "2025-01-%02dT00:00:00Z" % (len(tags) - index),
+        }
+        for index, tag in enumerate(tags)
+    ]
+
+
+class ReleaseStreamingTest(unittest.TestCase):
+    def setUp(self):
+        self.responses = {}
+        self.requested = []
+
+    def get(self, url, headers, stream=False):
+        self.requested.append(url)
+        return self.responses[url]
+
+    def stream(self, url, limit=None):
+        items = []
+        with mock.patch.object(requests, "get", self.get):
+            for item in update.github_stream_list(url, "token"):
+                items.append(item)
+                if limit and len(items) == limit:
+                    break
+        return items
+
+    def test_stops_reading_when_caller_stops(self):
+        response = StreamingResponse(
+            releases(*["%d.0.0" % n for n in range(50, 0, -1)])
+        )
+        self.responses["https://example.com/page1"] = response
+
+        items = self.stream("https://example.com/page1", limit=2)
+
+        self.assertEqual(["50.0.0", "49.0.0"], [item["tag_name"] for item in items])
+        self.assertLess(response.read, len(response.chunks) // 10)
+        self.assertTrue(response.closed)
+
+    def test_follows_next_page_only_when_needed(self):
+        self.responses["https://example.com/page1"] = StreamingResponse(
+            releases("3.0.0", "2.0.0"), next_url="https://example.com/page2"
+        )
+        self.responses["https://example.com/page2"] = StreamingResponse(
+            releases("1.0.0")
+        )
+
+        self.assertEqual(2, len(self.stream("https://example.com/page1", limit=2)))
+        self.assertEqual(["https://example.com/page1"], self.requested)
+
+        self.requested = []
+        items = self.stream("https://example.com/page1")
+        self.assertEqual(
+            ["3.0.0", "2.0.0", "1.0.0"], [item["tag_name"] for item in items]
+        )
+        self.assertEqual(2, len(self.requested))
+
+    def test_stops_following_pages_at_the_page_limit(self):
+        for page in range(1, 30):
+            self.responses["https://example.com/page%d" % page] = StreamingResponse(
+                releases("%d.0.0" % page),
+                next_url="https://example.com/page%d" % (page + 1),
+            )
+
+        items = self.stream("https://example.com/page1")
+
+        self.assertEqual(update.GITHUB_STREAM_MAX_PAGES, len(items))
+        self.assertEqual(update.GITHUB_STREAM_MAX_PAGES, len(self.requested))
+
+    def test_decodes_characters_split_across_byte_chunks(self):
+        response = StreamingResponse(
+            [{"tag_name": "1.0.0", "body": "Ünïcödé ✓ 🎮" * 10}], chunk_size=7, raw=True
+        )
+        self.responses["https://example.com/page1"] = response
+
+        items = self.stream("https://example.com/page1")
+
+        self.assertEqual("Ünïcödé ✓ 🎮" * 10, items[0]["body"])
+
+    def test_incremental_release_update_reads_small_first_page(self):
+        directory = temporary_catalog(self)
+        asset_path = write_asset(
+            directory,
+            "test",
+            {
+                "project_url": "https://github.com/example/library",
+                "releases": [
+                    {
+                        "tag": "1.0.0",
+                        "zip": "https://github.com/example/library/archive/refs/tags/1.0.0.zip",
+                        "message": "",
+                        "published_at": "2024-01-01T00:00:00Z",
+                    }
+                ],
+            },
+        )
+        releases_url = (
+            "https://api.github.com/repos/example/library/releases?per_page=10"
+        )
+        self.responses[releases_url] = StreamingResponse(
+            releases("3.0.0", "2.0.0", "1.0.0", "0.9.0", "0.8.0")
+        )
+        self.responses[
+            "https://api.github.com/repos/example/library/tags?per_page=100"
+        ] = StreamingResponse([])
+
+        with mock.patch.object(requests, "get", self.get):
+            result = run_update(
+                ["--githubtoken=token", "releases", "--asset=test"], directory
+            )
+
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        self.assertEqual(
+            ["3.0.0", "2.0.0", "1.0.0"],
+            [release["tag"] for release in read_json(asset_path)["releases"]],
+        )
+        self.assertTrue(self.responses[releases_url].closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import os
+import unittest
+
+from update_runner import run_update, temporary_catalog
+
+
+class SanitizeTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, "assets", name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def read(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_check_lists_and_sanitize_rewrites_only_non_canonical_files(self):
+        canonical = self.write(
+            "canonical.json",
+            json.dumps({"a": 1, "b": "é"}, indent=2, ensure_ascii=False),
+        )
+        messy = self.write("messy.json", '{"b": "\\u00e9", "a": 1}\n')
+        os.utime(canonical, (1, 1))
+
+        result = run_update(["--check", "sanitize"], self.directory)
+        self.assertEqual(1, result.returncode)
+        self.assertIn("not canonical: assets/messy.json", result.stdout)
+        self.assertNotIn("canonical.json", result.stdout)
+        self.assertEqual('{"b": "\\u00e9", "a": 1}\n', self.read(messy))
+
+        result = run_update(["sanitize"], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        self.assertEqual('{\n  "a": 1,\n  "b": "é"\n}', self.read(messy))
+        self.assertEqual(1, os.stat(canonical).st_mtime)
+
+        result = run_update(["--check", "sanitize"], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+
+    def test_accepts_a_single_trailing_newline(self):
+        text = json.dumps({"a": 1}, indent=2) + "\n"
+        path = self.write("edited.json", text)
+        self.write("blank-lines.json", text + "\n")
+
+        result = run_update(["--check", "sanitize"], self.directory)
+
+        self.assertEqual(1, result.returncode)
+        self.assertIn("not canonical: assets/blank-lines.json", result.stdout)
+        self.assertNotIn("edited.json", result.stdout)
+        run_update(["sanitize"], self.directory)
+        self.assertEqual(text, self.read(path))
+
+    def test_sanitizes_large_catalogs_in_parallel(self):
+        for index in range(300):
+            self.write("asset-%03d.json" % index, '{"id": %d}\n' % index)
+
+        result = run_update(["--jobs=2", "sanitize"], self.directory)
+
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        self.assertIn("300 file(s) rewritten", result.stdout)
+        self.assertEqual(
+            '{\n  "id": 7\n}',
+            self.read(os.path.join(self.directory, "assets", "asset-007.json")),
+        )
+
+    def test_reports_invalid_json(self):
+        self.write("broken.json", "{")
+
+        result = run_update(["sanitize"], self.directory)
+
+        self.assertEqual(1, result.returncode)
+        self.assertIn("assets/broken.json: error", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import unittest
+
+from update_runner import run_update, temporary_catalog, update, write_asset
+
+import jsonschema_compiler
+
+try:
+    import black
+except ImportError:
+    black = None
+
+LONG_NAME = "a_property_name_long_enough_to_push_generated_lines_past_the_limit"
+
+
+class SchemaCompilerTest(unittest.TestCase):
+    def compile(self, schema):
+        return jsonschema_compiler.load_validator(
+            jsonschema_compiler.compile_schema(schema)
+        )
+
+    def test_reports_paths_of_structural_errors(self):
+        validate = self.compile(
+            {
+                "$defs": {"entry": {"required": ["tag"], "type": "object"}},
+                "additionalProperties": False,
+                "properties": {
+                    "kind": {"enum": ["a", "b"]},
+                    "count": {"minimum": 0, "type": "integer"},
+                    "entries": {"items": {"$ref": "#/$defs/entry"}, "type": "array"},
+                    "name": {"pattern": "^[a-z]+$", "type": "string"},
+                    "tags": {"type": "array", "uniqueItems": True},
+                },
+                "required": ["name"],
+                "type": "object",
+            }
+        )
+
+        self.assertEqual([], validate({"name": "ok", "entries": [{"tag": "1"}]}))
+        self.assertEqual(
+            [
+                "count must be an integer",
+                "entries[1].tag is required",
+                'kind must be one of ["a", "b"]',
+                "name must match ^[a-z]+$",
+                "tags must not contain duplicate entries",
+                "extra is not a supported field",
+            ],
+            validate(
+                {
+                    "count": True,
+                    "entries": [{"tag": "1"}, {}],
+                    "extra": 1,
+                    "kind": "c",
+                    "name": "Not Ok",
+                    "tags": ["x", "x"],
+                }
+            ),
+        )
+        self.assertEqual(["value must be an object"], validate([]))
+
+    def test_quotes_strings_like_black(self):
+        validate = self.compile({"const": 'it\'s "quoted" \\ é\n'})
+
+        self.assertEqual([], validate('it\'s "quoted" \\ é\n'))
+        self.assertEqual(1, len(validate("other")))
+
+    @unittest.skipUnless(black, "black is not installed")
+    def test_generated_source_is_black_formatted(self):
+        source = jsonschema_compiler.compile_schema(
+            {
+                "additionalProperties": False,
+                "properties": {
+                    LONG_NAME: {
+                        "anyOf": [
+                            {"type": ["string", "null", "integer", "number", "array"]},
+                            {"enum": ["x" * 40, 'a "quoted" value', 1, None]},
+                            {"const": "it's"},
+                            {"type": "number", "minimum": 0, "maximum": 9.5},
+                        ]
+                    },
+                    "entries": {
+                        "items": {
+                            "additionalProperties": {"minLength": 2},
+                            "properties": {LONG_NAME + "_second": {"pattern": "^a"}},
+                            "required": [LONG_NAME + "_second"],
+                        },
+                        "uniqueItems": True,
+                    },
+                },
+                "required": [LONG_NAME],
+                "type": "object",
+            }
+        )
+
+        self.assertEqual(black.format_str(source, mode=black.Mode()), source)
+
+    def test_rejects_unsupported_keywords(self):
+        with self.assertRaises(jsonschema_compiler.SchemaCompileError):
+            jsonschema_compiler.compile_schema({"if": {"type": "string"}})
+
+
+class AssetSchemaTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self, os.path.join("assets", "images"))
+        open(
+            os.path.join(self.directory, "assets", "images", "thumb.png"), "wb"
+        ).close()
+
+    def test_generated_validator_is_up_to_date(self):
+        source, stale = update.asset_validator_source(exact=True)
+        self.assertFalse(stale, "run 'python update.py schema'")
+
+    def test_validate_reports_structural_errors(self):
+        write_asset(
+            self.directory,
+            "test",
+            {
+                "author_id": "test-author",
+                "images": {"thumb": "thumb.png"},
+                "stars": "many",
+                "tags": "tools",
+            },
+        )
+
+        result = run_update(["validate"], self.directory)
+
+        self.assertEqual(1, result.returncode)
+        self.assertIn("test: stars must be an integer", result.stdout)
+        self.assertIn("test: tags must be an array", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import unittest
+
+from update_runner import (
+    read_json,
+    run_update,
+    temporary_catalog,
+    write_asset,
+    write_json,
+)
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+
+    def write_asset(self, asset_id, asset, timestamp):
+        write_asset(self.directory, asset_id, asset)
+        header_path = os.path.join(self.directory, "header.json")
+        header = read_json(header_path) if os.path.exists(header_path) else {}
+        header[asset_id + ".json"] = timestamp
+        write_json(header_path, header)
+
+    def build_index(self, *arguments):
+        result = run_update(["searchindex", *arguments], self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return read_json(os.path.join(self.directory, "search-index.json"))
+
+    def postings(self, index, term):
+        postings = index["terms"].get(term, [])
+        return {
+            index["assets"][postings[i]]: postings[i + 1]
+            for i in range(0, len(postings), 2)
+        }
+
+    def test_indexes_normalized_terms_with_field_weights(self):
+        self.write_asset(
+            "camera",
+            {
+                "name": "Orthographic Camera",
+                "description": "A camera for the Défold engine",
+                "tags": ["Camera"],
+            },
+            1,
+        )
+        self.write_asset(
+            "gui", {"name": "Druid", "description": "GUI", "tags": ["GUI"]}, 1
+        )
+
+        index = self.build_index()
+
+        self.assertEqual({"camera": 4 + 2 + 3}, self.postings(index, "camera"))
+        self.assertEqual({"camera": 2}, self.postings(index, "defold"))
+        self.assertNotIn("the", index["terms"])
+        self.assertIn("orthographic", index["prefixes"]["ort"])
+
+    def test_only_reads_assets_with_changed_header_timestamps(self):
+        self.write_asset("one", {"name": "Pathfinding"}, 1)
+        self.write_asset("two", {"name": "Tilemap"}, 1)
+        self.build_index()
+
+        # Editing a file without touching header.json keeps the cached terms.
+        self.write_asset("one", {"name": "Particles"}, 1)
+        self.write_asset("two", {"name": "Shaders"}, 2)
+        index = self.build_index()
+
+        self.assertEqual({"one": 4}, self.postings(index, "pathfinding"))
+        self.assertEqual({"two": 4}, self.postings(index, "shaders"))
+        self.assertNotIn("tilemap", index["terms"])
+
+    def test_drops_removed_assets_and_indexes_release_messages(self):
+        self.write_asset(
+            "one",
+            {"name": "Spine", "releases": [{"message": "Fixed crash"}]},
+            1,
+        )
+        self.write_asset("two", {"name": "Rive"}, 1)
+        self.build_index()
+        os.remove(os.path.join(self.directory, "assets", "two.json"))
+
+        index = self.build_index("--releasemessages")
+
+        self.assertEqual(["one"], index["assets"])
+        self.assertEqual({"one": 1}, self.postings(index, "crash"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+
+from update_runner import (
+    read_json,
+    run_update,
+    temporary_catalog,
+    update,
+    write_asset,
+    write_json,
+)
+
+REPOSITORIES = {
+    "one": "example/one",
+    "one-copy": "Example/One",
+    "two": "example/two",
+    "three": "example/three",
+    "four": "example/four",
+    "five": "example/five",
+}
+
+
+class ShardTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        for asset_id, repo in REPOSITORIES.items():
+            write_asset(
+                self.directory,
+                asset_id,
+                {"project_url": "https://github.com/%s" % repo, "stars": 0},
+            )
+
+    def read_asset(self, directory, asset_id):
+        return read_json(os.path.join(directory, "assets", asset_id + ".json"))
+
+    def run_shard(self, index, count):
+        shard_directory = os.path.join(self.directory, "shards", str(index))
+        shutil.copytree(
+            os.path.join(self.directory, "assets"), shard_directory + "/assets"
+        )
+        requested = []
+
+        def star_count(url, token):
+            update.github_request_count += 1
+            requested.append(url.split("/repos/", 1)[1].lower())
+            return {"stargazers_count": 10 + index}
+
+        with mock.patch.object(update, "github_request", star_count):
+            result = run_update(
+                ["--githubtoken=token", "--shard=%d/%d" % (index, count), "starcount"],
+                shard_directory,
+            )
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return requested
+
+    def test_shards_partition_by_repository_and_merge(self):
+        requested = [self.run_shard(index, 3) for index in (1, 2, 3)]
+
+        flattened = [repo for shard in requested for repo in shard]
+        self.assertEqual(
+            sorted(repo.lower() for repo in REPOSITORIES.values()), sorted(flattened)
+        )
+        owner = [
+            index for index, shard in enumerate(requested, 1) if "example/one" in shard
+        ]
+        self.assertEqual(1, len(owner))
+        self.assertEqual(2, requested[owner[0] - 1].count("example/one"))
+
+        result = run_update(["merge"], self.directory)
+
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        for index, shard in enumerate(requested, 1):
+            for asset_id, repo in REPOSITORIES.items():
+                if repo.lower() in shard:
+                    self.assertEqual(
+                        10 + index, self.read_asset(self.directory, asset_id)["stars"]
+                    )
+        report = read_json(os.path.join(self.directory, "shard-report.json"))
+        self.assertEqual([], report["missing"])
+        self.assertEqual(6, report["commands"]["starcount"]["requests"])
+
+    def write_tombstones(self, directory, tombstones):
+        write_json(os.path.join(directory, "tombstones.json"), tombstones)
+
+    def test_merge_takes_tombstones_from_the_shard_owning_the_project_url(self):
+        write_asset(
+            self.directory,
+            "renamed",
+            {"project_url": "https://github.com/example/old-name", "stars": 0},
+        )
+        write_json(
+            os.path.join(self.directory, "redirects.json"),
+            {"example/old-name": "example/new-name"},
+        )
+        self.write_tombstones(
+            self.directory, {"example/deleted": {"failure": "gone", "last": 1}}
+        )
+        owner = update.asset_shard(
+            "renamed", {"project_url": "https://github.com/example/old-name"}, 3
+        )
+        for index in (1, 2, 3):
+            self.run_shard(index, 3)
+            tombstone = {"failure": "not_found", "last": 100 - index}
+            if index == owner:
+                tombstone = {"failure": "archived", "last": 10}
+            self.write_tombstones(
+                os.path.join(self.directory, "shards", str(index)),
+                {"example/new-name": tombstone},
+            )
+
+        result = run_update(["merge"], self.directory)
+
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        self.assertEqual(
+            {"example/new-name": {"failure": "archived", "last": 10}},
+            read_json(os.path.join(self.directory, "tombstones.json")),
+        )
+
+    def test_merge_fails_without_changes_when_shards_are_missing(self):
+        self.run_shard(2, 3)
+        before = dict(
+            (asset_id, self.read_asset(self.directory, asset_id))
+            for asset_id in REPOSITORIES
+        )
+
+        result = run_update(["merge"], self.directory)
+
+        self.assertEqual(1, result.returncode, result.stdout + result.stderr)
+        self.assertIn("Missing shard(s): 1, 3", result.stdout)
+        for asset_id in REPOSITORIES:
+            self.assertEqual(
+                before[asset_id], self.read_asset(self.directory, asset_id)
+            )
+
+    def test_rejects_shard_out_of_range(self):
+        result = run_update(["--shard=4/3", "starcount"], self.directory)
+
+        self.assertNotEqual(0, result.returncode)
+        self.assertIn("out of range", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import unittest
+
+from update_runner import run_update, temporary_catalog, write_asset, write_json
+
+
+class ChangeSignificanceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        self.write_asset(
+            {
+                "stars": 100,
+                "library_url": "https://github.com/example/library/archive/1.0.0.zip",
+                "latest_release": {"tag": "1.0.0"},
+            }
+        )
+        self.write_json("header.json", {"test.json": 1})
+        for arguments in (
+            ["init", "-q"],
+            ["add", "-A"],
+            ["-c", "user.name=test", "-c", "user.email=test@example.com"]
+            + ["commit", "-q", "-m", "Initial"],
+        ):
+            subprocess.run(["git"] + arguments, cwd=self.directory, check=True)
+
+    def write_json(self, path, data):
+        write_json(os.path.join(self.directory, path), data)
+
+    def write_asset(self, asset):
+        write_asset(self.directory, "test", asset)
+
+    def classify(self, *arguments):
+        output = os.path.join(self.directory, "github-output")
+        os.environ["GITHUB_OUTPUT"] = output
+        try:
+            result = run_update(["significance", *arguments], self.directory)
+        finally:
+            del os.environ["GITHUB_OUTPUT"]
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        with open(output, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        os.remove(output)
+        return lines[-1], result.stdout
+
+    def test_small_star_delta_is_cosmetic(self):
+        self.write_asset(
+            {
+                "stars": 104,
+                "library_url": "https://github.com/example/library/archive/1.0.0.zip",
+                "latest_release": {"tag": "1.0.0"},
+            }
+        )
+        self.write_json("header.json", {"test.json": 2})
+
+        significant, stdout = self.classify()
+
+        self.assertEqual("significant=false", significant)
+        self.assertIn("1 file(s) with cosmetic changes only", stdout)
+
+    def test_star_threshold_is_configurable(self):
+        self.write_asset(
+            {
+                "stars": 104,
+                "library_url": "https://github.com/example/library/archive/1.0.0.zip",
+                "latest_release": {"tag": "1.0.0"},
+            }
+        )
+
+        significant, stdout = self.classify("--stardelta=2", "--starratio=0.01")
+
+        self.assertEqual("significant=true", significant)
+        self.assertIn("assets/test.json (stars +4)", stdout)
+
+    def test_new_release_is_significant(self):
+        self.write_asset(
+            {
+                "stars": 100,
+                "library_url": "https://github.com/example/library/archive/2.0.0.zip",
+                "latest_release": {"tag": "2.0.0"},
+            }
+        )
+
+        significant, stdout = self.classify()
+
+        self.assertEqual("significant=true", significant)
+        self.assertIn("latest_release.tag, library_url", stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
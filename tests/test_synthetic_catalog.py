@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPDATE_SCRIPT = os.path.join(REPOSITORY_ROOT, "update.py")
+GENERATOR_SCRIPT = os.path.join(REPOSITORY_ROOT, "synthetic_catalog.py")
+BENCHMARK_SCRIPT = os.path.join(REPOSITORY_ROOT, "benchmark.py")
+
+
+class SyntheticCatalogTest(unittest.TestCase):
+    def run_script(self, arguments, directory):
+        result = subprocess.run(
+            [sys.executable] + arguments,
+            cwd=directory,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return result
+
+    def test_generated_catalog_is_valid_and_deterministic(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("first", "second"):
+                self.run_script(
+                    [GENERATOR_SCRIPT, "--count=25", "--seed=3", name], directory
+                )
+            self.run_script(
+                [UPDATE_SCRIPT, "validate"], os.path.join(directory, "first")
+            )
+
+            first = sorted(os.listdir(os.path.join(directory, "first", "assets")))
+            second = sorted(os.listdir(os.path.join(directory, "second", "assets")))
+            self.assertEqual(first, second)
+            self.assertEqual(26, len(first))
+            with open(
+                os.path.join(directory, "first", "header.json"), "r", encoding="utf-8"
+            ) as header_file:
+                self.assertEqual(25, len(json.load(header_file)))
+
+    def test_benchmark_records_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.jsonl")
+            self.run_script(
+                [
+                    BENCHMARK_SCRIPT,
+                    "--base=5",
+                    "--scales=1,2",
+                    "--commands=validate,libraryurls",
+                    "--output=" + output,
+                ],
+                directory,
+            )
+
+            with open(output, "r", encoding="utf-8") as output_file:
+                run = json.loads(output_file.readline())
+            self.assertEqual(
+                [
+                    ("validate", 5),
+                    ("libraryurls", 5),
+                    ("validate", 10),
+                    ("libraryurls", 10),
+                ],
+                [(result["command"], result["assets"]) for result in run["results"]],
+            )
+            for result in run["results"]:
+                self.assertEqual(0, result["status"])
+                self.assertGreater(result["peak_rss_mb"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from update_runner import Response, update
+
+
+def rate_limited_response(status_code, remaining, data=None):
+    return Response(
+        status_code,
+        data,
+        headers={
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        },
+    )
+
+
+class TokenPoolTest(unittest.TestCase):
+    def setUp(self):
+        update.github_token_state.clear()
+        self.addCleanup(update.github_token_state.clear)
+        self.used = []
+
+    def get(self, responses):
+        def get(url, headers, stream=False):
+            token = headers["Authorization"].split(" ", 1)[1]
+            self.used.append(token)
+            return responses[token].pop(0)
+
+        return mock.patch.object(requests, "get", get)
+
+    def test_routes_requests_to_token_with_most_headroom(self):
+        responses = {
+            "first": [rate_limited_response(200, 10, {"n": 1})],
+            "second": [
+                rate_limited_response(200, 4000, {"n": 2}),
+                rate_limited_response(200, 3999, {"n": 3}),
+            ],
+        }
+        with self.get(responses):
+            results = [
+                update.github_request("https://api.github.com/rate", "first, second")
+                for _ in range(3)
+            ]
+
+        self.assertEqual(["first", "second", "second"], self.used)
+        self.assertEqual([{"n": 1}, {"n": 2}, {"n": 3}], results)
+        self.assertEqual(3999, update.github_token_state["second"]["remaining"])
+
+    def test_retries_with_another_token_when_one_is_exhausted(self):
+        responses = {
+            "first": [rate_limited_response(403, 0)],
+            "second": [rate_limited_response(200, 100, {"ok": True})],
+        }
+        with self.get(responses):
+            result = update.github_request(
+                "https://api.github.com/rate", "first,second"
+            )
+
+        self.assertEqual(["first", "second"], self.used)
+        self.assertEqual({"ok": True}, result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from update_runner import (
+    Response,
+    read_json,
+    run_update,
+    temporary_catalog,
+    write_asset,
+    write_json,
+)
+
+
+class TombstoneTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_catalog(self)
+        for asset_id in ("gone", "archived", "alive"):
+            write_asset(
+                self.directory,
+                asset_id,
+                {"project_url": "https://github.com/example/%s" % asset_id},
+            )
+        self.requested = []
+
+    def get(self, url, headers, stream=False):
+        repo = url.rsplit("/", 1)[1]
+        self.requested.append(repo)
+        if repo == "gone":
+            return Response(404)
+        return Response(200, {"stargazers_count": 1, "archived": repo == "archived"})
+
+    def run_update(self, *arguments):
+        self.requested = []
+        with mock.patch.object(requests, "get", self.get):
+            result = run_update(list(arguments), self.directory)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        return result
+
+    def tombstones(self):
+        return read_json(os.path.join(self.directory, "tombstones.json"))
+
+    def test_backs_off_missing_and_archived_repositories(self):
+        self.run_update("--githubtoken=token", "starcount")
+        tombstones = self.tombstones()
+        self.assertEqual(["example/archived", "example/gone"], sorted(tombstones))
+        self.assertEqual("not_found", tombstones["example/gone"]["failure"])
+        self.assertEqual("archived", tombstones["example/archived"]["failure"])
+
+        self.run_update("--githubtoken=token", "starcount")
+        self.assertEqual(["alive"], self.requested)
+
+        tombstones["example/gone"]["next"] = 0
+        write_json(os.path.join(self.directory, "tombstones.json"), tombstones)
+        self.run_update("--githubtoken=token", "starcount")
+        self.assertEqual(["alive", "gone"], sorted(self.requested))
+        gone = self.tombstones()["example/gone"]
+        self.assertEqual(2, gone["count"])
+        self.assertEqual(12 * 3600, gone["next"] - gone["last"])
+
+    def test_reports_long_dead_assets(self):
+        self.run_update("--githubtoken=token", "starcount")
+        tombstones = self.tombstones()
+        tombstones["example/gone"]["first"] = int(time.time()) - 40 * 86400
+        write_json(os.path.join(self.directory, "tombstones.json"), tombstones)
+
+        result = self.run_update("tombstones")
+
+        self.assertIn("example/gone: not_found for 40 day(s)", result.stdout)
+        self.assertIn("assets: gone", result.stdout)
+        self.assertNotIn("example/archived:", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
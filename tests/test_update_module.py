@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class UpdateModuleTest(unittest.TestCase):
+    def test_offline_commands_do_not_import_requests(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, "assets"))
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "import sys; sys.path.insert(0, sys.argv[1]); import update; "
+                    "update.main(['validate']); print('requests' in sys.modules)",
+                    REPOSITORY_ROOT,
+                ],
+                cwd=directory,
+                capture_output=True,
+                text=True,
+            )
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+        self.assertEqual("False", result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
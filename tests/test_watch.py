@@ -0,0 +1,144 @@
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from update_runner import read_json, run_update, temporary_catalog, write_asset
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPDATE_SCRIPT = os.path.join(REPOSITORY_ROOT, "update.py")
+
+
+class WatcherMixin:
+    def make_directory(self):
+        self.directory = temporary_catalog(self, os.path.join("assets", "images"))
+
+    def start_watcher(self, *arguments):
+        self.watcher = subprocess.Popen(
+            [sys.executable, "-u", UPDATE_SCRIPT, "watch", *arguments],
+            cwd=self.directory,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        self.addCleanup(self.watcher.stdout.close)
+        self.addCleanup(self.watcher.wait)
+        self.addCleanup(self.watcher.terminate)
+        self.lines = queue.Queue()
+        threading.Thread(target=self.read_lines, daemon=True).start()
+        return self.wait_for("Watching")
+
+    def read_lines(self):
+        for line in self.watcher.stdout:
+            self.lines.put(line)
+
+    def wait_for(self, text):
+        deadline = time.time() + 10
+        output = ""
+        while time.time() < deadline:
+            try:
+                line = self.lines.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            output += line
+            if text in line:
+                return output
+        self.fail("Timed out waiting for {!r}; output:\n{}".format(text, output))
+
+    def write_asset(self, asset):
+        write_asset(self.directory, "test", asset)
+
+
+class WatchTest(WatcherMixin, unittest.TestCase):
+    def setUp(self):
+        self.make_directory()
+        self.write_asset(
+            {"author_id": "test-author", "images": {"thumb": "test-thumb.webp"}}
+        )
+        self.assertIn("(1 with errors)", self.start_watcher())
+
+    def test_revalidates_edited_asset_json(self):
+        self.write_asset(
+            {"author_id": "Test Author", "images": {"thumb": "test-thumb.webp"}}
+        )
+
+        output = self.wait_for("Checked 1 asset(s)")
+        self.assertIn("author_id must use lowercase ASCII kebab-case", output)
+        self.assertIn("local thumbnail does not exist", output)
+
+    def test_revalidates_assets_referencing_added_image(self):
+        with open(
+            os.path.join(self.directory, "assets", "images", "test-thumb.webp"), "wb"
+        ) as image_file:
+            image_file.write(b"test image")
+
+        output = self.wait_for("Checked 1 asset(s)")
+        self.assertIn("test: ok", output)
+        self.assertIn("0 asset(s) with errors", output)
+
+
+class WatchArtifactsTest(WatcherMixin, unittest.TestCase):
+    def setUp(self):
+        self.make_directory()
+        self.asset = {
+            "author_id": "test-author",
+            "images": {"thumb": "https://example.com/thumb.webp"},
+            "name": "Original",
+        }
+        self.write_asset(self.asset)
+        for arguments in (["header"], ["searchindex"], ["changefeed"]):
+            result = run_update(arguments, self.directory)
+            self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+
+    def read_json(self, path):
+        return read_json(os.path.join(self.directory, path))
+
+    def edit_asset(self):
+        self.asset["name"] = "Renamed"
+        self.asset["release_tags"] = [
+            {"version": "1.0.0", "published_at": "2024-01-01T00:00:00Z"}
+        ]
+        self.write_asset(self.asset)
+        return self.wait_for("Checked 1 asset(s)")
+
+    def test_only_validates_by_default(self):
+        header = self.read_json("header.json")
+        search_index = self.read_json("search-index.json")
+        self.start_watcher()
+
+        output = self.edit_asset()
+
+        self.assertNotIn("Rebuilt", output)
+        self.assertNotIn("latest_release", self.read_json("assets/test.json"))
+        self.assertEqual(header, self.read_json("header.json"))
+        self.assertEqual(search_index, self.read_json("search-index.json"))
+
+    def test_rebuilds_release_summary_and_existing_artifacts(self):
+        self.start_watcher("--rebuild")
+
+        output = self.edit_asset()
+        self.assertIn(
+            "Rebuilt release summaries of 1 asset(s), header.json, search-index.json, "
+            "changefeed.jsonl",
+            output,
+        )
+        self.assertEqual(
+            "1.0.0", self.read_json("assets/test.json")["latest_release"]["tag"]
+        )
+        self.assertIn("renamed", self.read_json("search-index.json")["terms"])
+        self.assertNotIn("original", self.read_json("search-index.json")["terms"])
+        with open(
+            os.path.join(self.directory, "changefeed.jsonl"), "r", encoding="utf-8"
+        ) as feed_file:
+            feed = [json.loads(line) for line in feed_file]
+        self.assertEqual(
+            {"test": ["latest_release", "name", "release_tags"]}, feed[-1]["modified"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
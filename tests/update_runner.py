@@ -0,0 +1,88 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import requests
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPOSITORY_ROOT not in sys.path:
+    sys.path.insert(0, REPOSITORY_ROOT)
+
+import update  # noqa: E402
+
+
+def run_update(arguments, cwd):
+    """Run update.py commands in-process from cwd.
+
+    Returns a subprocess.CompletedProcess so tests read the same way as when
+    they ran update.py in a child process.
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    returncode = 0
+    previous_directory = os.getcwd()
+    os.chdir(cwd)
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            update.main(arguments)
+    except SystemExit as exit:
+        if isinstance(exit.code, int):
+            returncode = exit.code
+        elif exit.code is not None:
+            returncode = 1
+    finally:
+        os.chdir(previous_directory)
+    return subprocess.CompletedProcess(
+        arguments, returncode, stdout.getvalue(), stderr.getvalue()
+    )
+
+
+class Response:
+    """A requests response for tests that patch requests.get."""
+
+    def __init__(self, status_code=200, data=None, text="", headers=None, history=()):
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+        self.history = list(history)
+        self.data = data
+        self.text = text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError("%d error" % self.status_code)
+
+    def json(self):
+        return self.data
+
+
+def temporary_catalog(test_case, *directories):
+    """Return a temporary working directory holding assets/ and directories.
+
+    The directory is removed when test_case finishes.
+    """
+    temporary_directory = tempfile.TemporaryDirectory()
+    test_case.addCleanup(temporary_directory.cleanup)
+    for directory in ("assets",) + directories:
+        os.makedirs(os.path.join(temporary_directory.name, directory), exist_ok=True)
+    return temporary_directory.name
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_asset(directory, asset_id, asset):
+    """Write assets/<asset_id>.json below directory and return its path."""
+    path = os.path.join(directory, "assets", asset_id + ".json")
+    write_json(path, asset)
+    return path
@@ -1,22 +1,59 @@
 #!/usr/bin/env python
 
 import base64
+import codecs
+import concurrent.futures
+import contextlib
+import cProfile
 import datetime
 import fnmatch
+import gzip
+import hashlib
+import heapq
+import io
 import json
+import math
 import os
+import pstats
 import re
+import shutil
 import stat
 import subprocess
 import sys
+import threading
 import time
-from argparse import ArgumentParser
-from urllib.parse import urlparse
+import unicodedata
+from argparse import ArgumentParser, ArgumentTypeError
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
-import requests
+import jsonschema_compiler
+
+PHASES = ["load", "fetch", "transform", "serialize", "write", "git"]
+phase_times = {}
+github_request_count = 0
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Accumulate wall time spent in one phase of the running command.
+
+    Time not attributed to any phase is reported as "transform" by --profile.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase_times[name] = phase_times.get(name, 0) + time.perf_counter() - start
 
 
 def call(args, retries=3, failonerror=True):
+    with phase("git"):
+        return call_unprofiled(args, retries, failonerror)
+
+
+def call_unprofiled(args, retries=3, failonerror=True):
     print(args)
 
     while True:
@@ -44,32 +81,255 @@ def call(args, retries=3, failonerror=True):
         time.sleep(5)
 
 
+GITHUB_RATE_LIMIT = 5000
+# Rate limit headroom per token, from the X-RateLimit headers of its last response.
+github_token_state = {}
+
+
+def github_tokens(token):
+    """Split a comma separated --githubtoken value into the token pool."""
+    return [part.strip() for part in (token or "").split(",") if part.strip()]
+
+
+def select_github_token(tokens, now=None):
+    """Return the token with the most rate limit headroom.
+
+    Tokens without a response yet and tokens whose window has reset count as
+    having the full hourly limit. Ties keep the order of the pool.
+    """
+    if now is None:
+        now = time.time()
+    best = None
+    best_remaining = None
+    for token in tokens:
+        state = github_token_state.get(token)
+        remaining = GITHUB_RATE_LIMIT
+        if state and state["reset"] > now:
+            remaining = state["remaining"]
+        if best is None or remaining > best_remaining:
+            best, best_remaining = token, remaining
+    return best
+
+
+def record_github_rate_limit(token, headers):
+    try:
+        github_token_state[token] = {
+            "remaining": int(headers["X-RateLimit-Remaining"]),
+            "reset": int(headers["X-RateLimit-Reset"]),
+        }
+    except (KeyError, TypeError, ValueError):
+        pass
+
+
+def github_get(url, token, accept=None, stream=False):
+    """GET a GitHub API URL with the pool token that has the most headroom.
+
+    A response saying the chosen token is out of requests is retried with the
+    next best token, as long as the pool has one left to try. With stream the
+    body is left unread for the caller.
+    """
+    # Imported here so offline commands never pay for importing requests.
+    import requests
+
+    global github_request_count
+    tokens = github_tokens(token)
+    tried = set()
+    while True:
+        selected = select_github_token([t for t in tokens if t not in tried])
+        headers = {}
+        if selected:
+            headers["Authorization"] = "token %s" % selected
+        if accept:
+            headers["Accept"] = accept
+        github_request_count += 1
+        with phase("fetch"):
+            response = requests.get(url, headers=headers, stream=stream)
+        if not selected:
+            if response.history:
+                record_github_redirect(url, response, token)
+            return response
+        record_github_rate_limit(selected, response.headers)
+        if response.history:
+            record_github_redirect(url, response, token)
+        tried.add(selected)
+        exhausted = response.status_code in (403, 429) and (
+            github_token_state.get(selected, {}).get("remaining") == 0
+        )
+        if not exhausted or len(tried) == len(tokens):
+            return response
+        print("...rate limit exhausted for one token, retrying with another")
+
+
 def github_request(url, token):
     try:
-        response = requests.get(url, headers={"Authorization": "token %s" % (token)})
+        response = github_get(url, token)
+        record_repository_response(url, response)
         response.raise_for_status()
         return response.json()
     except Exception as err:
         print("github_request", err)
 
 
+GITHUB_STREAM_CHUNK_SIZE = 16 * 1024
+# Pages github_stream_list follows at most, so a caller that never finds the
+# item it stops at (a deleted tag, only prereleases) cannot walk the whole list.
+GITHUB_STREAM_MAX_PAGES = 10
+
+
+def github_next_page(response):
+    """Return the rel="next" URL of a paginated GitHub response, if any."""
+    for link in (response.headers.get("Link") or "").split(","):
+        match = re.match(r'\s*<([^>]+)>\s*;\s*rel="next"', link)
+        if match:
+            return match.group(1)
+    return None
+
+
+def github_stream_list(
+    url, token, follow_pages=True, max_pages=GITHUB_STREAM_MAX_PAGES
+):
+    """Yield the items of a GitHub list endpoint while it is being downloaded.
+
+    The JSON array is decoded item by item as chunks arrive, so a caller that
+    stops iterating (for example at the newest release it already has) closes
+    the connection without downloading or parsing the rest. The next page
+    from the Link header is only requested when the caller asks for more
+    items than the current page held, up to max_pages pages. Errors are raised
+    to the caller.
+    """
+    decoder = json.JSONDecoder()
+    pages = 0
+    while url:
+        if pages == max_pages:
+            print("...stopped after %d page(s) of %s" % (pages, url.split("?")[0]))
+            return
+        pages += 1
+        response = github_get(url, token, stream=True)
+        try:
+            record_repository_response(url, response)
+            response.raise_for_status()
+            # Chunks are bytes unless the response declares an encoding; a
+            # multibyte character can be split across two of them.
+            text_decoder = codecs.getincrementaldecoder("utf-8")()
+            buffer = ""
+            position = 0
+            started = False
+            chunks = response.iter_content(
+                chunk_size=GITHUB_STREAM_CHUNK_SIZE, decode_unicode=True
+            )
+            finished = False
+            while not finished:
+                with phase("fetch"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    raise ValueError("unexpected end of GitHub list response")
+                if isinstance(chunk, bytes):
+                    chunk = text_decoder.decode(chunk)
+                buffer = buffer[position:] + chunk
+                position = 0
+                while True:
+                    while position < len(buffer) and buffer[position] in " \t\r\n,":
+                        position += 1
+                    if position == len(buffer):
+                        break
+                    if not started:
+                        if buffer[position] != "[":
+                            raise ValueError("GitHub response is not a list")
+                        started = True
+                        position += 1
+                        continue
+                    if buffer[position] == "]":
+                        finished = True
+                        break
+                    try:
+                        item, position = decoder.raw_decode(buffer, position)
+                    except ValueError:
+                        # The item continues in the next chunk.
+                        break
+                    yield item
+            url = github_next_page(response) if follow_pages else None
+        finally:
+            response.close()
+
+
+def github_app_installation_tokens(app_id, key_file, installations=None):
+    """Create installation access tokens for a GitHub App from its private key.
+
+    installations lists installation ids; when empty, every installation of
+    the app is used. Requires PyJWT with the cryptography extra.
+    """
+    import requests
+
+    try:
+        import jwt
+    except ImportError:
+        print("GitHub App tokens require PyJWT: pip install 'pyjwt[crypto]'")
+        sys.exit(1)
+
+    with open(key_file, "r", encoding="utf-8") as f:
+        key = f.read()
+    now = int(time.time())
+    # Backdate the token a minute to allow for clock drift, as GitHub suggests.
+    app_token = jwt.encode(
+        {"iat": now - 60, "exp": now + 540, "iss": str(app_id)}, key, algorithm="RS256"
+    )
+    headers = {
+        "Authorization": "Bearer %s" % app_token,
+        "Accept": "application/vnd.github+json",
+    }
+
+    with phase("fetch"):
+        if not installations:
+            response = requests.get(
+                "https://api.github.com/app/installations", headers=headers
+            )
+            response.raise_for_status()
+            installations = [installation["id"] for installation in response.json()]
+        tokens = []
+        for installation in installations:
+            response = requests.post(
+                "https://api.github.com/app/installations/%s/access_tokens"
+                % installation,
+                headers=headers,
+            )
+            response.raise_for_status()
+            tokens.append(response.json()["token"])
+    print("Created %d GitHub App installation token(s)" % len(tokens))
+    return tokens
+
+
 def read_as_json(filename):
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            decoded = json.load(f)
-            return decoded
+        with phase("load"):
+            with open(filename, "r", encoding="utf-8") as f:
+                decoded = json.load(f)
+                return decoded
     except Exception as err:
         print("read_as_json", err)
     return None
 
 
+def canonical_json(data):
+    # Use UTF-8 output to avoid JSON \uDXXX surrogate escapes that
+    # can trip YAML/psych when the site ingests these files.
+    return json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False)
+
+
 def write_as_json(filename, data):
+    """Write data to filename in the canonical layout, without a trailing newline.
+
+    sanitize accepts files in this layout with or without a single trailing
+    newline, so hand-edited assets do not need to drop the one editors add.
+    """
     try:
-        os.chmod(filename, stat.S_IWUSR | stat.S_IWGRP | stat.S_IRUSR | stat.S_IRGRP)
-        with open(filename, "w", encoding="utf-8") as f:
-            # Use UTF-8 output to avoid JSON \uDXXX surrogate escapes that
-            # can trip YAML/psych when the site ingests these files.
-            json.dump(data, f, indent=2, sort_keys=True, ensure_ascii=False)
+        with phase("serialize"):
+            encoded = canonical_json(data)
+        with phase("write"):
+            os.chmod(
+                filename, stat.S_IWUSR | stat.S_IWGRP | stat.S_IRUSR | stat.S_IRGRP
+            )
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(encoded)
     except Exception as err:
         print("write_as_json", err)
     return None
@@ -84,6 +344,163 @@ def find_files(root_dir, file_pattern):
     return matches
 
 
+SANITIZE_PARALLEL_THRESHOLD = 256
+SANITIZE_CHUNK_SIZE = 64
+
+
+def canonicalize_json_file(filename, check=False):
+    """Return (filename, status) after bringing one JSON file to canonical layout.
+
+    Two byte forms are accepted: canonical_json as write_as_json writes it,
+    and the same followed by the single trailing newline most editors add.
+    status is "ok" when the file is in either form, "changed" when
+    the file is (or, with check, would be) rewritten, or an error message.
+    Runs in worker processes, so it only touches its own file.
+    """
+    try:
+        with open(filename, "rb") as f:
+            raw = f.read()
+        canonical = canonical_json(json.loads(raw.decode("utf-8"))).encode("utf-8")
+    except (OSError, ValueError) as err:
+        return filename, "error: %s" % err
+    if raw in (canonical, canonical + b"\n"):
+        return filename, "ok"
+    if not check:
+        with open(filename, "wb") as f:
+            f.write(canonical)
+    return filename, "changed"
+
+
+def sanitize_json_files(check=False, jobs=None):
+    """Rewrite asset and release history JSON that is not in canonical layout.
+
+    Files are compared byte for byte with canonical_json, with and without a
+    single trailing newline, and only files matching neither are written.
+    Large catalogs are processed by a pool of worker processes. With check
+    nothing is written and the command exits non-zero when any file matches
+    neither form.
+    """
+    files = sorted(
+        find_files("assets", "*.json") + find_files(RELEASE_HISTORY_DIR, "*.json")
+    )
+    print("%s %d JSON file(s)" % ("Checking" if check else "Sanitizing", len(files)))
+    if len(files) < SANITIZE_PARALLEL_THRESHOLD or jobs == 1:
+        results = [canonicalize_json_file(filename, check) for filename in files]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(
+                executor.map(
+                    canonicalize_json_file,
+                    files,
+                    [check] * len(files),
+                    chunksize=SANITIZE_CHUNK_SIZE,
+                )
+            )
+
+    changed = [filename for filename, status in results if status == "changed"]
+    errors = [
+        (filename, status) for filename, status in results if status[:5] == "error"
+    ]
+    for filename in changed:
+        print("%s %s" % ("...not canonical:" if check else "...rewrote", filename))
+    for filename, status in errors:
+        print("...%s: %s" % (filename, status))
+    print(
+        "%d file(s) %s, %d error(s)"
+        % (len(changed), "not canonical" if check else "rewritten", len(errors))
+    )
+    if errors or (check and changed):
+        sys.exit(1)
+
+
+SCHEMA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema")
+ASSET_SCHEMA_FILE = os.path.join(SCHEMA_DIRECTORY, "asset.schema.json")
+ASSET_VALIDATOR_FILE = os.path.join(SCHEMA_DIRECTORY, "asset_validator.py")
+asset_schema_validator = None
+
+
+def asset_validator_source(exact=False):
+    """Return (source, stale) for the compiled asset schema validator.
+
+    stale is True when schema/asset_validator.py is missing or was generated
+    from a different version of schema/asset.schema.json. With exact, the
+    schema is always compiled and any difference, including one caused by a
+    change to jsonschema_compiler.py, makes the module stale.
+    """
+    with open(ASSET_SCHEMA_FILE, "r", encoding="utf-8") as f:
+        schema = json.load(f)
+    marker = 'SCHEMA_SHA256 = "{}"'.format(jsonschema_compiler.schema_sha256(schema))
+    existing = None
+    if os.path.exists(ASSET_VALIDATOR_FILE):
+        with open(ASSET_VALIDATOR_FILE, "r", encoding="utf-8") as f:
+            existing = f.read()
+        if not exact and marker in existing:
+            return existing, False
+    source = jsonschema_compiler.compile_schema(schema, "schema/asset.schema.json")
+    return source, source != existing
+
+
+def load_asset_schema_validator():
+    global asset_schema_validator
+    if asset_schema_validator is None:
+        source, stale = asset_validator_source()
+        if stale:
+            print(
+                "schema/asset_validator.py is out of date, "
+                "run 'python update.py schema' to regenerate it"
+            )
+        asset_schema_validator = jsonschema_compiler.load_validator(
+            source, "asset_validator"
+        )
+    return asset_schema_validator
+
+
+def write_asset_validator(check=False):
+    """Regenerate schema/asset_validator.py from schema/asset.schema.json.
+
+    The generated module only needs the standard library, so the site builder
+    can import it to run the same structural checks as validate. It is
+    emitted in black's layout, so the lint step accepts it as is.
+    """
+    source, stale = asset_validator_source(exact=True)
+    if not stale:
+        print("schema/asset_validator.py is up to date")
+        return
+    if check:
+        print("schema/asset_validator.py is out of date")
+        sys.exit(1)
+    with open(ASSET_VALIDATOR_FILE, "w", encoding="utf-8") as f:
+        f.write(source)
+    print("Wrote schema/asset_validator.py")
+
+
+def asset_schema_errors(asset_id, asset):
+    if asset is None:
+        return ["{}: could not read asset JSON".format(asset_id)]
+    return [
+        "{}: {}".format(asset_id, error)
+        for error in load_asset_schema_validator()(asset)
+    ]
+
+
+def validate_asset_schema():
+    print("Validating asset schema")
+    errors = []
+    for filename in sorted(find_files("assets", "*.json")):
+        asset_id = os.path.basename(filename).replace(".json", "")
+        errors.extend(asset_schema_errors(asset_id, read_as_json(filename)))
+
+    if errors:
+        print("Invalid asset structure:")
+        for error in errors[:50]:
+            print(" - {}".format(error))
+        if len(errors) > 50:
+            print("... and {} more".format(len(errors) - 50))
+        sys.exit(1)
+
+    print("...ok!")
+
+
 EXTERNAL_ACTION_TYPES = set(["support", "buy", "donate", "sponsor", "external"])
 EXTERNAL_ACTION_FIELDS = set(["type", "label", "url"])
 EXTERNAL_ACTION_HOSTS = [
@@ -107,22 +524,27 @@ ASSET_IMAGE_EXTENSIONS = set([".webp", ".png", ".jpg", ".jpeg"])
 AUTHOR_ID_RE = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
 
 
+def asset_author_errors(asset_id, asset):
+    errors = []
+    if not isinstance(asset, dict):
+        errors.append("{}: asset JSON must be an object".format(asset_id))
+        return errors
+    if "author" in asset:
+        errors.append("{}: legacy author field is not supported".format(asset_id))
+    author_id = asset.get("author_id")
+    if not isinstance(author_id, str) or not AUTHOR_ID_RE.fullmatch(author_id):
+        errors.append(
+            "{}: author_id must use lowercase ASCII kebab-case".format(asset_id)
+        )
+    return errors
+
+
 def validate_asset_authors():
     print("Validating asset authors")
     errors = []
     for filename in sorted(find_files("assets", "*.json")):
         asset_id = os.path.basename(filename).replace(".json", "")
-        asset = read_as_json(filename)
-        if not isinstance(asset, dict):
-            errors.append("{}: asset JSON must be an object".format(asset_id))
-            continue
-        if "author" in asset:
-            errors.append("{}: legacy author field is not supported".format(asset_id))
-        author_id = asset.get("author_id")
-        if not isinstance(author_id, str) or not AUTHOR_ID_RE.fullmatch(author_id):
-            errors.append(
-                "{}: author_id must use lowercase ASCII kebab-case".format(asset_id)
-            )
+        errors.extend(asset_author_errors(asset_id, read_as_json(filename)))
 
     if errors:
         print("Invalid asset authors:")
@@ -167,268 +589,1472 @@ def external_action_url_allowed(parsed_url):
     return True
 
 
+def asset_external_action_errors(asset_id, asset):
+    errors = []
+    if asset is None:
+        errors.append("{}: could not read asset JSON".format(asset_id))
+        return errors
+    if not isinstance(asset, dict):
+        errors.append("{}: asset JSON must be an object".format(asset_id))
+        return errors
+
+    if "external_actions" not in asset:
+        return errors
+    external_actions = asset["external_actions"]
+    if not isinstance(external_actions, list):
+        errors.append("{}: external_actions must be an array".format(asset_id))
+        return errors
+    if len(external_actions) > 3:
+        errors.append(
+            "{}: external_actions can contain at most 3 entries".format(asset_id)
+        )
+
+    for index, action in enumerate(external_actions):
+        label = "{} external_actions[{}]".format(asset_id, index)
+        if not isinstance(action, dict):
+            errors.append("{} must be an object".format(label))
+            continue
+
+        unexpected_fields = set(action.keys()) - EXTERNAL_ACTION_FIELDS
+        if unexpected_fields:
+            errors.append(
+                "{} has unsupported fields: {}".format(
+                    label, ", ".join(sorted(unexpected_fields))
+                )
+            )
+
+        action_type = action.get("type")
+        if not isinstance(action_type, str):
+            errors.append("{} type must be a string".format(label))
+        elif action_type not in EXTERNAL_ACTION_TYPES:
+            errors.append(
+                "{} has unsupported type: {}".format(label, action.get("type"))
+            )
+
+        action_label = action.get("label")
+        if not isinstance(action_label, str):
+            errors.append("{} label must be a string".format(label))
+        elif not action_label.strip():
+            errors.append("{} must have a label".format(label))
+        elif action_label != action_label.strip():
+            errors.append(
+                "{} label must not have leading or trailing whitespace".format(label)
+            )
+        elif len(action_label) > 50:
+            errors.append("{} label must be 50 characters or fewer".format(label))
+        elif any(ord(char) < 32 or ord(char) == 127 for char in action_label):
+            errors.append("{} label must not contain control characters".format(label))
+        elif action_label.lower() in EXTERNAL_ACTION_BLOCKED_LABELS:
+            errors.append("{} label is misleading: {}".format(label, action_label))
+
+        action_url = action.get("url")
+        if not isinstance(action_url, str):
+            errors.append("{} URL must be a string".format(label))
+            continue
+        if not action_url.strip():
+            errors.append("{} must have a URL".format(label))
+            continue
+        if action_url != action_url.strip():
+            errors.append(
+                "{} URL must not have leading or trailing whitespace".format(label)
+            )
+        if len(action_url) > 2048:
+            errors.append("{} URL must be 2048 characters or fewer".format(label))
+        if any(
+            char.isspace() or ord(char) < 32 or ord(char) == 127 for char in action_url
+        ):
+            errors.append(
+                "{} URL must not contain whitespace or control characters".format(label)
+            )
+        if any(char in action_url for char in ['"', "<", ">", "\\"]):
+            errors.append("{} URL contains unsafe characters".format(label))
+
+        try:
+            parsed_url = urlparse(action_url)
+            parsed_host = parsed_url.hostname
+            parsed_port = parsed_url.port
+        except ValueError:
+            errors.append("{} URL is malformed".format(label))
+            continue
+
+        if parsed_url.scheme != "https":
+            errors.append("{} URL must use https://".format(label))
+        elif not parsed_host:
+            errors.append("{} URL must include a host".format(label))
+        elif parsed_url.username or parsed_url.password:
+            errors.append("{} URL must not contain credentials".format(label))
+        elif parsed_port not in (None, 443):
+            errors.append("{} URL must not use a custom port".format(label))
+        elif not external_action_url_allowed(parsed_url):
+            errors.append(
+                "{} URL is not an allowed creator action: {}".format(label, parsed_host)
+            )
+    return errors
+
+
 def validate_external_actions():
     print("Validating external asset actions")
     errors = []
     for filename in sorted(find_files("assets", "*.json")):
         asset_id = os.path.basename(filename).replace(".json", "")
-        asset = read_as_json(filename)
-        if asset is None:
-            errors.append("{}: could not read asset JSON".format(asset_id))
+        errors.extend(asset_external_action_errors(asset_id, read_as_json(filename)))
+
+    if errors:
+        print("Invalid external asset actions:")
+        for error in errors[:50]:
+            print(" - {}".format(error))
+        if len(errors) > 50:
+            print("... and {} more".format(len(errors) - 50))
+        sys.exit(1)
+
+    print("...ok!")
+
+
+def asset_image_errors(asset_id, asset):
+    errors = []
+    if asset is None:
+        errors.append("{}: could not read asset JSON".format(asset_id))
+        return errors
+    if not isinstance(asset, dict):
+        errors.append("{}: asset JSON must be an object".format(asset_id))
+        return errors
+
+    images = asset.get("images")
+    if not isinstance(images, dict):
+        errors.append("{}: images must be an object".format(asset_id))
+        return errors
+
+    thumbnail = images.get("thumb")
+    if not isinstance(thumbnail, str):
+        errors.append("{}: images.thumb must be a string".format(asset_id))
+        return errors
+    if not thumbnail.strip():
+        errors.append("{}: images.thumb is required".format(asset_id))
+        return errors
+    if thumbnail != thumbnail.strip():
+        errors.append(
+            "{}: images.thumb must not have leading or trailing whitespace".format(
+                asset_id
+            )
+        )
+        return errors
+
+    try:
+        parsed_thumbnail = urlparse(thumbnail)
+        parsed_host = parsed_thumbnail.hostname
+        parsed_port = parsed_thumbnail.port
+    except ValueError:
+        errors.append("{}: images.thumb URL is malformed".format(asset_id))
+        return errors
+
+    if parsed_thumbnail.scheme or parsed_thumbnail.netloc:
+        if parsed_thumbnail.scheme != "https":
+            errors.append("{}: remote images.thumb must use https://".format(asset_id))
+            return errors
+        if not parsed_host:
+            errors.append(
+                "{}: remote images.thumb must include a host".format(asset_id)
+            )
+            return errors
+        if parsed_thumbnail.username or parsed_thumbnail.password:
+            errors.append(
+                "{}: remote images.thumb must not contain credentials".format(asset_id)
+            )
+            return errors
+        if parsed_port not in (None, 443):
+            errors.append(
+                "{}: remote images.thumb must not use a custom port".format(asset_id)
+            )
+            return errors
+        image_path = parsed_thumbnail.path
+    else:
+        if os.path.basename(thumbnail) != thumbnail:
+            errors.append(
+                "{}: local images.thumb must be a filename in assets/images/".format(
+                    asset_id
+                )
+            )
+            return errors
+        image_path = thumbnail
+
+    extension = os.path.splitext(image_path)[1].lower()
+    if extension not in ASSET_IMAGE_EXTENSIONS:
+        errors.append(
+            "{}: images.thumb must use WebP, PNG, JPG, or JPEG".format(asset_id)
+        )
+        return errors
+
+    if not parsed_thumbnail.scheme and not parsed_thumbnail.netloc:
+        local_path = os.path.join("assets", "images", thumbnail)
+        if not os.path.isfile(local_path):
+            errors.append(
+                "{}: local thumbnail does not exist: {}".format(asset_id, local_path)
+            )
+    return errors
+
+
+def validate_asset_images():
+    print("Validating asset images")
+    errors = []
+    for filename in sorted(find_files("assets", "*.json")):
+        asset_id = os.path.basename(filename).replace(".json", "")
+        errors.extend(asset_image_errors(asset_id, read_as_json(filename)))
+
+    if errors:
+        print("Invalid asset images:")
+        for error in errors[:50]:
+            print(" - {}".format(error))
+        if len(errors) > 50:
+            print("... and {} more".format(len(errors) - 50))
+        sys.exit(1)
+
+    print("...ok!")
+
+
+def local_asset_images(asset):
+    """Return the local image filenames (thumb and legacy hero) of an asset."""
+    images = asset.get("images") if isinstance(asset, dict) else None
+    if not isinstance(images, dict):
+        return []
+    filenames = []
+    for field in ("thumb", "hero"):
+        image = images.get(field)
+        if (
+            isinstance(image, str)
+            and image
+            and not urlparse(image).scheme
+            and os.path.basename(image) == image
+            and image not in filenames
+        ):
+            filenames.append(image)
+    return filenames
+
+
+def project_url_key(project_url):
+    """Return the key two assets share when they point at the same project."""
+    repo = github_repo_from_url(project_url)
+    if repo:
+        return "github.com/" + canonical_github_repo(repo).lower()
+    key = (project_url or "").strip().lower().rstrip("/")
+    if key.endswith(".git"):
+        key = key[:-4]
+    return key or None
+
+
+def catalog_consistency_issues(assets, image_files):
+    """Return (errors, warnings) about relationships between assets.
+
+    assets maps asset ids (asset filenames without .json) to their JSON and
+    image_files lists the files in assets/images. One pass fills a dict index
+    per rule, so the checks stay linear in the size of the catalog.
+    """
+    filenames = {}
+    ids = {}
+    project_urls = {}
+    image_references = {}
+    mismatched_ids = []
+    for asset_id in sorted(assets):
+        asset = assets[asset_id]
+        filenames.setdefault(asset_id.lower(), []).append(asset_id)
+        if not isinstance(asset, dict):
             continue
+        declared_id = asset.get("id")
+        if isinstance(declared_id, str) and declared_id and declared_id != asset_id:
+            mismatched_ids.append((asset_id, declared_id))
+            ids.setdefault(declared_id, []).append(asset_id)
+        else:
+            ids.setdefault(asset_id, []).append(asset_id)
+        key = project_url_key(asset.get("project_url"))
+        if key:
+            project_urls.setdefault(key, []).append(asset_id)
+        for image in local_asset_images(asset):
+            image_references.setdefault(image, []).append(asset_id)
+
+    errors = []
+    warnings = []
+    for asset_ids in filenames.values():
+        if len(asset_ids) > 1:
+            errors.append(
+                "asset filenames differ only in case: {}".format(", ".join(asset_ids))
+            )
+    for asset_id, asset_ids in ids.items():
+        if len(asset_ids) > 1:
+            errors.append(
+                "id {} is used by several assets: {}".format(
+                    asset_id, ", ".join(asset_ids)
+                )
+            )
+    for asset_id, declared_id in mismatched_ids:
+        warnings.append(
+            "{}: id {} does not match the filename".format(asset_id, declared_id)
+        )
+    for key, asset_ids in project_urls.items():
+        if len(asset_ids) > 1:
+            warnings.append(
+                "project_url {} is shared by: {}".format(key, ", ".join(asset_ids))
+            )
+    for image in sorted(image_references):
+        if len(image_references[image]) > 1:
+            warnings.append(
+                "image {} is referenced by several assets: {}".format(
+                    image, ", ".join(image_references[image])
+                )
+            )
+    for image in sorted(image_files):
+        if image not in image_references:
+            warnings.append("image {} is not referenced by any asset".format(image))
+    return errors, warnings
+
+
+def validate_catalog_consistency():
+    print("Validating catalog consistency")
+    assets = {}
+    for filename in find_files("assets", "*.json"):
+        asset_id = os.path.basename(filename).replace(".json", "")
+        assets[asset_id] = read_as_json(filename)
+    image_directory = os.path.join("assets", "images")
+    image_files = []
+    if os.path.isdir(image_directory):
+        image_files = [
+            name
+            for name in os.listdir(image_directory)
+            if os.path.isfile(os.path.join(image_directory, name))
+        ]
+    errors, warnings = catalog_consistency_issues(assets, image_files)
+
+    if warnings:
+        print("Catalog warnings:")
+        for warning in warnings[:50]:
+            print(" - {}".format(warning))
+        if len(warnings) > 50:
+            print("... and {} more".format(len(warnings) - 50))
+    if errors:
+        print("Inconsistent catalog:")
+        for error in errors[:50]:
+            print(" - {}".format(error))
+        if len(errors) > 50:
+            print("... and {} more".format(len(errors) - 50))
+        sys.exit(1)
+
+    print("...ok!")
+
+
+def collect_garbage_images(dry_run=False, keep_heroes=False):
+    """Delete files in assets/images that the portal no longer needs.
+
+    The reference set is built from every asset. Files no asset references
+    are removed, and so are legacy images.hero files that are not also used
+    as a thumbnail; the images.hero fields pointing at them are dropped. With
+    dry_run the files are only listed. keep_heroes leaves hero images alone.
+    """
+    image_directory = os.path.join("assets", "images")
+    assets = {}
+    for filename in sorted(find_files("assets", "*.json")):
+        asset = read_as_json(filename)
         if not isinstance(asset, dict):
-            errors.append("{}: asset JSON must be an object".format(asset_id))
+            print("Could not read {}, not collecting images".format(filename))
+            sys.exit(1)
+        assets[filename] = asset
+
+    thumbnails = set()
+    heroes = set()
+    for asset in assets.values():
+        thumbnail = local_thumbnail(asset)
+        if thumbnail:
+            thumbnails.add(thumbnail)
+        heroes.update(set(local_asset_images(asset)) - set([thumbnail]))
+
+    garbage = []
+    for name in sorted(os.listdir(image_directory)):
+        path = os.path.join(image_directory, name)
+        if not os.path.isfile(path) or name in thumbnails:
             continue
+        if name not in heroes:
+            garbage.append((path, "unreferenced"))
+        elif not keep_heroes:
+            garbage.append((path, "legacy hero"))
+
+    total = 0
+    for path, reason in garbage:
+        size = os.path.getsize(path)
+        total += size
+        print(
+            "...{} {} ({}, {:.1f} KB)".format(
+                "would delete" if dry_run else "deleting", path, reason, size / 1024
+            )
+        )
+        if not dry_run:
+            os.remove(path)
 
-        if "external_actions" not in asset:
+    updated = 0
+    if not keep_heroes:
+        for filename, asset in assets.items():
+            if "hero" in (asset.get("images") or {}):
+                updated += 1
+                if not dry_run:
+                    del asset["images"]["hero"]
+                    write_as_json(filename, asset)
+    print(
+        "{} {} image(s), {:.1f} MB, and {} images.hero field(s)".format(
+            "Would remove" if dry_run else "Removed",
+            len(garbage),
+            total / (1024 * 1024),
+            updated,
+        )
+    )
+
+
+IMAGE_HASH_CACHE_FILE = "image-hashes.json"
+IMAGE_HASH_ALGORITHMS = ["dhash", "phash"]
+IMAGE_HASH_BITS = 64
+IMAGE_HASH_PARALLEL_THRESHOLD = 16
+IMAGE_FORMAT_PREFERENCE = [".webp", ".png", ".jpg", ".jpeg"]
+# Largest grey level difference of any pixel, with both images scaled to
+# 64x64, for --dedupe to treat two images of a cluster as the same picture.
+# Re-encodes differ by a few levels; templated art with another logo or
+# title by 30 or more.
+IMAGE_DEDUPE_MAX_DIFFERENCE = 16
+
+
+def difference_hash(image):
+    """Return the 64 bit dHash: is each pixel of a 9x8 grey image brighter
+    than its right neighbour."""
+    from PIL import Image
+
+    pixels = image.convert("L").resize((9, 8), Image.LANCZOS).tobytes()
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left = pixels[row * 9 + column]
+            right = pixels[row * 9 + column + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def perceptual_hash(image):
+    """Return the 64 bit pHash: the low 8x8 DCT frequencies of a 32x32 grey
+    image compared with their median, computed with numpy matrix products."""
+    import numpy
+    from PIL import Image
+
+    pixels = numpy.asarray(
+        image.convert("L").resize((32, 32), Image.LANCZOS), dtype=numpy.float64
+    )
+    k = numpy.arange(32).reshape(-1, 1)
+    n = numpy.arange(32).reshape(1, -1)
+    dct = numpy.cos(numpy.pi * (2 * n + 1) * k / 64)
+    low = (dct @ pixels @ dct.T)[:8, :8].flatten()
+    bits = low > numpy.median(low[1:])
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def image_pixel_difference(first, second):
+    """Return the largest grey level difference between two images at 64x64."""
+    from PIL import Image
+
+    pixels = []
+    for path in (first, second):
+        with Image.open(path) as image:
+            if image.mode == "P":
+                image = image.convert("RGBA")
+            pixels.append(image.convert("L").resize((64, 64), Image.LANCZOS).tobytes())
+    return max(abs(a - b) for a, b in zip(pixels[0], pixels[1]))
+
+
+def hash_image_file(path, algorithm):
+    """Return (path, hash, error) for one image. Runs in worker processes."""
+    try:
+        from PIL import Image
+
+        with Image.open(path) as image:
+            if image.mode == "P":
+                image = image.convert("RGBA")
+            if algorithm == "phash":
+                value = perceptual_hash(image)
+            else:
+                value = difference_hash(image)
+    except Exception as err:
+        return path, None, str(err)
+    return path, "%016x" % value, None
+
+
+def hamming_distance(first, second):
+    return bin(first ^ second).count("1")
+
+
+def cluster_image_hashes(hashes, distance):
+    """Group image names whose hashes are at most distance bits apart.
+
+    Two hashes within distance bits agree exactly on at least one of
+    distance + 1 slices of the hash, so candidate pairs come from a dict
+    index per slice instead of comparing every pair of images. Returns
+    clusters of two or more names, sorted.
+    """
+    slices = min(distance + 1, IMAGE_HASH_BITS)
+    bounds = [IMAGE_HASH_BITS * i // slices for i in range(slices + 1)]
+    parents = dict((name, name) for name in hashes)
+
+    def root(name):
+        while parents[name] != name:
+            parents[name] = parents[parents[name]]
+            name = parents[name]
+        return name
+
+    for index in range(slices):
+        width = bounds[index + 1] - bounds[index]
+        buckets = {}
+        for name in sorted(hashes):
+            key = (hashes[name] >> bounds[index]) & ((1 << width) - 1)
+            buckets.setdefault(key, []).append(name)
+        for names in buckets.values():
+            for i, first in enumerate(names):
+                for second in names[i + 1 :]:
+                    if root(first) == root(second):
+                        continue
+                    if hamming_distance(hashes[first], hashes[second]) <= distance:
+                        parents[root(second)] = root(first)
+
+    clusters = {}
+    for name in hashes:
+        clusters.setdefault(root(name), []).append(name)
+    return sorted(sorted(names) for names in clusters.values() if len(names) > 1)
+
+
+def image_hashes(algorithm="dhash", jobs=None):
+    """Return {image name: hash} for assets/images, reusing image-hashes.json.
+
+    The cache is keyed by the SHA-256 of each file, so only new or changed
+    images are decoded, by a pool of worker processes when there are many.
+    """
+    image_directory = os.path.join("assets", "images")
+    cache = {}
+    if os.path.exists(IMAGE_HASH_CACHE_FILE):
+        cache = read_as_json(IMAGE_HASH_CACHE_FILE) or {}
+
+    digests = {}
+    missing = []
+    for name in sorted(os.listdir(image_directory)):
+        path = os.path.join(image_directory, name)
+        if not os.path.isfile(path):
             continue
-        external_actions = asset["external_actions"]
-        if not isinstance(external_actions, list):
-            errors.append("{}: external_actions must be an array".format(asset_id))
+        if os.path.splitext(name)[1].lower() not in ASSET_IMAGE_EXTENSIONS:
             continue
-        if len(external_actions) > 3:
-            errors.append(
-                "{}: external_actions can contain at most 3 entries".format(asset_id)
+        with open(path, "rb") as f:
+            digests[name] = hashlib.sha256(f.read()).hexdigest()
+        entry = cache.get(name) or {}
+        if entry.get("sha256") != digests[name] or algorithm not in entry:
+            missing.append(path)
+    print(
+        "Hashing {} of {} image(s) ({})".format(len(missing), len(digests), algorithm)
+    )
+    if missing:
+        try:
+            import PIL  # noqa: F401
+
+            if algorithm == "phash":
+                import numpy  # noqa: F401
+        except ImportError as err:
+            print("duplicateimages requires Pillow (and numpy for phash): %s" % err)
+            sys.exit(1)
+
+    if len(missing) < IMAGE_HASH_PARALLEL_THRESHOLD or jobs == 1:
+        results = [hash_image_file(path, algorithm) for path in missing]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(
+                executor.map(hash_image_file, missing, [algorithm] * len(missing))
             )
 
-        for index, action in enumerate(external_actions):
-            label = "{} external_actions[{}]".format(asset_id, index)
-            if not isinstance(action, dict):
-                errors.append("{} must be an object".format(label))
-                continue
+    for path, value, error in results:
+        name = os.path.basename(path)
+        if error:
+            print("...could not hash {}: {}".format(path, error))
+            continue
+        entry = cache.get(name) or {}
+        if entry.get("sha256") != digests[name]:
+            entry = {"sha256": digests[name]}
+        entry[algorithm] = value
+        cache[name] = entry
+
+    cache = dict((name, cache[name]) for name in digests if name in cache)
+    with open(IMAGE_HASH_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return dict(
+        (name, int(entry[algorithm], 16))
+        for name, entry in cache.items()
+        if algorithm in entry
+    )
 
-            unexpected_fields = set(action.keys()) - EXTERNAL_ACTION_FIELDS
-            if unexpected_fields:
-                errors.append(
-                    "{} has unsupported fields: {}".format(
-                        label, ", ".join(sorted(unexpected_fields))
-                    )
-                )
 
-            action_type = action.get("type")
-            if not isinstance(action_type, str):
-                errors.append("{} type must be a string".format(label))
-            elif action_type not in EXTERNAL_ACTION_TYPES:
-                errors.append(
-                    "{} has unsupported type: {}".format(label, action.get("type"))
-                )
+def find_duplicate_images(algorithm="dhash", distance=1, dedupe=False, jobs=None):
+    """Report clusters of near-identical images in assets/images.
 
-            action_label = action.get("label")
-            if not isinstance(action_label, str):
-                errors.append("{} label must be a string".format(label))
-            elif not action_label.strip():
-                errors.append("{} must have a label".format(label))
-            elif action_label != action_label.strip():
-                errors.append(
-                    "{} label must not have leading or trailing whitespace".format(
-                        label
-                    )
-                )
-            elif len(action_label) > 50:
-                errors.append("{} label must be 50 characters or fewer".format(label))
-            elif any(ord(char) < 32 or ord(char) == 127 for char in action_label):
-                errors.append(
-                    "{} label must not contain control characters".format(label)
+    With dedupe, asset image references into a cluster are pointed at one
+    file: the one most assets already use, then the preferred format, then
+    the smallest. Perceptual hashes also match templated art, so an image is
+    only replaced when its pixels are close to the kept file. The files no
+    longer referenced can be removed by gc-images.
+    """
+    hashes = image_hashes(algorithm, jobs)
+    references = {}
+    assets = {}
+    for filename in sorted(find_files("assets", "*.json")):
+        asset = read_as_json(filename)
+        if not isinstance(asset, dict):
+            continue
+        assets[filename] = asset
+        asset_id = os.path.basename(filename).replace(".json", "")
+        for image in local_asset_images(asset):
+            references.setdefault(image, []).append(asset_id)
+
+    clusters = cluster_image_hashes(hashes, distance)
+    for index, names in enumerate(clusters):
+        print("Cluster {}:".format(index + 1))
+        for name in names:
+            print(
+                " - {} ({})".format(
+                    name,
+                    (
+                        "used by " + ", ".join(references[name])
+                        if name in references
+                        else "unreferenced"
+                    ),
                 )
-            elif action_label.lower() in EXTERNAL_ACTION_BLOCKED_LABELS:
-                errors.append("{} label is misleading: {}".format(label, action_label))
+            )
+    print(
+        "{} cluster(s) of images within {} bit(s) of each other".format(
+            len(clusters), distance
+        )
+    )
+    if not dedupe:
+        return
 
-            action_url = action.get("url")
-            if not isinstance(action_url, str):
-                errors.append("{} URL must be a string".format(label))
+    def preference(name):
+        extension = os.path.splitext(name)[1].lower()
+        return (
+            -len(set(references.get(name, []))),
+            IMAGE_FORMAT_PREFERENCE.index(extension),
+            os.path.getsize(os.path.join("assets", "images", name)),
+            name,
+        )
+
+    replacements = {}
+    for names in clusters:
+        keep = min(names, key=preference)
+        for name in names:
+            if name == keep or name not in references:
                 continue
-            if not action_url.strip():
-                errors.append("{} must have a URL".format(label))
+            difference = image_pixel_difference(
+                os.path.join("assets", "images", name),
+                os.path.join("assets", "images", keep),
+            )
+            if difference > IMAGE_DEDUPE_MAX_DIFFERENCE:
+                print("...keeping {}: it differs from {}".format(name, keep))
                 continue
-            if action_url != action_url.strip():
-                errors.append(
-                    "{} URL must not have leading or trailing whitespace".format(label)
-                )
-            if len(action_url) > 2048:
-                errors.append("{} URL must be 2048 characters or fewer".format(label))
-            if any(
-                char.isspace() or ord(char) < 32 or ord(char) == 127
-                for char in action_url
-            ):
-                errors.append(
-                    "{} URL must not contain whitespace or control characters".format(
-                        label
+            replacements[name] = keep
+
+    changed = 0
+    for filename, asset in assets.items():
+        images = asset.get("images")
+        if not isinstance(images, dict):
+            continue
+        updated = False
+        for field in ("thumb", "hero"):
+            image = images.get(field)
+            if image in replacements:
+                print(
+                    "...{}: images.{} {} -> {}".format(
+                        filename, field, image, replacements[image]
                     )
                 )
-            if any(char in action_url for char in ['"', "<", ">", "\\"]):
-                errors.append("{} URL contains unsafe characters".format(label))
+                images[field] = replacements[image]
+                updated = True
+        if updated:
+            write_as_json(filename, asset)
+            changed += 1
+    print("Updated {} asset(s)".format(changed))
 
-            try:
-                parsed_url = urlparse(action_url)
-                parsed_host = parsed_url.hostname
-                parsed_port = parsed_url.port
-            except ValueError:
-                errors.append("{} URL is malformed".format(label))
-                continue
 
-            if parsed_url.scheme != "https":
-                errors.append("{} URL must use https://".format(label))
-            elif not parsed_host:
-                errors.append("{} URL must include a host".format(label))
-            elif parsed_url.username or parsed_url.password:
-                errors.append("{} URL must not contain credentials".format(label))
-            elif parsed_port not in (None, 443):
-                errors.append("{} URL must not use a custom port".format(label))
-            elif not external_action_url_allowed(parsed_url):
-                errors.append(
-                    "{} URL is not an allowed creator action: {}".format(
-                        label, parsed_host
-                    )
+DERIVATIVES_DIRECTORY = "derivatives"
+DERIVATIVE_MANIFEST_FILE = "manifest.json"
+DERIVATIVE_WIDTHS = [300, 600, 900]
+DERIVATIVE_FORMATS = ["avif", "webp"]
+DERIVATIVE_QUALITY = 80
+DERIVATIVE_PARALLEL_THRESHOLD = 4
+
+
+def render_image_derivatives(path, output_directory, widths, formats, quality):
+    """Write the resized variants of one image and return (path, entry, error).
+
+    entry records the source size and, per format, the width and content
+    hashed filename of each variant. Widths above the source width are
+    skipped; a source narrower than every width gets one variant at its own
+    width. Runs in worker processes.
+    """
+    try:
+        from PIL import Image
+
+        with Image.open(path) as image:
+            image.load()
+            source = image
+            if source.mode not in ("RGB", "RGBA"):
+                source = source.convert(
+                    "RGBA"
+                    if "transparency" in source.info or "A" in source.mode
+                    else "RGB"
                 )
+            entry = {"width": source.width, "height": source.height, "files": {}}
+            stem = os.path.splitext(os.path.basename(path))[0]
+            sizes = [width for width in widths if width <= source.width]
+            for image_format in formats:
+                files = []
+                for width in sizes or [source.width]:
+                    height = max(1, round(source.height * width / source.width))
+                    resized = source.resize((width, height), Image.LANCZOS)
+                    encoded = io.BytesIO()
+                    resized.save(encoded, image_format.upper(), quality=quality)
+                    data = encoded.getvalue()
+                    filename = "{}-{}w.{}.{}".format(
+                        stem, width, hashlib.sha256(data).hexdigest()[:12], image_format
+                    )
+                    output = os.path.join(output_directory, filename)
+                    if not os.path.exists(output):
+                        with open(output, "wb") as f:
+                            f.write(data)
+                    files.append({"width": width, "file": filename})
+                entry["files"][image_format] = files
+    except Exception as err:
+        return path, None, str(err)
+    return path, entry, None
 
-    if errors:
-        print("Invalid external asset actions:")
-        for error in errors[:50]:
-            print(" - {}".format(error))
-        if len(errors) > 50:
-            print("... and {} more".format(len(errors) - 50))
+
+def build_image_derivatives(output_directory=DERIVATIVES_DIRECTORY, jobs=None):
+    """Write responsive variants of every local thumbnail and their manifest.
+
+    Each thumbnail is resized to DERIVATIVE_WIDTHS in DERIVATIVE_FORMATS with
+    the content hash in the filename, so the files can be cached forever.
+    manifest.json maps asset ids to a srcset per format and remembers the
+    SHA-256 of every source, so only new or changed thumbnails are processed
+    again, by a pool of worker processes when there are several. Files no
+    longer listed in the manifest are deleted.
+    """
+    try:
+        from PIL import features
+    except ImportError as err:
+        print("derivatives requires Pillow: %s" % err)
         sys.exit(1)
+    formats = [
+        image_format
+        for image_format in DERIVATIVE_FORMATS
+        if features.check(image_format)
+    ]
+    for image_format in sorted(set(DERIVATIVE_FORMATS) - set(formats)):
+        print("...Pillow cannot write {}, skipping it".format(image_format))
+    settings = "{} {} q{}".format(
+        ",".join(str(width) for width in DERIVATIVE_WIDTHS),
+        ",".join(formats),
+        DERIVATIVE_QUALITY,
+    )
+
+    os.makedirs(output_directory, exist_ok=True)
+    manifest_path = os.path.join(output_directory, DERIVATIVE_MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        manifest = read_as_json(manifest_path) or {}
+    previous_images = manifest.get("images") or {}
+
+    thumbnails = {}
+    for filename in sorted(find_files("assets", "*.json")):
+        asset = read_as_json(filename)
+        thumbnail = local_thumbnail(asset) if isinstance(asset, dict) else None
+        if thumbnail and os.path.isfile(os.path.join("assets", "images", thumbnail)):
+            thumbnails[os.path.basename(filename).replace(".json", "")] = thumbnail
+
+    images = {}
+    pending = []
+    for thumbnail in sorted(set(thumbnails.values())):
+        path = os.path.join("assets", "images", thumbnail)
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        entry = previous_images.get(thumbnail) or {}
+        if (
+            entry.get("sha256") == digest
+            and entry.get("settings") == settings
+            and all(
+                os.path.exists(os.path.join(output_directory, variant["file"]))
+                for files in entry.get("files", {}).values()
+                for variant in files
+            )
+        ):
+            images[thumbnail] = entry
+        else:
+            images[thumbnail] = {"sha256": digest, "settings": settings}
+            pending.append(path)
+    print(
+        "Processing {} of {} thumbnail(s) ({})".format(
+            len(pending), len(images), settings
+        )
+    )
+
+    arguments = [output_directory, DERIVATIVE_WIDTHS, formats, DERIVATIVE_QUALITY]
+    if len(pending) < DERIVATIVE_PARALLEL_THRESHOLD or jobs == 1:
+        results = [render_image_derivatives(path, *arguments) for path in pending]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(
+                executor.map(
+                    render_image_derivatives,
+                    pending,
+                    *[[argument] * len(pending) for argument in arguments],
+                )
+            )
+    for path, entry, error in results:
+        thumbnail = os.path.basename(path)
+        if error:
+            print("...could not process {}: {}".format(path, error))
+            del images[thumbnail]
+            continue
+        images[thumbnail].update(entry)
+
+    assets = {}
+    for asset_id in sorted(thumbnails):
+        entry = images.get(thumbnails[asset_id])
+        if not entry:
+            continue
+        srcset = {}
+        for image_format, files in sorted(entry["files"].items()):
+            srcset[image_format] = ", ".join(
+                "{} {}w".format(variant["file"], variant["width"]) for variant in files
+            )
+        assets[asset_id] = {
+            "thumb": thumbnails[asset_id],
+            "width": entry["width"],
+            "height": entry["height"],
+            "srcset": srcset,
+        }
+
+    kept = set([DERIVATIVE_MANIFEST_FILE])
+    for entry in images.values():
+        for files in entry["files"].values():
+            kept.update(variant["file"] for variant in files)
+    removed = 0
+    for name in os.listdir(output_directory):
+        if name not in kept and os.path.isfile(os.path.join(output_directory, name)):
+            os.remove(os.path.join(output_directory, name))
+            removed += 1
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        f.write(canonical_json({"assets": assets, "images": images}))
+    print(
+        "Wrote srcsets for {} asset(s) to {}, removed {} stale file(s)".format(
+            len(assets), manifest_path, removed
+        )
+    )
+
+
+def add_creation_date_to_assets():
+    print("Adding creation date to assets")
+    for filename in find_files("assets", "*.json"):
+        print("Checking creation date for %s" % filename)
+        asset = read_as_json(filename)
+        if not asset:
+            print("...error!")
+        elif asset.get("timestamp"):
+            print("...ok!")
+        else:
+            date = call(
+                "git log --diff-filter=A --follow --format=%aD -1 -- {}".format(
+                    filename
+                )
+            )
+            date = re.sub(r"[+-].*", "", date).rstrip()
+            # "Fri, 30 Aug 2019 13:11:58 +0200"
+            # https://docs.python.org/2/library/datetime.html#strftime-and-strptime-behavior
+            timestamp = time.mktime(
+                datetime.datetime.strptime(date, "%a, %d %b %Y %H:%M:%S").timetuple()
+            )
+            print("...%f" % timestamp)
+            asset["timestamp"] = timestamp
+            write_as_json(filename, asset)
+
+
+CHECKPOINT_FILE = "checkpoint.json"
+# Refreshed assets are saved in batches, so an interrupted run that is not
+# stopped cleanly repeats at most this many assets (or seconds) on --resume.
+CHECKPOINT_FLUSH_ASSETS = 50
+CHECKPOINT_FLUSH_SECONDS = 10
+
+# The checkpoint of the running refresh and how many of its assets, and since
+# when, are not yet saved to checkpoint.json.
+checkpoint_state = {"checkpoint": None, "unsaved": 0, "saved": 0.0}
+
+
+def load_checkpoint():
+    if os.path.exists(CHECKPOINT_FILE):
+        return read_as_json(CHECKPOINT_FILE) or {}
+    return {}
+
+
+def write_checkpoint(checkpoint):
+    # Write to a temporary file first so a cancelled run never leaves a
+    # truncated checkpoint behind.
+    # The completed assets of a run are a set in memory and a sorted list on
+    # disk.
+    temporary = CHECKPOINT_FILE + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2, sort_keys=True, default=sorted)
+    os.replace(temporary, CHECKPOINT_FILE)
+
+
+def flush_checkpoint():
+    """Save the assets checkpoint_asset recorded since the last write."""
+    if checkpoint_state["checkpoint"] is not None and checkpoint_state["unsaved"]:
+        write_checkpoint(checkpoint_state["checkpoint"])
+    checkpoint_state["unsaved"] = 0
+    checkpoint_state["saved"] = time.monotonic()
+
+
+def start_checkpoint(command, files, resume=False, prioritize=False):
+    """Record the start of a GitHub refresh run and return the files to process.
+
+    checkpoint.json keeps, per command, the assets completed by the current run
+    and the last successful fetch time of every asset. With resume, assets the
+    previous unfinished run already completed are skipped. The remaining files
+    are ordered by last fetch time, oldest (or never fetched) first, so assets
+    late in the walk order are not the ones that keep missing out. With
+    prioritize they are instead yielded from a priority queue ordered by
+    refresh_priority.
+    """
+    checkpoint = load_checkpoint()
+    previous = checkpoint.get(command) or {}
+    asset_ids = dict(
+        (filename, os.path.basename(filename).replace(".json", ""))
+        for filename in files
+    )
+    fetched = previous.get("fetched") or {}
+    fetched = dict(
+        (asset_id, fetched[asset_id])
+        for asset_id in asset_ids.values()
+        if asset_id in fetched
+    )
+
+    completed = set()
+    started = int(time.time())
+    if resume and previous and not previous.get("finished"):
+        completed = set(
+            asset_id
+            for asset_id in previous.get("completed") or []
+            if asset_id in fetched
+        )
+        started = previous.get("started", started)
+        print(
+            "Resuming %s run: %d of %d asset(s) already refreshed"
+            % (command, len(completed), len(files))
+        )
+    elif resume:
+        print("No unfinished %s run to resume" % command)
+
+    pending = [filename for filename in files if asset_ids[filename] not in completed]
+    if prioritize:
+        pending = prioritized_files(pending, fetched)
+    else:
+        pending.sort(key=lambda filename: fetched.get(asset_ids[filename], 0))
+
+    checkpoint[command] = {
+        "started": started,
+        "finished": False,
+        "completed": completed,
+        "fetched": fetched,
+    }
+    write_checkpoint(checkpoint)
+    checkpoint_state.update(checkpoint=checkpoint, unsaved=0, saved=time.monotonic())
+    return checkpoint, pending
+
+
+def refresh_priority(asset, fetched_at, now):
+    """Return how valuable refreshing an asset is; higher goes first.
+
+    Hours since the last successful fetch are scaled up by popularity (stars,
+    logarithmically) and by release activity (up to twice as much for an asset
+    that released within the last month).
+    """
+    stale_hours = max(0, now - fetched_at) / 3600
+    popularity = 1 + math.log10(1 + max(0, asset.get("stars") or 0))
+    activity = 1
+    days = days_since((asset.get("latest_release") or {}).get("published_at"), now)
+    if days is not None:
+        activity = 1 + 30 / (30 + days)
+    return stale_hours * popularity * activity
+
+
+def prioritized_files(files, fetched, now=None):
+    """Yield files from a priority queue, most valuable refresh first."""
+    if now is None:
+        now = time.time()
+    queue = []
+    for filename in files:
+        asset = read_as_json(filename) or {}
+        asset_id = os.path.basename(filename).replace(".json", "")
+        priority = refresh_priority(asset, fetched.get(asset_id, 0), now)
+        queue.append((-priority, filename))
+    heapq.heapify(queue)
+    while queue:
+        yield heapq.heappop(queue)[1]
+
+
+def start_refresh_budget(time_budget=None, request_budget=None):
+    return {
+        "time": time_budget,
+        "requests": request_budget,
+        "started": time.monotonic(),
+        "first_request": github_request_count,
+        "assets": 0,
+    }
+
+
+def refresh_budget_allows(budget):
+    """Return whether another asset is expected to fit in the remaining budget.
+
+    The expected cost of the next asset is the average time and number of
+    GitHub requests of the assets refreshed so far, so a run stops before it
+    overshoots instead of after.
+    """
+    if budget["time"] is None and budget["requests"] is None:
+        return True
+    assets = budget["assets"]
+    if budget["time"] is not None:
+        elapsed = time.monotonic() - budget["started"]
+        average = elapsed / assets if assets else 0
+        if elapsed + average > budget["time"]:
+            return False
+    if budget["requests"] is not None:
+        used = github_request_count - budget["first_request"]
+        average = used / assets if assets else 0
+        if used + average > budget["requests"] or used >= budget["requests"]:
+            return False
+    return True
+
+
+def checkpoint_asset(checkpoint, command, filename):
+    """Mark one asset as refreshed by the current run of command.
+
+    checkpoint.json is only rewritten every CHECKPOINT_FLUSH_ASSETS assets or
+    CHECKPOINT_FLUSH_SECONDS seconds; main flushes the rest when a command
+    ends, even when it is interrupted.
+    """
+    asset_id = os.path.basename(filename).replace(".json", "")
+    run = checkpoint[command]
+    run["completed"].add(asset_id)
+    run["fetched"][asset_id] = int(time.time())
+    checkpoint_state["unsaved"] += 1
+    if (
+        checkpoint_state["unsaved"] >= CHECKPOINT_FLUSH_ASSETS
+        or time.monotonic() - checkpoint_state["saved"] >= CHECKPOINT_FLUSH_SECONDS
+    ):
+        flush_checkpoint()
+
+
+def print_budget_exhausted(visited, files):
+    print(
+        "Budget exhausted after %d asset(s); %d left for the next run"
+        % (len(visited), len(files) - len(visited))
+    )
+
+
+def finish_checkpoint(checkpoint, command, files):
+    """Close the run of command once every file in files has been visited.
+
+    Assets whose fetch failed keep their older fetch time, so the next run
+    tries them first.
+    """
+    run = checkpoint[command]
+    completed = run["completed"]
+    failed = len(
+        [
+            filename
+            for filename in files
+            if os.path.basename(filename).replace(".json", "") not in completed
+        ]
+    )
+    if failed:
+        print("%d asset(s) could not be refreshed" % failed)
+    run["finished"] = True
+    run["completed"] = set()
+    write_checkpoint(checkpoint)
+    checkpoint_state.update(checkpoint=None, unsaved=0)
+
+
+TOMBSTONES_FILE = "tombstones.json"
+TOMBSTONE_BACKOFF = 6 * 3600
+TOMBSTONE_MAX_BACKOFF = 30 * 86400
+TOMBSTONE_STATUSES = {404: "not_found", 410: "gone", 451: "unavailable"}
+# Lowercased owner/name -> failure record, loaded lazily from TOMBSTONES_FILE.
+repository_tombstones = None
+
+
+def load_tombstones():
+    global repository_tombstones
+    if repository_tombstones is None:
+        repository_tombstones = {}
+        if os.path.exists(TOMBSTONES_FILE):
+            repository_tombstones = read_as_json(TOMBSTONES_FILE) or {}
+    return repository_tombstones
+
+
+def write_tombstones():
+    with open(TOMBSTONES_FILE, "w", encoding="utf-8") as f:
+        json.dump(load_tombstones(), f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def record_repository_failure(repo, failure, now=None):
+    """Record a failure of repo and schedule its next attempt.
+
+    The wait doubles with every consecutive failure, from TOMBSTONE_BACKOFF
+    up to TOMBSTONE_MAX_BACKOFF.
+    """
+    if now is None:
+        now = int(time.time())
+    tombstones = load_tombstones()
+    key = repo.lower()
+    tombstone = tombstones.get(key)
+    if not tombstone or tombstone["failure"] != failure:
+        tombstone = {"failure": failure, "count": 0, "first": now}
+    tombstone["count"] += 1
+    tombstone["last"] = now
+    tombstone["next"] = now + min(
+        TOMBSTONE_MAX_BACKOFF, TOMBSTONE_BACKOFF * 2 ** (tombstone["count"] - 1)
+    )
+    tombstones[key] = tombstone
+    write_tombstones()
+    print(
+        "...%s: %s (failure %d, next attempt %s)"
+        % (
+            repo,
+            failure,
+            tombstone["count"],
+            datetime.datetime.fromtimestamp(
+                tombstone["next"], datetime.timezone.utc
+            ).strftime("%Y-%m-%d %H:%M UTC"),
+        )
+    )
+
+
+def clear_repository_failure(repo, keep_archived=False):
+    tombstones = load_tombstones()
+    tombstone = tombstones.get(repo.lower())
+    if not tombstone or (keep_archived and tombstone["failure"] == "archived"):
+        return
+    del tombstones[repo.lower()]
+    write_tombstones()
+    print("...%s is reachable again" % repo)
+
+
+def record_repository_response(url, response):
+    """Update the tombstone of the repository behind a GitHub API response.
+
+    Missing repositories and archived ones (seen on the repository endpoint)
+    are recorded; any other successful repository, release or tag response
+    clears the record. Other errors, such as rate limits, are left alone.
+    """
+    match = re.match(
+        r"https://api\.github\.com/repos/([^/?]+/[^/?]+)(/releases|/tags)?(?:\?|$)",
+        url,
+    )
+    if not match:
+        return
+    repo = match.group(1)
+    if response.status_code in TOMBSTONE_STATUSES:
+        record_repository_failure(repo, TOMBSTONE_STATUSES[response.status_code])
+    elif response.status_code == 200:
+        if match.group(2) is None:
+            try:
+                archived = (response.json() or {}).get("archived") is True
+            except (ValueError, AttributeError):
+                archived = False
+            if archived:
+                record_repository_failure(repo, "archived")
+                return
+            clear_repository_failure(repo)
+        else:
+            clear_repository_failure(repo, keep_archived=True)
+
+
+def repository_backed_off(repo, now=None):
+    """Return the tombstone of repo if it should not be queried yet."""
+    if now is None:
+        now = time.time()
+    tombstone = load_tombstones().get(canonical_github_repo(repo).lower())
+    if tombstone and tombstone["next"] > now:
+        print(
+            "...skipping %s: %s %d time(s)"
+            % (repo, tombstone["failure"], tombstone["count"])
+        )
+        return tombstone
+    return None
+
+
+def report_dead_repositories(days=30, now=None):
+    """Print the assets whose repository has been failing for at least days."""
+    if now is None:
+        now = time.time()
+    assets = {}
+    for filename in find_files("assets", "*.json"):
+        repo = github_repo_from_url((read_as_json(filename) or {}).get("project_url"))
+        if repo:
+            key = canonical_github_repo(repo).lower()
+            assets.setdefault(key, []).append(
+                os.path.basename(filename).replace(".json", "")
+            )
+
+    print("Repositories failing for %d day(s) or more" % days)
+    dead = 0
+    for repo, tombstone in sorted(load_tombstones().items()):
+        age = int((now - tombstone["first"]) // 86400)
+        if age < days or repo not in assets:
+            continue
+        dead += 1
+        print(
+            "%s: %s for %d day(s), %d failure(s); assets: %s"
+            % (
+                repo,
+                tombstone["failure"],
+                age,
+                tombstone["count"],
+                ", ".join(sorted(assets[repo])),
+            )
+        )
+    print("%d long-dead repository(ies)" % dead)
 
-    print("...ok!")
 
+SHARD_REPORT_FILE = "shard-report.json"
+SHARDED_COMMANDS = ["starcount", "releases", "library"]
 
-def validate_asset_images():
-    print("Validating asset images")
-    errors = []
-    for filename in sorted(find_files("assets", "*.json")):
-        asset_id = os.path.basename(filename).replace(".json", "")
-        asset = read_as_json(filename)
-        if asset is None:
-            errors.append("{}: could not read asset JSON".format(asset_id))
-            continue
-        if not isinstance(asset, dict):
-            errors.append("{}: asset JSON must be an object".format(asset_id))
-            continue
 
-        images = asset.get("images")
-        if not isinstance(images, dict):
-            errors.append("{}: images must be an object".format(asset_id))
-            continue
+def parse_shard(value):
+    """Parse --shard i/n into (i, n), with shards numbered from 1."""
+    match = re.fullmatch(r"(\d+)/(\d+)", value or "")
+    if not match:
+        raise ArgumentTypeError("expected i/n, for example 1/4")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ArgumentTypeError("shard %s is out of range" % value)
+    return index, count
 
-        thumbnail = images.get("thumb")
-        if not isinstance(thumbnail, str):
-            errors.append("{}: images.thumb must be a string".format(asset_id))
-            continue
-        if not thumbnail.strip():
-            errors.append("{}: images.thumb is required".format(asset_id))
-            continue
-        if thumbnail != thumbnail.strip():
-            errors.append(
-                "{}: images.thumb must not have leading or trailing whitespace".format(
-                    asset_id
-                )
-            )
-            continue
 
-        try:
-            parsed_thumbnail = urlparse(thumbnail)
-            parsed_host = parsed_thumbnail.hostname
-            parsed_port = parsed_thumbnail.port
-        except ValueError:
-            errors.append("{}: images.thumb URL is malformed".format(asset_id))
+def asset_shard(asset_id, asset, count):
+    """Return the shard (1..count) that owns an asset.
+
+    GitHub assets are partitioned by lowercased owner/name so several assets
+    of one repository always land in the same shard; other assets by id.
+    """
+    key = github_repo_from_url((asset or {}).get("project_url", ""))
+    key = key.lower() if key else asset_id
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def shard_files(files, shard):
+    """Return the files of shard (i, n), or all files when shard is None."""
+    if not shard:
+        return files
+    index, count = shard
+    selected = [
+        filename
+        for filename in files
+        if asset_shard(
+            os.path.basename(filename).replace(".json", ""),
+            read_as_json(filename),
+            count,
+        )
+        == index
+    ]
+    print("Shard %d/%d: %d of %d asset(s)" % (index, count, len(selected), len(files)))
+    return selected
+
+
+def merge_shard_tombstones(shard_tombstones, count):
+    """Take the tombstone of every repository from the shard(s) that own it.
+
+    Shards partition assets by the repository in their project_url, while
+    tombstones are keyed by the canonical repository, so ownership is looked
+    up through the merged assets. A repository that recovered, or that no
+    asset refers to anymore, is dropped.
+    """
+    owners = {}
+    for filename in find_files("assets", "*.json"):
+        asset = read_as_json(filename)
+        repo = github_repo_from_url((asset or {}).get("project_url", ""))
+        if not repo:
             continue
+        asset_id = os.path.basename(filename).replace(".json", "")
+        owners.setdefault(canonical_github_repo(repo).lower(), set()).add(
+            asset_shard(asset_id, asset, count)
+        )
 
-        if parsed_thumbnail.scheme or parsed_thumbnail.netloc:
-            if parsed_thumbnail.scheme != "https":
-                errors.append(
-                    "{}: remote images.thumb must use https://".format(asset_id)
-                )
-                continue
-            if not parsed_host:
-                errors.append(
-                    "{}: remote images.thumb must include a host".format(asset_id)
-                )
-                continue
-            if parsed_thumbnail.username or parsed_thumbnail.password:
-                errors.append(
-                    "{}: remote images.thumb must not contain credentials".format(
-                        asset_id
-                    )
-                )
-                continue
-            if parsed_port not in (None, 443):
-                errors.append(
-                    "{}: remote images.thumb must not use a custom port".format(
-                        asset_id
-                    )
-                )
-                continue
-            image_path = parsed_thumbnail.path
+    tombstones = load_tombstones()
+    for repo in set(tombstones).union(*shard_tombstones.values()):
+        candidates = [
+            shard_tombstones[index][repo]
+            for index in owners.get(repo, ())
+            if repo in shard_tombstones.get(index, {})
+        ]
+        if candidates:
+            tombstones[repo] = max(candidates, key=lambda tombstone: tombstone["last"])
         else:
-            if os.path.basename(thumbnail) != thumbnail:
-                errors.append(
-                    "{}: local images.thumb must be a filename in assets/images/".format(
-                        asset_id
-                    )
-                )
-                continue
-            image_path = thumbnail
+            tombstones.pop(repo, None)
+    if tombstones or os.path.exists(TOMBSTONES_FILE):
+        write_tombstones()
 
-        extension = os.path.splitext(image_path)[1].lower()
-        if extension not in ASSET_IMAGE_EXTENSIONS:
-            errors.append(
-                "{}: images.thumb must use WebP, PNG, JPG, or JPEG".format(asset_id)
-            )
-            continue
 
-        if not parsed_thumbnail.scheme and not parsed_thumbnail.netloc:
-            local_path = os.path.join("assets", "images", thumbnail)
-            if not os.path.isfile(local_path):
-                errors.append(
-                    "{}: local thumbnail does not exist: {}".format(
-                        asset_id, local_path
-                    )
-                )
+def merge_shards(shards_directory="shards"):
+    """Merge the outputs of sharded runs into the working tree.
 
-    if errors:
-        print("Invalid asset images:")
-        for error in errors[:50]:
-            print(" - {}".format(error))
-        if len(errors) > 50:
-            print("... and {} more".format(len(errors) - 50))
+    Every subdirectory of shards_directory holds the assets/, releases/ and
+    profile/ directories, the redirects.json, tombstones.json and
+    shard-report.json of one sharded run. Only
+    the files a shard owns are taken from it, so merging is independent of
+    the order of the shards. Nothing is merged unless every shard is present,
+    so a failed shard never publishes a partial refresh.
+    """
+    if not os.path.isdir(shards_directory):
+        print("Shard directory not found: %s" % shards_directory)
         sys.exit(1)
 
-    print("...ok!")
+    reports = {}
+    directories = {}
+    count = None
+    for name in sorted(os.listdir(shards_directory)):
+        directory = os.path.join(shards_directory, name)
+        report_path = os.path.join(directory, SHARD_REPORT_FILE)
+        if not os.path.exists(report_path):
+            continue
+        report = read_as_json(report_path) or {}
+        index = report.get("shard")
+        if count is None:
+            count = report.get("count")
+        elif report.get("count") != count:
+            print("%s was run with %s shards, not %s" % (name, report["count"], count))
+            sys.exit(1)
+        if index in reports:
+            print("Shard %s appears more than once" % index)
+            sys.exit(1)
+        reports[index] = report
+        directories[index] = directory
 
+    if not reports:
+        print("No shard reports found in %s" % shards_directory)
+        sys.exit(1)
+    missing = [index for index in range(1, count + 1) if index not in reports]
+    if missing:
+        print("Missing shard(s): %s" % ", ".join(str(index) for index in missing))
+        sys.exit(1)
 
-def add_creation_date_to_assets():
-    print("Adding creation date to assets")
-    for filename in find_files("assets", "*.json"):
-        print("Checking creation date for %s" % filename)
-        asset = read_as_json(filename)
-        if not asset:
-            print("...error!")
-        elif asset.get("timestamp"):
-            print("...ok!")
-        else:
-            date = call(
-                "git log --diff-filter=A --follow --format=%aD -1 -- {}".format(
-                    filename
-                )
+    copied = 0
+    shard_tombstones = {}
+    for index in sorted(directories):
+        directory = directories[index]
+        print("Merging shard %s/%s from %s" % (index, count, directory))
+
+        for filename in find_files(os.path.join(directory, "assets"), "*.json"):
+            relative = os.path.relpath(filename, directory)
+            asset_id = os.path.basename(filename).replace(".json", "")
+            if not os.path.exists(relative):
+                continue
+            # Ownership follows the working tree copy, which is what the
+            # shard partitioned before it refreshed the asset.
+            if asset_shard(asset_id, read_as_json(relative), count) != index:
+                continue
+            asset = read_as_json(filename)
+            targets = [relative]
+            if asset and asset.get("release_history"):
+                targets.append(asset["release_history"])
+            for target in targets:
+                source = os.path.join(directory, target)
+                if not os.path.exists(source):
+                    continue
+                with open(source, "rb") as f:
+                    content = f.read()
+                if os.path.exists(target):
+                    with open(target, "rb") as f:
+                        if f.read() == content:
+                            continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with phase("write"):
+                    with open(target, "wb") as f:
+                        f.write(content)
+                copied += 1
+
+        shard_redirects = os.path.join(directory, REDIRECTS_FILE)
+        if os.path.exists(shard_redirects):
+            redirects = load_github_redirects()
+            redirects.update(read_as_json(shard_redirects) or {})
+            write_github_redirects()
+
+        shard_tombstones_file = os.path.join(directory, TOMBSTONES_FILE)
+        shard_tombstones[index] = {}
+        if os.path.exists(shard_tombstones_file):
+            shard_tombstones[index] = read_as_json(shard_tombstones_file) or {}
+
+        profile_directory = os.path.join(directory, "profile")
+        if os.path.isdir(profile_directory):
+            shutil.copytree(
+                profile_directory,
+                os.path.join("profile", "shard-%s" % index),
+                dirs_exist_ok=True,
             )
-            date = re.sub(r"[+-].*", "", date).rstrip()
-            # "Fri, 30 Aug 2019 13:11:58 +0200"
-            # https://docs.python.org/2/library/datetime.html#strftime-and-strptime-behavior
-            timestamp = time.mktime(
-                datetime.datetime.strptime(date, "%a, %d %b %Y %H:%M:%S").timetuple()
+
+    merge_shard_tombstones(shard_tombstones, count)
+
+    totals = {}
+    for index in sorted(reports):
+        for command, result in sorted(reports[index].get("commands", {}).items()):
+            print(
+                "...shard %d %s: %.1fs, %d request(s)"
+                % (index, command, result["seconds"], result["requests"])
             )
-            print("...%f" % timestamp)
-            asset["timestamp"] = timestamp
-            write_as_json(filename, asset)
+            total = totals.setdefault(command, {"seconds": 0, "requests": 0})
+            total["seconds"] = max(total["seconds"], result["seconds"])
+            total["requests"] += result["requests"]
+    with open(SHARD_REPORT_FILE, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "count": count,
+                "missing": missing,
+                "shards": dict((str(index), reports[index]) for index in reports),
+                "commands": totals,
+            },
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+    print("Merged %d changed file(s) from %d shard(s)" % (copied, len(reports)))
 
 
-def update_github_star_count_for_assets(githubtoken):
+def update_github_star_count_for_assets(
+    githubtoken, resume=False, time_budget=None, request_budget=None, shard=None
+):
     if githubtoken is None:
         print("No GitHub token specified")
         sys.exit(1)
 
     print("Update star count for assets")
-    for filename in find_files("assets", "*.json"):
+    files = shard_files(find_files("assets", "*.json"), shard)
+    budget = start_refresh_budget(time_budget, request_budget)
+    checkpoint, pending = start_checkpoint(
+        "starcount",
+        files,
+        resume,
+        prioritize=time_budget is not None or request_budget is not None,
+    )
+    visited = []
+    for filename in pending:
+        if not refresh_budget_allows(budget):
+            print_budget_exhausted(visited, files)
+            break
+        visited.append(filename)
+        budget["assets"] += 1
         print("Getting star count for %s" % filename)
         asset = read_as_json(filename)
         if not asset:
@@ -436,16 +2062,21 @@ def update_github_star_count_for_assets(githubtoken):
         else:
             project_url = asset.get("project_url", "")
             repo = github_repo_from_url(project_url)
-            if repo:
-                url = "https://api.github.com/repos/%s" % (repo)
+            if repo and repository_backed_off(repo):
+                checkpoint_asset(checkpoint, "starcount", filename)
+            elif repo:
+                url = "https://api.github.com/repos/%s" % canonical_github_repo(repo)
                 response = github_request(url, githubtoken)
                 if response:
                     stars = response.get("stargazers_count")
                     print("...%d" % (stars))
                     asset["stars"] = stars
                     write_as_json(filename, asset)
+                    checkpoint_asset(checkpoint, "starcount", filename)
             else:
                 print("...not a GitHub repository!")
+                checkpoint_asset(checkpoint, "starcount", filename)
+    finish_checkpoint(checkpoint, "starcount", visited)
 
 
 def github_repo_from_url(project_url):
@@ -466,6 +2097,131 @@ def github_repo_from_url(project_url):
     return "%s/%s" % (owner, repository)
 
 
+REDIRECTS_FILE = "redirects.json"
+# Lowercased owner/name from project_url -> canonical owner/name, loaded lazily.
+github_redirect_map = None
+# Redirected requests per project repository in this run.
+github_redirects = {}
+
+
+def load_github_redirects():
+    global github_redirect_map
+    if github_redirect_map is None:
+        github_redirect_map = {}
+        if os.path.exists(REDIRECTS_FILE):
+            github_redirect_map = read_as_json(REDIRECTS_FILE) or {}
+    return github_redirect_map
+
+
+def write_github_redirects():
+    with open(REDIRECTS_FILE, "w", encoding="utf-8") as f:
+        json.dump(load_github_redirects(), f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def canonical_github_repo(repo):
+    """Return the canonical owner/name recorded for a renamed or moved repo."""
+    if not repo:
+        return repo
+    return load_github_redirects().get(repo.lower(), repo)
+
+
+def record_github_redirect(url, response, token):
+    """Count a redirected API request and record the repo's canonical name.
+
+    The canonical owner/name comes from full_name when the response is the
+    repository itself, and otherwise from one extra repository lookup.
+    """
+    match = re.match(r"https://api\.github\.com/repos/([^/?]+/[^/?]+)", url)
+    if not match:
+        return
+    repo = match.group(1)
+    github_redirects[repo] = github_redirects.get(repo, 0) + 1
+
+    data = None
+    try:
+        data = response.json()
+    except ValueError:
+        pass
+    if not (isinstance(data, dict) and data.get("full_name")):
+        lookup = "https://api.github.com/repos/%s" % repo
+        if url == lookup:
+            return
+        data = github_request(lookup, token)
+    canonical = (data or {}).get("full_name") if isinstance(data, dict) else None
+    if not canonical or canonical.lower() == repo.lower():
+        return
+    if load_github_redirects().get(repo.lower()) != canonical:
+        print("...%s moved to %s" % (repo, canonical))
+        github_redirect_map[repo.lower()] = canonical
+        write_github_redirects()
+
+
+def rewrite_github_repo_url(url, repo, canonical):
+    """Replace the owner/name prefix of a github.com URL, keeping the rest."""
+    parsed = urlparse(url)
+    parts = parsed.path.strip("/").split("/")
+    if len(parts) < 2 or "/".join(parts[:2]).lower() != repo.lower():
+        return url
+    path = "/" + "/".join(canonical.split("/") + parts[2:])
+    if parsed.path.endswith("/") and len(parts) > 2:
+        path += "/"
+    return parsed._replace(path=path).geturl()
+
+
+def canonicalize_repository_urls(asset_id=None):
+    """Rewrite project_url and library_url of moved repos to the canonical repo.
+
+    library_url is only rewritten when classify_github_library_url recognizes
+    it (branch archive, tag archive or release download); custom URLs are left
+    alone. Redirects no longer used by any asset are dropped.
+    """
+    if asset_id:
+        files = [os.path.join("assets", asset_id + ".json")]
+    else:
+        files = find_files("assets", "*.json")
+    redirects = load_github_redirects()
+    print("Canonicalizing repository URLs")
+
+    updated = 0
+    for filename in files:
+        asset = read_as_json(filename)
+        if not asset:
+            print("...error reading %s" % filename)
+            continue
+        repo = github_repo_from_url(asset.get("project_url", ""))
+        canonical = redirects.get((repo or "").lower())
+        if not canonical:
+            continue
+        asset["project_url"] = rewrite_github_repo_url(
+            asset["project_url"], repo, canonical
+        )
+        library_url = asset.get("library_url", "")
+        if classify_github_library_url(library_url, repo) in (
+            "branch",
+            "tag",
+            "release",
+        ):
+            asset["library_url"] = rewrite_github_repo_url(library_url, repo, canonical)
+        print("...%s: %s -> %s" % (filename, repo, canonical))
+        write_as_json(filename, asset)
+        updated += 1
+
+    if not asset_id:
+        used = set()
+        for filename in find_files("assets", "*.json"):
+            repo = github_repo_from_url(
+                (read_as_json(filename) or {}).get("project_url", "")
+            )
+            if repo:
+                used.add(repo.lower())
+        for repo in sorted(set(redirects) - used):
+            del redirects[repo]
+        if os.path.exists(REDIRECTS_FILE):
+            write_github_redirects()
+    print("Canonicalized %d asset(s)" % updated)
+
+
 def sort_release_entries(entries):
     """Return release metadata ordered from newest to oldest.
 
@@ -481,11 +2237,19 @@ def sort_release_entries(entries):
     )
 
 
+def release_entries_sorted(entries):
+    return all(
+        (entries[i].get("published_at") or "")
+        >= (entries[i + 1].get("published_at") or "")
+        for i in range(len(entries) - 1)
+    )
+
+
 def normalize_release_metadata(asset):
     changed = False
     for field in ("releases", "release_tags"):
         entries = asset.get(field)
-        if not isinstance(entries, list):
+        if not isinstance(entries, list) or release_entries_sorted(entries):
             continue
         sorted_entries = sort_release_entries(entries)
         if entries != sorted_entries:
@@ -526,27 +2290,44 @@ def classify_github_library_url(library_url, repo):
     return "custom"
 
 
-def latest_library_version(asset):
+def latest_library_entry(asset):
+    """Return (version, entry) for the newest release or tag of an asset.
+
+    Releases win over tags published at the same time. A single pass keeps
+    this linear instead of sorting every candidate.
+    """
     tag_prefix = asset.get("library_release_tag_prefix")
     if not isinstance(tag_prefix, str):
         tag_prefix = ""
 
-    candidates = []
+    latest = None
+    latest_published_at = None
     for field, version_field in (("releases", "tag"), ("release_tags", "version")):
         for entry in asset.get(field) or []:
             version = entry.get(version_field)
             if not version or (tag_prefix and not version.startswith(tag_prefix)):
                 continue
-            candidates.append(
-                {
-                    "version": version,
-                    "published_at": entry.get("published_at") or "",
-                }
-            )
+            published_at = entry.get("published_at") or ""
+            if latest is None or published_at > latest_published_at:
+                latest = (version, entry)
+                latest_published_at = published_at
+    return latest
+
+
+def latest_library_version(asset):
+    latest = latest_library_entry(asset)
+    return latest[0] if latest else None
 
-    if not candidates:
+
+def days_since(published_at, now=None):
+    try:
+        published = datetime.datetime.strptime(published_at, "%Y-%m-%dT%H:%M:%SZ")
+    except (TypeError, ValueError):
         return None
-    return sort_release_entries(candidates)[0]["version"]
+    published = published.replace(tzinfo=datetime.timezone.utc)
+    if now is None:
+        now = time.time()
+    return max(0, int((now - published.timestamp()) // 86400))
 
 
 def sync_library_url(asset, repo):
@@ -584,7 +2365,156 @@ def sync_library_url(asset, repo):
     return True
 
 
-def update_library_urls_from_release_metadata(asset_id=None):
+INCREMENTAL_RELEASES_PER_PAGE = 10
+RELEASE_HISTORY_DIR = "releases"
+RELEASE_SUMMARY_MESSAGE_LENGTH = 280
+
+
+def truncate_message(message, length):
+    if not isinstance(message, str) or length is None or len(message) <= length:
+        return message
+    return message[:length].rstrip() + "..."
+
+
+def latest_release_summary(asset, message_length=RELEASE_SUMMARY_MESSAGE_LENGTH):
+    """Return a compact summary of the newest release (or tag) of an asset."""
+    latest = latest_library_entry(asset)
+    if not latest:
+        return None
+
+    version, entry = latest
+    release = next(
+        (
+            release
+            for release in asset.get("releases") or []
+            if release.get("tag") == version
+        ),
+        None,
+    )
+    summary = {
+        "tag": version,
+        "zip": (release or {}).get("zip") or entry.get("zip") or "",
+        "published_at": entry.get("published_at") or "",
+    }
+    if release:
+        summary["message"] = truncate_message(
+            release.get("message") or "", message_length
+        )
+        if release.get("min_defold_version"):
+            summary["min_defold_version"] = release["min_defold_version"]
+    return summary
+
+
+def update_latest_release(asset, message_length=RELEASE_SUMMARY_MESSAGE_LENGTH):
+    """Bring the latest_release summary of an asset up to date.
+
+    The summary lets readers find the newest stable version, its zip URL,
+    publish date and minimum Defold version without sorting release arrays.
+    It only depends on the release metadata, never on the clock, so the asset
+    is not rewritten unless a release changes; readers compute the age of a
+    release from published_at. Returns True when the summary changed.
+    """
+    summary = latest_release_summary(asset, message_length)
+    if summary == asset.get("latest_release"):
+        return False
+    if summary is None:
+        asset.pop("latest_release", None)
+    else:
+        asset["latest_release"] = summary
+    return True
+
+
+def refresh_latest_release(filename, asset):
+    """Rewrite filename when its latest_release summary is out of date.
+
+    Split release history is read to compute the summary but is not moved
+    back into the asset. Returns True when the file was written.
+    """
+    merged = dict(asset)
+    load_release_history(merged)
+    if not update_latest_release(merged):
+        return False
+    if "latest_release" in merged:
+        asset["latest_release"] = merged["latest_release"]
+    else:
+        asset.pop("latest_release", None)
+    write_as_json(filename, asset)
+    return True
+
+
+def load_release_history(asset):
+    """Load split release history back into the asset.
+
+    Assets migrated with splitreleases keep releases and release_tags in the
+    file named by release_history. Returns True for such assets so callers can
+    store the history again with store_release_history after updating it.
+    """
+    history_file = asset.get("release_history")
+    if not history_file:
+        return False
+    history = read_as_json(history_file) if os.path.exists(history_file) else None
+    if not isinstance(history, dict):
+        history = {}
+    asset["releases"] = history.get("releases") or []
+    asset["release_tags"] = history.get("release_tags") or []
+    return True
+
+
+def store_release_history(
+    asset, asset_id, message_length=RELEASE_SUMMARY_MESSAGE_LENGTH
+):
+    """Move releases and release_tags to releases/<asset_id>.json.
+
+    The asset keeps a latest_release summary and a release_history pointer.
+    """
+    history_file = "%s/%s.json" % (RELEASE_HISTORY_DIR, asset_id)
+    update_latest_release(asset, message_length)
+    history = {
+        "releases": asset.pop("releases", None) or [],
+        "release_tags": asset.pop("release_tags", None) or [],
+    }
+    asset["release_history"] = history_file
+
+    os.makedirs(RELEASE_HISTORY_DIR, exist_ok=True)
+    if not os.path.exists(history_file):
+        open(history_file, "a", encoding="utf-8").close()
+    write_as_json(history_file, history)
+
+
+def split_release_history(asset_id=None, message_length=RELEASE_SUMMARY_MESSAGE_LENGTH):
+    if asset_id:
+        filename = os.path.join("assets", asset_id + ".json")
+        if not os.path.exists(filename):
+            print("Asset JSON not found: %s" % filename)
+            sys.exit(1)
+        files = [filename]
+    else:
+        files = find_files("assets", "*.json")
+
+    migrated = 0
+    for filename in sorted(files):
+        asset = read_as_json(filename)
+        if not asset:
+            print("...error reading %s" % filename)
+            continue
+        if not load_release_history(asset) and not (
+            asset.get("releases") or asset.get("release_tags")
+        ):
+            continue
+
+        normalize_release_metadata(asset)
+        store_release_history(
+            asset, os.path.basename(filename).replace(".json", ""), message_length
+        )
+        write_as_json(filename, asset)
+        migrated += 1
+
+    print("Stored release history for %d asset(s)" % migrated)
+
+
+def update_library_urls_from_release_metadata(
+    asset_id=None, message_length=RELEASE_SUMMARY_MESSAGE_LENGTH
+):
     if asset_id:
         filename = os.path.join("assets", asset_id + ".json")
         if not os.path.exists(filename):
@@ -602,26 +2532,179 @@ def update_library_urls_from_release_metadata(asset_id=None):
             continue
 
         repo = github_repo_from_url(asset.get("project_url", ""))
-        if not repo:
-            continue
+        split_history = load_release_history(asset)
         metadata_updated = normalize_release_metadata(asset)
-        library_url_updated = sync_library_url(asset, repo)
-        if metadata_updated or library_url_updated:
+        library_url_updated = bool(repo) and sync_library_url(asset, repo)
+        summary_updated = update_latest_release(asset, message_length)
+        if metadata_updated or library_url_updated or summary_updated:
             if metadata_updated:
                 print("Sorted release metadata for %s" % filename)
             if library_url_updated:
                 print("Updated library URL for %s" % filename)
+            if summary_updated:
+                print("Updated latest release summary for %s" % filename)
+            if split_history:
+                store_release_history(
+                    asset,
+                    os.path.basename(filename).replace(".json", ""),
+                    message_length,
+                )
             write_as_json(filename, asset)
             updated += 1
 
     print("Updated %d asset metadata file(s)" % updated)
 
 
-def commit_changes(githubtoken):
+SIGNIFICANT_STAR_DELTA = 5
+SIGNIFICANT_STAR_RATIO = 0.05
+
+
+def git_changed_files():
+    """Return the paths with uncommitted changes, including untracked files."""
+    with phase("git"):
+        output = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=all", "-z"],
+            capture_output=True,
+            text=True,
+        ).stdout
+    paths = []
+    entries = output.split("\0")
+    while entries:
+        entry = entries.pop(0)
+        if not entry:
+            continue
+        paths.append(entry[3:])
+        if entry[0] in "RC":
+            # Renames and copies are followed by the original path.
+            entries.pop(0)
+    return paths
+
+
+def git_committed_json(path):
+    """Return the JSON of path at HEAD, or None if it is not committed."""
+    with phase("git"):
+        result = subprocess.run(
+            ["git", "show", "HEAD:%s" % path], capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return None
+
+
+def significant_asset_changes(
+    old, new, star_delta=SIGNIFICANT_STAR_DELTA, star_ratio=SIGNIFICANT_STAR_RATIO
+):
+    """Return the significant differences between two versions of an asset.
+
+    A star count change is significant once it differs from the committed
+    value by at least star_delta and by at least star_ratio of that value.
+    Because the comparison is against the last commit rather than the last
+    run, small ticks accumulate until they cross the threshold and the
+    baseline only moves when they are committed. An empty list means the
+    change is cosmetic only.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return ["added" if isinstance(new, dict) else "removed"]
+
+    changes = []
+    for field in sorted(set(old) | set(new)):
+        before = old.get(field)
+        after = new.get(field)
+        if before == after:
+            continue
+        if field == "stars" and isinstance(before, int) and isinstance(after, int):
+            delta = abs(after - before)
+            if delta >= max(star_delta, star_ratio * before):
+                changes.append("stars %+d" % (after - before))
+        elif (
+            field == "latest_release"
+            and isinstance(before, dict)
+            and isinstance(after, dict)
+        ):
+            for key in sorted(set(before) | set(after)):
+                if before.get(key) != after.get(key):
+                    changes.append("latest_release.%s" % key)
+        else:
+            changes.append(field)
+    return changes
+
+
+def classify_changes(
+    star_delta=SIGNIFICANT_STAR_DELTA, star_ratio=SIGNIFICANT_STAR_RATIO
+):
+    """Split the uncommitted changes into significant and cosmetic ones.
+
+    Returns (significant, cosmetic): a map of path to significant differences
+    and a list of paths with cosmetic changes only. Files generated from the
+    assets (header.json, the search index and the change feed) and run state
+    such as checkpoint.json and tombstones.json are not classified.
+    """
+    generated = set(
+        [
+            "header.json",
+            SEARCH_INDEX_FILE,
+            CHANGE_FEED_FILE,
+            CHANGE_FEED_STATE_FILE,
+            CHECKPOINT_FILE,
+            SHARD_REPORT_FILE,
+            TOMBSTONES_FILE,
+        ]
+    )
+    significant = {}
+    cosmetic = []
+    for path in git_changed_files():
+        if path in generated:
+            continue
+        if not path.endswith(".json") or not path.startswith("assets/"):
+            significant[path] = ["changed"]
+            continue
+        new = read_as_json(path) if os.path.exists(path) else None
+        changes = significant_asset_changes(
+            git_committed_json(path), new, star_delta, star_ratio
+        )
+        if changes:
+            significant[path] = changes
+        else:
+            cosmetic.append(path)
+    return significant, cosmetic
+
+
+def report_significance(
+    star_delta=SIGNIFICANT_STAR_DELTA, star_ratio=SIGNIFICANT_STAR_RATIO
+):
+    """Print the change classification and return whether it is significant.
+
+    In GitHub Actions the result is also written to $GITHUB_OUTPUT as
+    significant=true or significant=false.
+    """
+    print("Classifying changes")
+    significant, cosmetic = classify_changes(star_delta, star_ratio)
+    for path, changes in sorted(significant.items()):
+        print("...significant: %s (%s)" % (path, ", ".join(changes)))
+    if cosmetic:
+        print("...%d file(s) with cosmetic changes only" % len(cosmetic))
+    if not significant:
+        print("...no significant changes")
+    if os.environ.get("GITHUB_OUTPUT"):
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+            f.write("significant=%s\n" % ("true" if significant else "false"))
+    return bool(significant)
+
+
+def commit_changes(
+    githubtoken, star_delta=SIGNIFICANT_STAR_DELTA, star_ratio=SIGNIFICANT_STAR_RATIO
+):
     if githubtoken is None:
         print("You must specific a GitHub token")
         sys.exit(1)
 
+    if not report_significance(star_delta, star_ratio):
+        print("Only cosmetic changes; skipping commit")
+        return
+
     print("Committing changes")
     call("git config --global user.name 'services@defold.se'")
     call("git config --global user.email 'services@defold.se'")
@@ -631,35 +2714,205 @@ def commit_changes(githubtoken):
     call("git diff-index --quiet HEAD || git commit -m 'Site changes [skip-ci]'")
     call(
         "git push 'https://%s@github.com/defold/asset-portal.git' HEAD:master"
-        % (githubtoken)
+        % (github_tokens(githubtoken)[0])
+    )
+
+
+def build_parser():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "commands",
+        nargs="+",
+        help=(
+            "Commands (starcount, releases, event, canonicalize, libraryurls, header, "
+            "dates, sanitize, splitreleases, library, validate, watch, searchindex, "
+            "changefeed, serve, merge, schema, gc-images, duplicateimages, "
+            "derivatives, significance, tombstones, commit, help)"
+        ),
+    )
+    parser.add_argument(
+        "--githubtoken",
+        dest="githubtoken",
+        help="Authentication token for GitHub API and git push. Separate several "
+        "tokens with commas to spread API requests over their rate limits; the "
+        "first one is used to push",
+    )
+    parser.add_argument(
+        "--githubappid",
+        dest="githubappid",
+        help="GitHub App id; adds installation tokens of the app to the token pool",
+    )
+    parser.add_argument(
+        "--githubappkey",
+        dest="githubappkey",
+        help="Private key (PEM file) of the --githubappid GitHub App",
+    )
+    parser.add_argument(
+        "--githubappinstallations",
+        dest="githubappinstallations",
+        help="Comma separated installation ids of the GitHub App (default: all)",
+    )
+    parser.add_argument(
+        "--asset",
+        dest="asset",
+        help="Asset id (JSON file name without .json) to limit asset-specific updates",
+    )
+    parser.add_argument(
+        "--limit",
+        dest="limit",
+        type=int,
+        help="Limit number of releases to fetch (default depends on command)",
+    )
+    parser.add_argument(
+        "--messagelength",
+        dest="messagelength",
+        type=int,
+        default=RELEASE_SUMMARY_MESSAGE_LENGTH,
+        help="Truncate the latest_release message of assets to N characters",
+    )
+    parser.add_argument(
+        "--resume",
+        dest="resume",
+        action="store_true",
+        help="Continue an interrupted starcount or releases run from checkpoint.json",
+    )
+    parser.add_argument(
+        "--time-budget",
+        dest="timebudget",
+        type=float,
+        help="Stop starcount or releases before this many seconds have passed",
+    )
+    parser.add_argument(
+        "--request-budget",
+        dest="requestbudget",
+        type=int,
+        help="Stop starcount or releases before this many GitHub requests",
+    )
+    parser.add_argument(
+        "--event",
+        dest="event",
+        help="GitHub event payload file for the event command (default: stdin)",
+    )
+    parser.add_argument(
+        "--shard",
+        dest="shard",
+        type=parse_shard,
+        help="Only process shard i of n (for example 2/4) in starcount, releases "
+        "and library",
     )
+    parser.add_argument(
+        "--shards",
+        dest="shards",
+        default="shards",
+        help="Directory with one subdirectory per shard output for merge",
+    )
+    parser.add_argument(
+        "--stardelta",
+        dest="stardelta",
+        type=int,
+        default=SIGNIFICANT_STAR_DELTA,
+        help="Smallest star count change worth a commit (default %d)"
+        % SIGNIFICANT_STAR_DELTA,
+    )
+    parser.add_argument(
+        "--starratio",
+        dest="starratio",
+        type=float,
+        default=SIGNIFICANT_STAR_RATIO,
+        help="Smallest star count change worth a commit, relative to the committed "
+        "count (default %.2f)" % SIGNIFICANT_STAR_RATIO,
+    )
+    parser.add_argument(
+        "--deaddays",
+        dest="deaddays",
+        type=int,
+        default=30,
+        help="Report repositories failing for at least N days (default 30)",
+    )
+    parser.add_argument(
+        "--check",
+        dest="check",
+        action="store_true",
+        help=(
+            "sanitize, schema: only report files that need rewriting and exit "
+            "non-zero if any"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help=(
+            "Number of worker processes for sanitize, duplicateimages and "
+            "derivatives (default: CPU count)"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        action="store_true",
+        help="Profile each command and write reports to --profiledir",
+    )
+    parser.add_argument(
+        "--profiledir",
+        dest="profiledir",
+        default="profile",
+        help="Directory for --profile reports (default profile)",
+    )
+    parser.add_argument(
+        "--port",
+        dest="port",
+        type=int,
+        default=8000,
+        help="Port for the serve command (default 8000)",
+    )
+    parser.add_argument(
+        "--releasemessages",
+        dest="releasemessages",
+        action="store_true",
+        help="Include release messages in the search index",
+    )
+    parser.add_argument(
+        "--rebuild",
+        dest="rebuild",
+        action="store_true",
+        help="watch: also update release summaries and existing generated files",
+    )
+    parser.add_argument(
+        "--dryrun",
+        dest="dryrun",
+        action="store_true",
+        help="gc-images: only list the images that would be deleted",
+    )
+    parser.add_argument(
+        "--keepheroes",
+        dest="keepheroes",
+        action="store_true",
+        help="gc-images: keep legacy images.hero files and fields",
+    )
+    parser.add_argument(
+        "--hash",
+        dest="hashalgorithm",
+        choices=IMAGE_HASH_ALGORITHMS,
+        default="dhash",
+        help="duplicateimages: perceptual hash to compare images with (default dhash)",
+    )
+    parser.add_argument(
+        "--distance",
+        dest="distance",
+        type=int,
+        default=1,
+        help="duplicateimages: largest Hamming distance between duplicates (default 1)",
+    )
+    parser.add_argument(
+        "--dedupe",
+        dest="dedupe",
+        action="store_true",
+        help="duplicateimages: point references to each cluster at a single file",
+    )
+    return parser
 
 
-parser = ArgumentParser()
-parser.add_argument(
-    "commands",
-    nargs="+",
-    help=(
-        "Commands (starcount, releases, libraryurls, header, dates, sanitize, "
-        "library, validate, commit, help)"
-    ),
-)
-parser.add_argument(
-    "--githubtoken", dest="githubtoken", help="Authentication token for GitHub API and "
-)
-parser.add_argument(
-    "--asset",
-    dest="asset",
-    help="Asset id (JSON file name without .json) to limit asset-specific updates",
-)
-parser.add_argument(
-    "--limit",
-    dest="limit",
-    type=int,
-    help="Limit number of releases to fetch (default depends on command)",
-)
-args = parser.parse_args()
-
 help = """
 COMMANDS:
 starcount = Add GitHub star count to all assets that have a GitHub project (requires --githubtoken)
@@ -667,25 +2920,130 @@ releases = Update releases array (zip, tag, message[, min_defold_version, publis
            and release_tags (version, published_at, zip). Use --asset=<id> to limit to
            one asset. It also advances eligible library_url values to the latest release.
            Use --limit=N to cap result (default 50; set 1 for only the latest).
+           starcount and releases record progress in checkpoint.json and refresh the
+           least recently fetched assets first; --resume skips the assets an
+           interrupted run already refreshed. With --time-budget=SECONDS and/or
+           --request-budget=N they refresh the assets that are most stale, most
+           starred and most recently released first, and stop cleanly before the
+           budget runs out.
+           starcount, releases and library accept --shard=i/n to process only the
+           assets of shard i of n; assets are partitioned by GitHub repository.
+event = Refresh releases, tags and library_url of only the assets whose project_url
+        is the repository of a GitHub release, tag push or tag create event payload
+        read from --event=<file> or stdin (requires --githubtoken). Other events
+        are ignored.
+tombstones = List assets whose GitHub repository has been missing, gone or archived
+             for --deaddays=N days or more (default 30). starcount,
+             releases and library record these failures in tombstones.json and skip
+             the repository with exponential backoff (6 hours, doubling up to 30 days).
+canonicalize = Rewrite project_url, and library_url values recognized as branch, tag or
+               release archives, of assets whose repository was renamed or moved to
+               the canonical owner/name recorded in redirects.json. GitHub commands
+               record these redirects and already call the canonical repository.
 libraryurls = Update eligible library_url values from existing release metadata. Use
-              --asset=<id> to limit to one asset.
+              --asset=<id> to limit to one asset. Also refreshes the latest_release
+              summary (tag, zip, published_at, message, min_defold_version).
+splitreleases = Move releases and release_tags to releases/<id>.json, keeping a compact
+                latest_release summary and a release_history pointer in the asset JSON.
+                Use --asset=<id> to limit to one asset and --messagelength=N to truncate
+                the summary message (default 280). releases and libraryurls keep
+                split assets split.
 header = Update or initialize header.json with timestamps for changed asset JSON files (or initialize all if missing)
 dates = Add creation date to all assets
-sanitize = Re-save all asset JSON using UTF-8 (no surrogate escapes) to avoid YAML parser issues
-library = Determine if assets are Defold libraries (adds isDefoldLibrary flag; requires --githubtoken)
-validate = Validate asset metadata that is not derived from external APIs
-commit = Commit changed files (requires --githubtoken)
+sanitize = Re-save all asset JSON using UTF-8 (no surrogate escapes) to avoid YAML parser issues.
+           Only files (assets/ and releases/) that differ from the canonical layout
+           with or without a single trailing newline are rewritten, in parallel for
+           large catalogs (--jobs=N). With --check nothing is written;
+           non-canonical files are listed and the exit code is 1.
+library = Determine if assets are Defold libraries (adds isDefoldLibrary flag; requires
+          --githubtoken). GitHub assets are re-checked whenever their default
+          branch head moves (recorded in checkpoint.json, not in the asset).
+          Assets with "library_detection_auto_update": false keep their
+          isDefoldLibrary.
+validate = Validate asset metadata that is not derived from external APIs, including
+           the structure described by schema/asset.schema.json. Also checks the
+           catalog as a whole: duplicate ids and asset filenames differing only in
+           case fail; mismatched ids, shared project_url values, shared images and
+           unreferenced files in assets/images are warnings.
+schema = Regenerate schema/asset_validator.py, the compiled validator for
+         schema/asset.schema.json used by validate and the site builder. With --check
+         nothing is written and the exit code is 1 when the module is out of date.
+gc-images = Delete files in assets/images that no asset references and legacy hero
+            images that are not also a thumbnail (dropping their images.hero
+            fields). Use --dryrun to only list them and --keepheroes to keep heroes.
+duplicateimages = Report clusters of near-identical images in assets/images, using a
+                  64 bit perceptual hash (--hash=dhash or phash; requires Pillow,
+                  and numpy for phash) and --distance=N differing bits (default 1).
+                  Hashes are cached in image-hashes.json by file content and
+                  computed in parallel (--jobs=N). --dedupe points the asset
+                  references to each cluster at a single file, skipping images
+                  whose pixels differ from it (e.g. templated art).
+derivatives = Write 300, 600 and 900 pixel wide AVIF and WebP variants of every local
+              thumbnail with content hashed filenames to derivatives/, and
+              derivatives/manifest.json with the srcset of each asset (requires
+              Pillow). Only thumbnails whose SHA-256 changed are processed again,
+              in parallel (--jobs=N); variants no longer needed are deleted. CI
+              uploads derivatives/ as the image-derivatives artifact on every push
+              to master.
+watch = Keep validating while editing: revalidate only the assets whose JSON changed,
+        or whose local thumbnail was added or removed in assets/images. Nothing is
+        written unless --rebuild is given; then changed assets also get their
+        latest_release summary updated, and header.json, search-index.json and
+        the change feed are refreshed when they exist (for local site previews,
+        not PRs).
+searchindex = Build search-index.json, an inverted index of asset names, descriptions
+              and tags for the site search box. Only assets whose header.json timestamp
+              changed are re-read. Use --releasemessages to also index release notes.
+changefeed = Append the asset ids added, modified (with changed fields) or removed since
+             the previous run to changefeed.jsonl. Run after header.
+serve = Serve the catalog read-only from memory on http://127.0.0.1:<--port>:
+        /assets (filters: tag, platform, author, library, q; sort: id, name, stars,
+        timestamp; page, per_page), /assets/<id> and /search?q=<text>. Changed asset
+        files are reloaded automatically.
+merge = Merge the outputs of sharded runs (one subdirectory per shard in --shards,
+        default shards/) into assets/ and releases/, and combine their
+        shard-report.json and profile reports. Fails without merging anything
+        when a shard is missing. Run before header and commit.
+significance = Classify uncommitted asset changes as significant (new releases, changed
+               library_url, any other field) or cosmetic (star count changes
+               below --stardelta=N (default 5) or --starratio=R of the committed
+               count (default 0.05)). Writes significant=true|false to
+               $GITHUB_OUTPUT when set.
+commit = Commit changed files (requires --githubtoken). Runs with only cosmetic changes
+         are not committed.
 help = Show this help
+
+--githubtoken accepts several comma separated tokens; each GitHub request uses the
+token with the most X-RateLimit-Remaining headroom. --githubappid=ID with
+--githubappkey=KEY.pem (and optionally --githubappinstallations=ID,...) adds GitHub
+App installation tokens to the pool (requires PyJWT with cryptography).
+
+Add --profile to any command to write profile/<command>.txt (time per phase: load,
+fetch, transform, serialize, write, git, then functions by cumulative time),
+profile/<command>.prof (cProfile data) and profile/<command>.folded (sampled stacks
+for flamegraph.pl or speedscope). Use --profiledir=DIR to write them elsewhere.
 """
 
 
 def update_github_releases_and_tags(
-    githubtoken, asset_id=None, include_prerelease=False, per_page=100, release_limit=50
+    githubtoken,
+    asset_id=None,
+    include_prerelease=False,
+    per_page=100,
+    release_limit=50,
+    message_length=RELEASE_SUMMARY_MESSAGE_LENGTH,
+    resume=False,
+    time_budget=None,
+    request_budget=None,
+    shard=None,
 ):
     """Update GitHub releases/tags for all assets or a single asset.
 
     When asset_id is provided, only that asset JSON is processed.
-    Otherwise, all JSON files under assets/ are updated.
+    Otherwise, all JSON files under assets/ are updated and progress is
+    recorded in checkpoint.json (see start_checkpoint). With a time or
+    request budget, assets are refreshed in refresh_priority order until the
+    budget is spent.
     """
     if githubtoken is None:
         print("No GitHub token specified")
@@ -700,11 +3058,24 @@ def update_github_releases_and_tags(
         files = [filename]
         print("Update releases for asset %s" % asset_id)
     else:
-        files = find_files("assets", "*.json")
         print("Update releases for assets")
+        files = shard_files(find_files("assets", "*.json"), shard)
+        budget = start_refresh_budget(time_budget, request_budget)
+        checkpoint, pending = start_checkpoint(
+            "releases",
+            files,
+            resume,
+            prioritize=time_budget is not None or request_budget is not None,
+        )
+        visited = []
 
-    for filename in files:
+    for filename in files if asset_id else pending:
         if not asset_id:
+            if not refresh_budget_allows(budget):
+                print_budget_exhausted(visited, files)
+                break
+            visited.append(filename)
+            budget["assets"] += 1
             print("Getting latest release for %s" % filename)
 
         asset = read_as_json(filename)
@@ -716,8 +3087,14 @@ def update_github_releases_and_tags(
         repo = github_repo_from_url(project_url)
         if not repo:
             print("...not a GitHub repository!")
+            if not asset_id:
+                checkpoint_asset(checkpoint, "releases", filename)
+            continue
+        if not asset_id and repository_backed_off(repo):
+            checkpoint_asset(checkpoint, "releases", filename)
             continue
 
+        split_history = load_release_history(asset)
         normalize_release_metadata(asset)
 
         def pick_zip_url(rel):
@@ -789,25 +3166,36 @@ def update_github_releases_and_tags(
         previous_releases = asset.get("releases") or []
         prev_latest_tag = previous_releases[0].get("tag") if previous_releases else None
 
-        # Single request; process up to release_limit items
-        url = "https://api.github.com/repos/%s/releases?per_page=%d" % (repo, per_page)
-        response = github_request(url, githubtoken)
-        if not isinstance(response, list):
+        # Stream releases, newest first, and stop reading at the newest release
+        # we already have or at release_limit. Incremental runs usually find
+        # it within the first few items, so they ask for a small first page.
+        api_repo = canonical_github_repo(repo)
+        url = "https://api.github.com/repos/%s/releases?per_page=%d" % (
+            api_repo,
+            (
+                min(per_page, INCREMENTAL_RELEASES_PER_PAGE)
+                if prev_latest_tag
+                else per_page
+            ),
+        )
+        collected_rels = []
+        try:
+            with contextlib.closing(github_stream_list(url, githubtoken)) as releases:
+                for rel in releases:
+                    if not isinstance(rel, dict) or rel.get("draft"):
+                        continue
+                    if not include_prerelease and rel.get("prerelease"):
+                        continue
+                    collected_rels.append(rel)
+                    if prev_latest_tag and rel.get("tag_name") == prev_latest_tag:
+                        break
+                    if len(collected_rels) >= release_limit:
+                        break
+        except Exception as err:
+            print("github_stream_list", err)
             print("...no releases or unexpected response")
             continue
 
-        collected_rels = []
-        for rel in response:
-            if rel.get("draft"):
-                continue
-            if not include_prerelease and rel.get("prerelease"):
-                continue
-            collected_rels.append(rel)
-            if prev_latest_tag and rel.get("tag_name") == prev_latest_tag:
-                break
-            if len(collected_rels) >= release_limit:
-                break
-
         # Map collected to output format
         new_items = []
         for rel in collected_rels:
@@ -872,8 +3260,20 @@ def update_github_releases_and_tags(
         # Fetch tags to cover repositories without releases or to supplement releases
         tags_entries = []
         commit_cache = {}
-        tags_url = "https://api.github.com/repos/%s/tags?per_page=%d" % (repo, per_page)
-        tags_response = github_request(tags_url, githubtoken)
+        tags_url = "https://api.github.com/repos/%s/tags?per_page=%d" % (
+            api_repo,
+            per_page,
+        )
+        try:
+            # Tags are not ordered by date, so the whole first page is read
+            # (streamed), as before.
+            with contextlib.closing(
+                github_stream_list(tags_url, githubtoken, follow_pages=False)
+            ) as tags:
+                tags_response = [tag for tag in tags if isinstance(tag, dict)]
+        except Exception as err:
+            print("github_stream_list", err)
+            tags_response = None
         if isinstance(tags_response, list):
             for tag in tags_response:
                 version = tag.get("name") or ""
@@ -922,17 +3322,148 @@ def update_github_releases_and_tags(
         normalize_release_metadata(asset)
         if sync_library_url(asset, repo):
             print("...updated library URL")
+        update_latest_release(asset, message_length)
 
+        if split_history:
+            store_release_history(
+                asset, os.path.basename(filename).replace(".json", ""), message_length
+            )
         write_as_json(filename, asset)
+        if not asset_id:
+            checkpoint_asset(checkpoint, "releases", filename)
+
+    if not asset_id:
+        finish_checkpoint(checkpoint, "releases", visited)
+
+
+def github_repository_index(files):
+    """Map lowercased GitHub owner/name to the asset files that use it.
+
+    Assets of a moved repository are indexed under its canonical name too.
+    """
+    index = {}
+    for filename in files:
+        asset = read_as_json(filename)
+        repo = github_repo_from_url((asset or {}).get("project_url", ""))
+        if repo:
+            index.setdefault(repo.lower(), []).append(filename)
+            canonical = canonical_github_repo(repo).lower()
+            if canonical != repo.lower():
+                index.setdefault(canonical, []).append(filename)
+    return index
+
+
+def github_event_repository(payload):
+    """Return (owner/name, description) for events that may change releases.
+
+    Release events, tag pushes and tag creation return the repository;
+    anything else (branch pushes, other ref types) returns (None, reason).
+    A repository_dispatch wrapper is unwrapped from client_payload.
+    """
+    if isinstance(payload, dict) and isinstance(payload.get("client_payload"), dict):
+        payload = payload["client_payload"]
+    if not isinstance(payload, dict):
+        return None, "payload is not a JSON object"
+    repo = (payload.get("repository") or {}).get("full_name")
+    if not repo:
+        return None, "payload has no repository.full_name"
+
+    if isinstance(payload.get("release"), dict):
+        return repo, "release %s (%s)" % (
+            payload["release"].get("tag_name"),
+            payload.get("action"),
+        )
+    if "ref_type" in payload:
+        if payload.get("ref_type") == "tag":
+            return repo, "tag %s created" % payload.get("ref")
+        return None, "created %s is not a tag" % payload.get("ref_type")
+    ref = payload.get("ref") or ""
+    if ref.startswith("refs/tags/"):
+        return repo, "tag %s pushed" % ref[len("refs/tags/") :]
+    return None, "push to %s does not change releases" % (ref or "unknown ref")
+
+
+def refresh_assets_from_event(
+    githubtoken,
+    event_file=None,
+    release_limit=50,
+    message_length=RELEASE_SUMMARY_MESSAGE_LENGTH,
+):
+    """Refresh releases, tags and library_url of the assets of one event's repository.
+
+    event_file is a GitHub release, push or create event payload; stdin is
+    read when it is None or "-".
+    """
+    if githubtoken is None:
+        print("No GitHub token specified")
+        sys.exit(1)
+
+    try:
+        if event_file in (None, "-"):
+            payload = json.load(sys.stdin)
+        else:
+            with open(event_file, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+    except (OSError, ValueError) as err:
+        print("Could not read event payload: %s" % err)
+        sys.exit(1)
+
+    repo, description = github_event_repository(payload)
+    if not repo:
+        print("Ignoring event: %s" % description)
+        return
+    print("Event for %s: %s" % (repo, description))
+
+    files = github_repository_index(find_files("assets", "*.json")).get(
+        repo.lower(), []
+    )
+    if not files:
+        print("...no assets use %s" % repo)
+        return
+    for filename in sorted(files):
+        update_github_releases_and_tags(
+            githubtoken,
+            asset_id=os.path.basename(filename).replace(".json", ""),
+            release_limit=release_limit,
+            message_length=message_length,
+        )
+
+
+def fetch_default_branch_head(repo, githubtoken):
+    """Return the commit SHA at the head of the default branch of repo.
+
+    Asks for the bare SHA media type, so the response is 40 bytes rather
+    than a commit object. Returns "" for an empty repository and None when
+    the lookup failed. Only a missing or unavailable repository is recorded
+    in the tombstones; rate limits, server errors and timeouts are retried
+    on the next run.
+    """
+    canonical = canonical_github_repo(repo)
+    url = "https://api.github.com/repos/%s/commits/HEAD" % canonical
+    try:
+        response = github_get(url, githubtoken, accept="application/vnd.github.sha")
+        if response.status_code == 409:
+            return ""
+        if response.status_code in TOMBSTONE_STATUSES:
+            record_repository_failure(
+                canonical, TOMBSTONE_STATUSES[response.status_code]
+            )
+            return None
+        response.raise_for_status()
+        return response.text.strip()
+    except Exception as err:
+        print("fetch_default_branch_head", err)
+        return None
 
 
-def fetch_game_project_content(repo, githubtoken):
-    url = "https://api.github.com/repos/%s/contents/game.project" % repo
-    headers = {}
-    if githubtoken:
-        headers["Authorization"] = "token %s" % githubtoken
+def fetch_game_project_content(repo, githubtoken, ref=None):
+    url = "https://api.github.com/repos/%s/contents/game.project" % (
+        canonical_github_repo(repo)
+    )
+    if ref:
+        url += "?ref=%s" % ref
     try:
-        response = requests.get(url, headers=headers)
+        response = github_get(url, githubtoken)
         if response.status_code == 404:
             return False, None
         response.raise_for_status()
@@ -976,7 +3507,18 @@ def parse_is_defold_library(game_project_text):
     return False
 
 
-def update_is_defold_library_flags(githubtoken, asset_id=None):
+def update_is_defold_library_flags(githubtoken, asset_id=None, shard=None):
+    """Detect isDefoldLibrary from game.project, re-checking when a repo changes.
+
+    The default-branch head each repository was inspected at is run state,
+    kept under "library" in checkpoint.json rather than in the asset, so a
+    moved head alone never changes a committed file. Every run looks up the
+    current head (one small request per repository) and only fetches
+    game.project again when the head moved; assets are only written when
+    isDefoldLibrary changes. Other assets are flagged as not being libraries
+    once. Assets with library_detection_auto_update set to false are curated
+    by hand and left alone.
+    """
     if githubtoken is None:
         print("No GitHub token specified")
         sys.exit(1)
@@ -989,48 +3531,86 @@ def update_is_defold_library_flags(githubtoken, asset_id=None):
         files = [filename]
         print("Checking Defold library flag for asset %s" % asset_id)
     else:
-        files = find_files("assets", "*.json")
         print("Checking Defold library flags for assets")
+        files = shard_files(find_files("assets", "*.json"), shard)
 
+    previous = (load_checkpoint().get("library") or {}).get("heads") or {}
+    # Only repositories of this run's assets are kept, unless one asset is checked.
+    recorded = dict(previous) if asset_id else {}
+    heads = {}
+    inspections = {}
     for filename in files:
         asset = read_as_json(filename)
         if not asset:
             print("...error reading %s" % filename)
             continue
 
-        if "isDefoldLibrary" in asset:
+        project_url = asset.get("project_url", "")
+        repo = github_repo_from_url(project_url)
+        if not repo:
+            if "isDefoldLibrary" not in asset:
+                print("%s is not a GitHub project -> not a Defold library" % filename)
+                asset["isDefoldLibrary"] = False
+                write_as_json(filename, asset)
+            continue
+
+        if asset.get("library_detection_auto_update") is False:
             print(
-                "%s already has isDefoldLibrary flag (%s)"
+                "%s sets isDefoldLibrary %s manually; skipping"
                 % (filename, asset.get("isDefoldLibrary"))
             )
             continue
 
-        project_url = asset.get("project_url", "")
-        repo = github_repo_from_url(project_url)
-        if not repo:
-            print("%s is not a GitHub project -> not a Defold library" % filename)
-            asset["isDefoldLibrary"] = False
-            write_as_json(filename, asset)
+        key = canonical_github_repo(repo).lower()
+        if key in previous:
+            recorded.setdefault(key, previous[key])
+        if not asset_id and repository_backed_off(repo):
+            continue
+
+        if key not in heads:
+            heads[key] = fetch_default_branch_head(repo, githubtoken)
+        head = heads[key]
+        if head is None:
+            print("...failed to look up the head of %s; skipping" % repo)
+            continue
+        if "isDefoldLibrary" in asset and previous.get(key) == head:
+            print(
+                "%s is unchanged at %s (isDefoldLibrary %s)"
+                % (filename, head[:7] or "empty", asset.get("isDefoldLibrary"))
+            )
             continue
 
-        exists, content = fetch_game_project_content(repo, githubtoken)
+        if key not in inspections:
+            if head:
+                inspections[key] = fetch_game_project_content(
+                    repo, githubtoken, ref=head
+                )
+            else:
+                inspections[key] = (False, None)
+        exists, content = inspections[key]
         if exists is None:
             print("...failed to inspect repository %s; skipping" % repo)
             continue
+        recorded[key] = head
+
+        is_library = bool(exists) and parse_is_defold_library(content)
         if not exists:
             print("...no game.project found in %s" % repo)
-            asset["isDefoldLibrary"] = False
-            write_as_json(filename, asset)
-            continue
-
-        is_library = parse_is_defold_library(content)
-        asset["isDefoldLibrary"] = is_library
-        if is_library:
+        elif is_library:
             print("...%s is a Defold library" % repo)
         else:
             print("...%s is not a Defold library" % repo)
+        if asset.get("isDefoldLibrary") == is_library:
+            continue
+        if "isDefoldLibrary" in asset:
+            print("...isDefoldLibrary changed to %s at %s" % (is_library, head[:7]))
+        asset["isDefoldLibrary"] = is_library
         write_as_json(filename, asset)
 
+    checkpoint = load_checkpoint()
+    checkpoint["library"] = {"heads": recorded}
+    write_checkpoint(checkpoint)
+
 
 def update_header_json():
     header_file = "header.json"
@@ -1094,31 +3674,1005 @@ def update_header_json():
     write_as_json(header_file, header_map)
 
 
-for command in args.commands:
+SEARCH_INDEX_FILE = "search-index.json"
+SEARCH_INDEX_VERSION = 1
+SEARCH_FIELD_WEIGHTS = {"name": 4, "tags": 3, "description": 2, "releases": 1}
+SEARCH_PREFIX_LENGTH = 3
+SEARCH_STOP_WORDS = set(
+    ["a", "an", "and", "as", "at", "by", "for", "in", "is", "it", "of", "on", "or"]
+    + ["the", "to", "with"]
+)
+SEARCH_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def search_tokens(text):
+    """Return normalized search terms for a piece of asset text.
+
+    Text is lowercased and accents are stripped so that "Décor" and "decor"
+    share a term. Single characters and common English stop words are dropped.
+    """
+    if not isinstance(text, str):
+        return []
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [
+        token
+        for token in SEARCH_TOKEN_RE.findall(text)
+        if len(token) > 1 and token not in SEARCH_STOP_WORDS
+    ]
+
+
+def search_terms_for_asset(asset, include_releases=False):
+    """Return a {term: weighted term frequency} map for one asset."""
+    fields = {
+        "name": asset.get("name"),
+        "description": asset.get("description"),
+        "tags": " ".join(
+            tag for tag in asset.get("tags") or [] if isinstance(tag, str)
+        ),
+    }
+    if include_releases:
+        fields["releases"] = " ".join(
+            release.get("message") or ""
+            for release in asset.get("releases") or []
+            if isinstance(release, dict)
+        )
+
+    terms = {}
+    for field, text in fields.items():
+        weight = SEARCH_FIELD_WEIGHTS[field]
+        for token in search_tokens(text):
+            terms[token] = terms.get(token, 0) + weight
+    return terms
+
+
+def read_header_map():
+    if not os.path.exists("header.json"):
+        return {}
+    header_map = read_as_json("header.json")
+    return header_map if isinstance(header_map, dict) else {}
+
+
+def read_search_index_documents(index, include_releases):
+    """Recover per-asset term maps from a previously written search index.
+
+    Returns {asset_id: (header timestamp, {term: tf})}, or an empty map when the
+    index is missing or was built with different options.
+    """
+    if not isinstance(index, dict):
+        return {}
+    if index.get("version") != SEARCH_INDEX_VERSION:
+        return {}
+    if index.get("releases", False) != include_releases:
+        return {}
+
+    asset_ids = index.get("assets") or []
+    timestamps = index.get("timestamps") or []
+    documents = {}
+    for position, asset_id in enumerate(asset_ids):
+        timestamp = timestamps[position] if position < len(timestamps) else None
+        documents[asset_id] = (timestamp, {})
+    for term, postings in (index.get("terms") or {}).items():
+        for position in range(0, len(postings) - 1, 2):
+            asset_id = asset_ids[postings[position]]
+            documents[asset_id][1][term] = postings[position + 1]
+    return documents
+
+
+def build_search_index(include_releases=False):
+    """Write a compact inverted index of asset names, descriptions and tags.
+
+    The index maps each term to a flat [asset, tf, asset, tf, ...] posting list
+    where asset is a position in the "assets" array. "prefixes" maps the first
+    one to SEARCH_PREFIX_LENGTH characters of every term to the terms sharing
+    that prefix, so a search box can resolve partial input with a dictionary
+    lookup. Assets whose header.json timestamp matches the previous index are
+    reused without reading their JSON.
+    """
+    print("Building search index")
+    header_map = read_header_map()
+    previous = {}
+    if os.path.exists(SEARCH_INDEX_FILE):
+        previous = read_search_index_documents(
+            read_as_json(SEARCH_INDEX_FILE), include_releases
+        )
+
+    documents = {}
+    reindexed = 0
+    for filename in sorted(find_files("assets", "*.json")):
+        asset_id = os.path.basename(filename).replace(".json", "")
+        timestamp = header_map.get(os.path.basename(filename))
+        cached = previous.get(asset_id)
+        if cached and timestamp is not None and cached[0] == timestamp:
+            documents[asset_id] = cached
+            continue
+
+        asset = read_as_json(filename)
+        if not isinstance(asset, dict):
+            print("...error reading %s" % filename)
+            continue
+        if include_releases:
+            load_release_history(asset)
+        documents[asset_id] = (
+            timestamp,
+            search_terms_for_asset(asset, include_releases),
+        )
+        reindexed += 1
+
+    terms = write_search_index(documents, include_releases)
+    print(
+        "Indexed %d term(s) across %d asset(s); %d asset(s) re-read"
+        % (terms, len(documents), reindexed)
+    )
+
+
+def write_search_index(documents, include_releases):
+    """Write search-index.json from {asset_id: (timestamp, {term: tf})}.
+
+    Returns the number of distinct terms.
+    """
+    asset_ids = sorted(documents)
+    terms = {}
+    for position, asset_id in enumerate(asset_ids):
+        for term, frequency in sorted(documents[asset_id][1].items()):
+            terms.setdefault(term, []).extend([position, frequency])
+
+    prefixes = {}
+    for term in sorted(terms):
+        for length in range(1, min(len(term), SEARCH_PREFIX_LENGTH) + 1):
+            prefixes.setdefault(term[:length], []).append(term)
+
+    index = {
+        "version": SEARCH_INDEX_VERSION,
+        "releases": include_releases,
+        "assets": asset_ids,
+        "timestamps": [documents[asset_id][0] for asset_id in asset_ids],
+        "terms": terms,
+        "prefixes": prefixes,
+    }
+    with open(SEARCH_INDEX_FILE, "w", encoding="utf-8") as f:
+        # Compact separators keep the file small enough to load directly in
+        # the browser; this file is generated and never edited by hand.
+        json.dump(index, f, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return len(terms)
+
+
+CHANGE_FEED_FILE = "changefeed.jsonl"
+CHANGE_FEED_STATE_FILE = "changefeed-state.json"
+
+
+def json_digest(data):
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def update_change_feed():
+    """Append the assets added, modified or removed since the previous run.
+
+    changefeed-state.json records the header.json timestamp, a digest of the
+    whole asset and a digest per top-level field. Assets whose header timestamp
+    is unchanged are not re-read; re-read assets with an unchanged digest are
+    not reported. Each run with changes appends one JSON line to
+    changefeed.jsonl with an increasing sequence number, so a site builder can
+    regenerate only the pages listed after the last sequence it processed.
+    """
+    print("Updating change feed")
+    header_map = read_header_map()
+    state = {}
+    if os.path.exists(CHANGE_FEED_STATE_FILE):
+        state = read_as_json(CHANGE_FEED_STATE_FILE) or {}
+    previous_assets = state.get("assets") or {}
+
+    current_assets = {}
+    added = []
+    modified = {}
+    for filename in sorted(find_files("assets", "*.json")):
+        asset_id = os.path.basename(filename).replace(".json", "")
+        timestamp = header_map.get(os.path.basename(filename))
+        previous = previous_assets.get(asset_id)
+        if previous and timestamp is not None and previous["timestamp"] == timestamp:
+            current_assets[asset_id] = previous
+            continue
+
+        asset = read_as_json(filename)
+        if not isinstance(asset, dict):
+            print("...error reading %s" % filename)
+            if previous:
+                current_assets[asset_id] = previous
+            continue
+
+        entry = {"timestamp": timestamp, "digest": json_digest(asset)}
+        if previous and previous["digest"] == entry["digest"]:
+            entry["fields"] = previous["fields"]
+            current_assets[asset_id] = entry
+            continue
+
+        entry["fields"] = {
+            field: json_digest(value)[:16] for field, value in asset.items()
+        }
+        current_assets[asset_id] = entry
+        if not previous:
+            added.append(asset_id)
+            continue
+        old_fields = previous["fields"]
+        new_fields = entry["fields"]
+        modified[asset_id] = sorted(
+            field
+            for field in set(old_fields) | set(new_fields)
+            if old_fields.get(field) != new_fields.get(field)
+        )
+
+    removed = sorted(set(previous_assets) - set(current_assets))
+
+    sequence = state.get("sequence", 0)
+    if added or modified or removed:
+        sequence += 1
+        change = {
+            "sequence": sequence,
+            "time": int(time.time()),
+            "added": added,
+            "modified": modified,
+            "removed": removed,
+        }
+        with open(CHANGE_FEED_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(change, sort_keys=True, ensure_ascii=False) + "\n")
+        print(
+            "...sequence %d: %d added, %d modified, %d removed"
+            % (sequence, len(added), len(modified), len(removed))
+        )
+    else:
+        print("...no asset changes")
+
+    if not os.path.exists(CHANGE_FEED_STATE_FILE):
+        open(CHANGE_FEED_STATE_FILE, "a", encoding="utf-8").close()
+    write_as_json(
+        CHANGE_FEED_STATE_FILE, {"sequence": sequence, "assets": current_assets}
+    )
+
+
+CATALOG_SORT_KEYS = {
+    "id": (lambda asset: asset.get("id") or "", False),
+    "name": (lambda asset: (asset.get("name") or "").lower(), False),
+    "stars": (lambda asset: asset.get("stars") or 0, True),
+    "timestamp": (lambda asset: asset.get("timestamp") or 0, True),
+}
+CATALOG_DEFAULT_PAGE_SIZE = 50
+CATALOG_MAX_PAGE_SIZE = 500
+CATALOG_RESPONSE_CACHE_SIZE = 4096
+CATALOG_GZIP_MIN_SIZE = 512
+
+
+def catalog_file_stats():
+    stats = {}
+    for filename in find_files("assets", "*.json"):
+        try:
+            stat_result = os.stat(filename)
+        except OSError:
+            continue
+        stats[filename] = (stat_result.st_mtime_ns, stat_result.st_size)
+    return stats
+
+
+def build_catalog(assets, stats):
+    """Return an immutable in-memory catalog with lookup indexes.
+
+    assets maps asset id to asset JSON. Filters are resolved through the
+    indexes and the pre-sorted id lists, so a request never scans or sorts
+    the whole catalog.
+    """
+    catalog = {
+        "assets": assets,
+        "stats": stats,
+        "tags": {},
+        "platforms": {},
+        "authors": {},
+        "library": {True: set(), False: set()},
+        "terms": {},
+        "prefixes": {},
+        "sorted": {},
+        "responses": OrderedDict(),
+        "responses_lock": threading.Lock(),
+    }
+    for asset_id, asset in assets.items():
+        for tag in asset.get("tags") or []:
+            if isinstance(tag, str):
+                catalog["tags"].setdefault(tag.lower(), set()).add(asset_id)
+        for platform in asset.get("platforms") or []:
+            if isinstance(platform, str):
+                catalog["platforms"].setdefault(platform.lower(), set()).add(asset_id)
+        author_id = asset.get("author_id")
+        if isinstance(author_id, str):
+            catalog["authors"].setdefault(author_id, set()).add(asset_id)
+        catalog["library"][asset.get("isDefoldLibrary") is True].add(asset_id)
+        for term, frequency in search_terms_for_asset(asset).items():
+            catalog["terms"].setdefault(term, {})[asset_id] = frequency
+
+    for term in catalog["terms"]:
+        for length in range(1, min(len(term), SEARCH_PREFIX_LENGTH) + 1):
+            catalog["prefixes"].setdefault(term[:length], []).append(term)
+
+    for sort, (key, reverse) in CATALOG_SORT_KEYS.items():
+        catalog["sorted"][sort] = sorted(
+            assets, key=lambda asset_id: (key(assets[asset_id]), asset_id)
+        )
+        if reverse:
+            catalog["sorted"][sort].reverse()
+    return catalog
+
+
+def load_catalog(previous=None):
+    """Load asset JSON into a catalog, re-reading only files that changed."""
+    stats = catalog_file_stats()
+    if previous is not None and previous["stats"] == stats:
+        return previous
+
+    previous_assets = previous["assets"] if previous else {}
+    previous_stats = previous["stats"] if previous else {}
+    assets = {}
+    for filename, file_stat in stats.items():
+        asset_id = os.path.basename(filename).replace(".json", "")
+        if previous_stats.get(filename) == file_stat and asset_id in previous_assets:
+            assets[asset_id] = previous_assets[asset_id]
+            continue
+        asset = read_as_json(filename)
+        if isinstance(asset, dict):
+            assets[asset_id] = asset
+    return build_catalog(assets, stats)
+
+
+def catalog_search(catalog, query):
+    """Return {asset_id: score} for assets matching every word in query.
+
+    The last word is treated as a prefix so results update while typing.
+    """
+    tokens = search_tokens(query)
+    if not tokens:
+        return {}
+    scores = None
+    for position, token in enumerate(tokens):
+        if position == len(tokens) - 1:
+            terms = [
+                term
+                for term in catalog["prefixes"].get(token[:SEARCH_PREFIX_LENGTH], [])
+                if term.startswith(token)
+            ]
+        else:
+            terms = [token] if token in catalog["terms"] else []
+        matches = {}
+        for term in terms:
+            for asset_id, frequency in catalog["terms"][term].items():
+                matches[asset_id] = matches.get(asset_id, 0) + frequency
+        if scores is None:
+            scores = matches
+        else:
+            scores = {
+                asset_id: score + matches[asset_id]
+                for asset_id, score in scores.items()
+                if asset_id in matches
+            }
+        if not scores:
+            break
+    return scores or {}
+
+
+def catalog_query_int(query, name, default):
+    try:
+        return int(query.get(name, [default])[0])
+    except ValueError:
+        return None
+
+
+def catalog_route(catalog, path, query):
+    """Resolve a request path to (status, data)."""
+    parts = [part for part in path.split("/") if part]
+    if len(parts) == 2 and parts[0] == "assets":
+        asset = catalog["assets"].get(parts[1])
+        if asset is None:
+            return 404, {"error": "asset not found: %s" % parts[1]}
+        return 200, asset
+    if parts not in (["assets"], ["search"]):
+        return 404, {"error": "not found: %s" % path}
+
+    page = catalog_query_int(query, "page", 1)
+    per_page = catalog_query_int(query, "per_page", CATALOG_DEFAULT_PAGE_SIZE)
+    if not page or page < 1 or not per_page or per_page < 1:
+        return 400, {"error": "page and per_page must be positive integers"}
+    per_page = min(per_page, CATALOG_MAX_PAGE_SIZE)
+
+    sort = query.get("sort", ["relevance" if parts[0] == "search" else "id"])[0]
+    if sort not in CATALOG_SORT_KEYS and sort != "relevance":
+        return 400, {"error": "unsupported sort: %s" % sort}
+
+    selected = None
+    for name, index in (
+        ("tag", "tags"),
+        ("platform", "platforms"),
+        ("author", "authors"),
+    ):
+        for value in query.get(name, []):
+            if name != "author":
+                value = value.lower()
+            matches = catalog[index].get(value, set())
+            selected = matches if selected is None else selected & matches
+    for value in query.get("library", []):
+        matches = catalog["library"][value.lower() in ("1", "true", "yes")]
+        selected = matches if selected is None else selected & matches
+
+    scores = None
+    if "q" in query:
+        scores = catalog_search(catalog, " ".join(query["q"]))
+        matches = set(scores)
+        selected = matches if selected is None else selected & matches
+    elif sort == "relevance":
+        return 400, {"error": "sort=relevance requires q"}
+
+    if sort == "relevance":
+        ordered = sorted(selected, key=lambda asset_id: (-scores[asset_id], asset_id))
+    elif selected is None:
+        ordered = catalog["sorted"][sort]
+    else:
+        ordered = [
+            asset_id for asset_id in catalog["sorted"][sort] if asset_id in selected
+        ]
+
+    start = (page - 1) * per_page
+    return 200, {
+        "total": len(ordered),
+        "page": page,
+        "per_page": per_page,
+        "pages": (len(ordered) + per_page - 1) // per_page,
+        "assets": [
+            catalog["assets"][asset_id]
+            for asset_id in ordered[start : start + per_page]
+        ],
+    }
+
+
+def encode_catalog_response(data):
+    body = json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return {
+        "body": body,
+        "gzip": gzip.compress(body, 6) if len(body) >= CATALOG_GZIP_MIN_SIZE else None,
+        "etag": '"%s"' % hashlib.sha256(body).hexdigest()[:32],
+    }
+
+
+class CatalogRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY keep-alive
+    # clients wait for the delayed ACK on every response.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        catalog = self.server.catalog
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        # Query parameter order does not change the response, so it does not
+        # get its own cache entry.
+        key = (
+            parsed.path,
+            tuple(sorted((name, tuple(values)) for name, values in query.items())),
+        )
+        responses = catalog["responses"]
+        with catalog["responses_lock"]:
+            response = responses.get(key)
+            if response is not None:
+                responses.move_to_end(key)
+        if response is None:
+            status, data = catalog_route(catalog, parsed.path, query)
+            response = (status, encode_catalog_response(data))
+            with catalog["responses_lock"]:
+                responses[key] = response
+                responses.move_to_end(key)
+                while len(responses) > CATALOG_RESPONSE_CACHE_SIZE:
+                    responses.popitem(last=False)
+        status, encoded = response
+
+        if status == 200 and encoded["etag"] in [
+            tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")
+        ]:
+            self.send_response(304)
+            self.send_header("ETag", encoded["etag"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = encoded["body"]
+        use_gzip = encoded["gzip"] is not None and "gzip" in self.headers.get(
+            "Accept-Encoding", ""
+        )
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", encoded["etag"])
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            body = encoded["gzip"]
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_catalog(port=8000, reload_interval=1.0):
+    """Serve the asset catalog read-only over HTTP from memory.
+
+    Changed asset files are picked up by a background thread that swaps in a
+    rebuilt catalog, so requests never wait for a reload.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), CatalogRequestHandler)
+    server.daemon_threads = True
+    server.catalog = load_catalog()
+    print(
+        "Serving %d assets on http://127.0.0.1:%d/assets"
+        % (len(server.catalog["assets"]), server.server_address[1]),
+        flush=True,
+    )
+
+    def reload_changed_files():
+        while True:
+            time.sleep(reload_interval)
+            catalog = load_catalog(server.catalog)
+            if catalog is not server.catalog:
+                server.catalog = catalog
+                print(
+                    "Reloaded catalog (%d assets)" % len(catalog["assets"]), flush=True
+                )
+
+    threading.Thread(target=reload_changed_files, daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+ASSET_VALIDATION_RULES = [
+    ("authors", asset_author_errors),
+    ("external actions", asset_external_action_errors),
+    ("images", asset_image_errors),
+    ("schema", asset_schema_errors),
+]
+
+
+def local_thumbnail(asset):
+    thumbnail = (asset.get("images") or {}).get("thumb")
+    if not isinstance(thumbnail, str) or os.path.basename(thumbnail) != thumbnail:
+        return None
+    return thumbnail
+
+
+def watch_file_stats():
+    stats = {}
+    for filename in find_files("assets", "*"):
+        try:
+            stat_result = os.stat(filename)
+        except OSError:
+            continue
+        stats[filename] = (stat_result.st_mtime_ns, stat_result.st_size)
+    return stats
+
+
+def watch_assets(interval=0.2, debounce=0.3, rebuild=False):
+    """Revalidate edited assets, and with rebuild what is derived from them.
+
+    The catalog stays loaded between edits. A changed asset JSON re-runs every
+    rule for that asset only; an added or removed image re-runs the image rule
+    for the assets that reference it. Changes are batched until the files have
+    been quiet for the debounce period so editors that save in several steps
+    are validated once.
+
+    Only files are read by default. With rebuild, the latest_release summary
+    of the changed assets is brought up to date and the artifacts that
+    already exist in the working directory are refreshed: header.json
+    timestamps, search-index.json (from term maps kept in memory) and the
+    change feed, which only re-reads assets whose header timestamp moved.
+    These are committed by the scheduled workflows, so this is for local
+    previews of the site rather than for pull requests.
+    """
+    assets = {}
+    image_references = {}
+    errors = {}
+    header_map = None
+    if rebuild and os.path.exists("header.json"):
+        header_map = read_header_map()
+    search_documents = None
+    search_releases = False
+    if rebuild and os.path.exists(SEARCH_INDEX_FILE):
+        index = read_as_json(SEARCH_INDEX_FILE)
+        search_releases = isinstance(index, dict) and index.get("releases", False)
+        search_documents = read_search_index_documents(index, search_releases)
+    rebuild_change_feed = rebuild and os.path.exists(CHANGE_FEED_STATE_FILE)
+
+    def rebuild_artifacts(changed_ids, removed_ids):
+        """Refresh release summaries and existing artifacts for touched assets."""
+        now = int(time.time())
+        summaries = 0
+        for asset_id in changed_ids:
+            asset = assets[asset_id]
+            if not isinstance(asset, dict):
+                continue
+            filename = os.path.join("assets", asset_id + ".json")
+            if refresh_latest_release(filename, asset):
+                summaries += 1
+                stat_result = os.stat(filename)
+                stats[filename] = (stat_result.st_mtime_ns, stat_result.st_size)
+            timestamp = None
+            if header_map is not None:
+                # Always move the timestamp forward, even within the same
+                # second, so the change feed re-reads the asset.
+                timestamp = max(now, header_map.get(asset_id + ".json", 0) + 1)
+                header_map[asset_id + ".json"] = timestamp
+            if search_documents is not None:
+                document = dict(asset)
+                if search_releases:
+                    load_release_history(document)
+                search_documents[asset_id] = (
+                    timestamp,
+                    search_terms_for_asset(document, search_releases),
+                )
+        for asset_id in removed_ids:
+            if search_documents is not None:
+                search_documents.pop(asset_id, None)
+
+        rebuilt = []
+        if summaries:
+            rebuilt.append("release summaries of %d asset(s)" % summaries)
+        if header_map is not None and changed_ids:
+            write_as_json("header.json", header_map)
+            rebuilt.append("header.json")
+        if search_documents is not None:
+            write_search_index(search_documents, search_releases)
+            rebuilt.append(SEARCH_INDEX_FILE)
+        if rebuild_change_feed:
+            with contextlib.redirect_stdout(io.StringIO()):
+                update_change_feed()
+            rebuilt.append(CHANGE_FEED_FILE)
+        if rebuilt:
+            print("Rebuilt %s" % ", ".join(rebuilt))
+
+    def asset_id_for(filename):
+        return os.path.basename(filename).replace(".json", "")
+
+    def is_asset_json(filename):
+        return os.path.dirname(filename) == "assets" and filename.endswith(".json")
+
+    def index_asset(asset_id, asset):
+        previous = assets.get(asset_id)
+        if isinstance(previous, dict) and local_thumbnail(previous):
+            image_references.get(local_thumbnail(previous), set()).discard(asset_id)
+        if asset is None and not os.path.exists(
+            os.path.join("assets", asset_id + ".json")
+        ):
+            assets.pop(asset_id, None)
+            errors.pop(asset_id, None)
+            return False
+        assets[asset_id] = asset
+        if isinstance(asset, dict) and local_thumbnail(asset):
+            image_references.setdefault(local_thumbnail(asset), set()).add(asset_id)
+        return True
+
+    def check(asset_id, rules):
+        asset_errors = errors.setdefault(asset_id, {})
+        for name, rule in ASSET_VALIDATION_RULES:
+            if name in rules:
+                asset_errors[name] = rule(asset_id, assets[asset_id])
+
+    stats = watch_file_stats()
+    for filename in stats:
+        if is_asset_json(filename):
+            asset_id = asset_id_for(filename)
+            index_asset(asset_id, read_as_json(filename))
+            check(asset_id, [name for name, rule in ASSET_VALIDATION_RULES])
+    invalid = [asset_id for asset_id in errors if any(errors[asset_id].values())]
+    print(
+        "Watching %d assets in assets/ (%d with errors); press Ctrl+C to stop"
+        % (len(assets), len(invalid)),
+        flush=True,
+    )
+
+    pending = set()
+    last_change = 0
+    try:
+        while True:
+            time.sleep(interval)
+            current = watch_file_stats()
+            changed = set(
+                filename
+                for filename in set(stats) | set(current)
+                if stats.get(filename) != current.get(filename)
+            )
+            stats = current
+            if changed:
+                pending.update(changed)
+                last_change = time.time()
+                continue
+            if not pending or time.time() - last_change < debounce:
+                continue
+
+            start = time.perf_counter()
+            checks = {}
+            changed_ids = []
+            removed_ids = []
+            for filename in sorted(pending):
+                if is_asset_json(filename):
+                    asset_id = asset_id_for(filename)
+                    asset = read_as_json(filename) if filename in stats else None
+                    if index_asset(asset_id, asset):
+                        checks[asset_id] = [
+                            name for name, rule in ASSET_VALIDATION_RULES
+                        ]
+                        changed_ids.append(asset_id)
+                    else:
+                        removed_ids.append(asset_id)
+                        print("%s: removed" % asset_id)
+                elif os.path.dirname(filename) == os.path.join("assets", "images"):
+                    for asset_id in image_references.get(
+                        os.path.basename(filename), ()
+                    ):
+                        checks.setdefault(asset_id, []).append("images")
+            pending = set()
+
+            for asset_id, rules in sorted(checks.items()):
+                check(asset_id, rules)
+                asset_errors = [
+                    error
+                    for name, rule in ASSET_VALIDATION_RULES
+                    for error in errors[asset_id].get(name, [])
+                ]
+                if asset_errors:
+                    for error in asset_errors:
+                        print(" - {}".format(error))
+                else:
+                    print("%s: ok" % asset_id)
+
+            if rebuild and (changed_ids or removed_ids):
+                rebuild_artifacts(changed_ids, removed_ids)
+
+            invalid = [
+                asset_id for asset_id in errors if any(errors[asset_id].values())
+            ]
+            print(
+                "Checked %d asset(s) in %.1f ms; %d asset(s) with errors"
+                % (len(checks), (time.perf_counter() - start) * 1000, len(invalid)),
+                flush=True,
+            )
+    except KeyboardInterrupt:
+        pass
+
+
+def run_command(command, args):
     if command == "help":
-        parser.print_help()
+        build_parser().print_help()
         print(help)
         sys.exit(0)
     elif command == "starcount":
-        update_github_star_count_for_assets(args.githubtoken)
+        update_github_star_count_for_assets(
+            args.githubtoken,
+            resume=args.resume,
+            time_budget=args.timebudget,
+            request_budget=args.requestbudget,
+            shard=args.shard,
+        )
     elif command == "releases":
         limit = args.limit if args.limit is not None else 50
         update_github_releases_and_tags(
-            args.githubtoken, asset_id=args.asset, release_limit=limit
+            args.githubtoken,
+            asset_id=args.asset,
+            release_limit=limit,
+            message_length=args.messagelength,
+            resume=args.resume,
+            time_budget=args.timebudget,
+            request_budget=args.requestbudget,
+            shard=args.shard,
+        )
+    elif command == "event":
+        refresh_assets_from_event(
+            args.githubtoken,
+            event_file=args.event,
+            release_limit=args.limit if args.limit is not None else 50,
+            message_length=args.messagelength,
         )
+    elif command == "tombstones":
+        report_dead_repositories(days=args.deaddays)
+    elif command == "canonicalize":
+        canonicalize_repository_urls(asset_id=args.asset)
     elif command == "libraryurls":
-        update_library_urls_from_release_metadata(asset_id=args.asset)
+        update_library_urls_from_release_metadata(
+            asset_id=args.asset, message_length=args.messagelength
+        )
+    elif command == "splitreleases":
+        split_release_history(asset_id=args.asset, message_length=args.messagelength)
     elif command == "header":
         update_header_json()
+    elif command == "sanitize":
+        sanitize_json_files(check=args.check, jobs=args.jobs)
     elif command == "dates":
         add_creation_date_to_assets()
     elif command == "library":
-        update_is_defold_library_flags(args.githubtoken, asset_id=args.asset)
+        update_is_defold_library_flags(
+            args.githubtoken, asset_id=args.asset, shard=args.shard
+        )
+    elif command == "merge":
+        merge_shards(args.shards)
+    elif command == "schema":
+        write_asset_validator(check=args.check)
+    elif command == "duplicateimages":
+        find_duplicate_images(
+            algorithm=args.hashalgorithm,
+            distance=args.distance,
+            dedupe=args.dedupe,
+            jobs=args.jobs,
+        )
+    elif command == "derivatives":
+        build_image_derivatives(jobs=args.jobs)
+    elif command == "gc-images":
+        collect_garbage_images(dry_run=args.dryrun, keep_heroes=args.keepheroes)
     elif command == "validate":
         validate_asset_authors()
         validate_external_actions()
         validate_asset_images()
+        validate_asset_schema()
+        validate_catalog_consistency()
+    elif command == "watch":
+        watch_assets(rebuild=args.rebuild)
+    elif command == "searchindex":
+        build_search_index(include_releases=args.releasemessages)
+    elif command == "changefeed":
+        update_change_feed()
+    elif command == "serve":
+        serve_catalog(port=args.port)
+    elif command == "significance":
+        report_significance(args.stardelta, args.starratio)
     elif command == "commit":
-        commit_changes(args.githubtoken)
+        commit_changes(args.githubtoken, args.stardelta, args.starratio)
     else:
         print("Unknown command {}".format(command))
+
+
+def sample_stacks(thread_id, interval, stacks, stop):
+    """Count the call stacks of one thread every interval seconds."""
+    while not stop.wait(interval):
+        frame = sys._current_frames().get(thread_id)
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(
+                "%s (%s:%d)"
+                % (
+                    code.co_name,
+                    os.path.basename(code.co_filename),
+                    code.co_firstlineno,
+                )
+            )
+            frame = frame.f_back
+        if names:
+            stack = ";".join(reversed(names))
+            stacks[stack] = stacks.get(stack, 0) + 1
+
+
+def profile_command(command, args, directory, interval=0.005):
+    """Run one command under cProfile and write its reports to directory.
+
+    <command>.txt holds the per-phase breakdown followed by the functions
+    sorted by cumulative time, <command>.prof the raw cProfile data and
+    <command>.folded sampled stacks in the collapsed format read by
+    flamegraph.pl and speedscope.
+    """
+    os.makedirs(directory, exist_ok=True)
+    phase_times.clear()
+    stacks = {}
+    stop = threading.Event()
+    sampler = threading.Thread(
+        target=sample_stacks,
+        args=(threading.get_ident(), interval, stacks, stop),
+        daemon=True,
+    )
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        run_command(command, args)
+    finally:
+        profiler.disable()
+        stop.set()
+        sampler.join()
+        total = time.perf_counter() - start
+
+        times = dict(phase_times)
+        times["transform"] = max(0, total - sum(times.values()))
+        report = io.StringIO()
+        report.write("Command: %s\n" % command)
+        report.write("Total: %.3fs\n\n" % total)
+        report.write("Phase        Seconds  Share\n")
+        for name in PHASES:
+            seconds = times.get(name, 0)
+            report.write(
+                "%-10s %9.3f %5.1f%%\n"
+                % (name, seconds, seconds * 100 / total if total else 0)
+            )
+        report.write("\n")
+        statistics = pstats.Stats(profiler, stream=report)
+        statistics.sort_stats("cumulative").print_stats(80)
+
+        base = os.path.join(directory, command)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        statistics.dump_stats(base + ".prof")
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write("%s %d\n" % (stack, count))
+        print(
+            "Profile for %s (%.3fs): %s"
+            % (
+                command,
+                total,
+                ", ".join("%s %.3fs" % (name, times.get(name, 0)) for name in PHASES),
+            )
+        )
+        print("...wrote %s.txt, %s.prof and %s.folded" % (base, base, base))
+
+
+def main(argv=None):
+    global github_redirect_map, repository_tombstones
+    args = build_parser().parse_args(argv)
+    # Reload redirects.json and tombstones.json from the current directory on
+    # every call.
+    github_redirect_map = None
+    repository_tombstones = None
+    if args.githubappid:
+        if not args.githubappkey:
+            print("--githubappid requires --githubappkey")
+            sys.exit(1)
+        installations = github_tokens(args.githubappinstallations)
+        tokens = github_tokens(args.githubtoken) + github_app_installation_tokens(
+            args.githubappid, args.githubappkey, installations
+        )
+        args.githubtoken = ",".join(tokens)
+    report = None
+    if args.shard:
+        report = {"shard": args.shard[0], "count": args.shard[1], "commands": {}}
+        # Sharded commands are often run one per CI step; keep the results
+        # of earlier steps of the same shard.
+        if os.path.exists(SHARD_REPORT_FILE):
+            previous = read_as_json(SHARD_REPORT_FILE) or {}
+            if (previous.get("shard"), previous.get("count")) == args.shard:
+                report["commands"] = previous.get("commands") or {}
+    for command in args.commands:
+        start = time.perf_counter()
+        requests_before = github_request_count
+        try:
+            if args.profile:
+                profile_command(command, args, args.profiledir)
+            else:
+                run_command(command, args)
+        finally:
+            flush_checkpoint()
+        if github_redirects:
+            print(
+                "%d GitHub request(s) followed a redirect: %s"
+                % (
+                    sum(github_redirects.values()),
+                    ", ".join(
+                        "%s (%d)" % (repo, count)
+                        for repo, count in sorted(github_redirects.items())
+                    ),
+                )
+            )
+            github_redirects.clear()
+        if report and command in SHARDED_COMMANDS:
+            report["commands"][command] = {
+                "seconds": round(time.perf_counter() - start, 3),
+                "requests": github_request_count - requests_before,
+            }
+    if report:
+        with open(SHARD_REPORT_FILE, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()